@@ -14,3 +14,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'babytracker.settings')
 
 # Initialize Django applications
 application = get_wsgi_application()
+
+# The insights analytics stack is otherwise imported on first use. Importing
+# it here under `gunicorn --preload` loads it once in the master, and the
+# forked workers share those pages instead of each importing their own copy.
+if os.environ.get('PRELOAD_ANALYTICS', 'False') == 'True':
+    import tracker.ai_insights  # noqa: F401
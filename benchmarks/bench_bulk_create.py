@@ -0,0 +1,87 @@
+"""
+Benchmark flushing an offline batch of feedings: one bulk POST vs. one POST per event.
+
+Creates a throwaway test database and times both paths end to end through
+the API (parsing, validation, ownership checks, inserts and the response).
+
+Run with DJANGO_DEBUG=False; the debug toolbar's SQL formatting otherwise
+dominates the timings.
+
+Usage:
+    python benchmarks/bench_bulk_create.py [--events 1000] [--single 100]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "babytracker.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from tracker.models import Baby  # noqa: E402
+
+
+def make_events(baby, count):
+    start = timezone.now()
+    return [
+        {
+            "baby": baby.id,
+            "feeding_type": "bottle",
+            "quantity": 120,
+            "time": (start - timedelta(hours=3 * i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--single", type=int, default=100, help="events sent one POST at a time")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(username="bench", password="bench")
+        baby = Baby.objects.create(user=user, name="Bench", birth_date="2023-01-01", gender="Female")
+        client = APIClient()
+        client.force_authenticate(user=user)
+        cache.clear()
+        # Warm up URL resolution and imports outside the timed section
+        client.post(reverse("feeding-bulk"), make_events(baby, 1), format="json")
+
+        events = make_events(baby, args.events)
+        started = time.perf_counter()
+        response = client.post(reverse("feeding-bulk"), events, format="json")
+        bulk = time.perf_counter() - started
+        assert response.status_code == 201, response.data
+
+        events = make_events(baby, args.single)
+        started = time.perf_counter()
+        for event in events:
+            response = client.post(reverse("feeding-list"), event, format="json")
+            assert response.status_code == 201, response.data
+        single = time.perf_counter() - started
+
+        print(f"bulk:   {args.events} events in {bulk * 1000:.1f} ms ({bulk / args.events * 1e6:.0f} us/event)")
+        print(f"single: {args.single} events in {single * 1000:.1f} ms ({single / args.single * 1e6:.0f} us/event)")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
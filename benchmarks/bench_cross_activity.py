@@ -0,0 +1,82 @@
+"""
+Benchmark the feeding-before-sleep correlation used by AIInsights.
+
+Compares the previous per-sleep DataFrame filter against the sorted-array
+binary search in ``tracker.ai_insights.has_event_before``.
+
+Usage:
+    python benchmarks/bench_cross_activity.py [--sizes 10000 100000] [--legacy-max 10000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "babytracker.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from tracker.ai_insights import has_event_before  # noqa: E402
+
+
+def make_events(n, seed=0):
+    """Roughly one feeding every 3 hours and one sleep every 4 hours."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2023-01-01", tz="UTC")
+    feedings = start + pd.to_timedelta(np.sort(rng.uniform(0, n * 3, n)), unit="h")
+    sleep_starts = start + pd.to_timedelta(np.sort(rng.uniform(0, n * 3, n)), unit="h")
+    feeding_df = pd.DataFrame({"time": feedings})
+    sleep_df = pd.DataFrame({"start_time": sleep_starts})
+    return feeding_df, sleep_df
+
+
+def legacy(feeding_df, sleep_df):
+    flags = []
+    for _, sleep in sleep_df.iterrows():
+        pre_feedings = feeding_df[
+            (feeding_df["time"] > sleep["start_time"] - pd.Timedelta(hours=1)) &
+            (feeding_df["time"] < sleep["start_time"])
+        ]
+        flags.append(not pre_feedings.empty)
+    return np.array(flags)
+
+
+def vectorized(feeding_df, sleep_df):
+    return has_event_before(
+        feeding_df["time"].values, sleep_df["start_time"].values, np.timedelta64(1, "h")
+    )
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000,
+                        help="skip the O(n*m) loop above this many events")
+    args = parser.parse_args()
+
+    print(f"{'events':>10} {'legacy (s)':>12} {'vectorized (s)':>16} {'speedup':>10}")
+    for n in args.sizes:
+        feeding_df, sleep_df = make_events(n)
+        fast, fast_time = timed(vectorized, feeding_df, sleep_df)
+        if n <= args.legacy_max:
+            slow, slow_time = timed(legacy, feeding_df, sleep_df)
+            assert np.array_equal(slow, fast), "vectorized result differs from legacy loop"
+            print(f"{n:>10} {slow_time:>12.3f} {fast_time:>16.4f} {slow_time / fast_time:>9.0f}x")
+        else:
+            print(f"{n:>10} {'skipped':>12} {fast_time:>16.4f} {'-':>10}")
+
+
+if __name__ == "__main__":
+    main()
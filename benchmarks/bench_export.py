@@ -0,0 +1,73 @@
+"""
+Benchmark peak Python memory of the streaming baby export as history grows.
+
+Creates a throwaway test database, fills it with one baby's feedings and
+measures the tracemalloc peak while the NDJSON and CSV streams are consumed.
+
+Usage:
+    python benchmarks/bench_export.py [--rows 10000 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "babytracker.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from tracker.export import stream_csv, stream_ndjson  # noqa: E402
+from tracker.models import Baby, Feeding  # noqa: E402
+
+
+def populate(baby, rows):
+    start = timezone.now()
+    Feeding.objects.filter(baby=baby).delete()
+    Feeding.objects.bulk_create(
+        [Feeding(baby=baby, feeding_type="bottle", quantity=120, time=start) for _ in range(rows)],
+        batch_size=5000,
+    )
+
+
+def measure(stream):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in stream)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        user = User.objects.create_user(username="bench", password="bench")
+        baby = Baby.objects.create(user=user, name="Bench", birth_date="2023-01-01", gender="Female")
+
+        print(f"{'rows':>8} {'format':>7} {'output (MB)':>12} {'time (s)':>9} {'peak (MB)':>10}")
+        for rows in args.rows:
+            populate(baby, rows)
+            for name, stream in (("ndjson", stream_ndjson), ("csv", stream_csv)):
+                size, elapsed, peak = measure(stream(baby))
+                print(f"{rows:>8} {name:>7} {size / 1e6:>12.1f} {elapsed:>9.2f} {peak / 1e6:>10.2f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
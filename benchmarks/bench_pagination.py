@@ -0,0 +1,81 @@
+"""
+Benchmark deep-page latency of keyset (cursor) vs. offset pagination.
+
+Creates a throwaway test database, fills it with one baby's feedings and
+times fetching a page at increasing depths with both strategies.
+
+Usage:
+    python benchmarks/bench_pagination.py [--rows 100000] [--page-size 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "babytracker.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from tracker.models import Baby, Feeding  # noqa: E402
+
+
+def populate(rows):
+    user = User.objects.create_user(username="bench", password="bench")
+    baby = Baby.objects.create(user=user, name="Bench", birth_date="2023-01-01", gender="Female")
+    start = timezone.now()
+    Feeding.objects.bulk_create(
+        [Feeding(baby=baby, feeding_type="bottle", quantity=120) for _ in range(rows)], batch_size=5000
+    )
+    # time is auto_now_add; spread rows three hours apart
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE tracker_feeding SET time = %s - (id * interval '3 hours') WHERE baby_id = %s",
+            [start, baby.id],
+        )
+        cursor.execute("ANALYZE tracker_feeding")
+    return baby
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        baby = populate(args.rows)
+        queryset = Feeding.objects.filter(baby=baby).order_by("-time")
+        size = args.page_size
+
+        print(f"{'page':>8} {'offset (ms)':>12} {'keyset (ms)':>12}")
+        for depth in (0, args.rows // 100, args.rows // 10, args.rows // 2, args.rows - size):
+            page = depth // size
+            boundary = queryset.values_list("time", flat=True)[depth]
+            offset = best_of(lambda: list(queryset[depth:depth + size]))
+            keyset = best_of(lambda: list(queryset.filter(time__lte=boundary)[:size]))
+            print(f"{page:>8} {offset * 1000:>12.2f} {keyset * 1000:>12.2f}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
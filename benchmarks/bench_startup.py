@@ -0,0 +1,64 @@
+"""
+Benchmark worker boot time and memory with and without the analytics stack.
+
+Each run starts a fresh interpreter that boots Django and loads the URL
+configuration (and with it every view module), as a gunicorn worker does
+before serving its first request. "eager" also imports ``tracker.ai_insights``,
+which is what every worker paid when the views imported it at module level;
+"lazy" is the default boot now that it is imported on the first insights
+request. Reports the median import time and resident memory per worker
+(read from /proc, so Linux only).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+if sys.argv[1] == "eager":
+    import tracker.ai_insights
+elapsed = time.perf_counter() - started
+with open("/proc/self/status") as status:
+    rss_kb = int(next(line for line in status if line.startswith("VmRSS:")).split()[1])
+heavy = sorted(name for name in ("numpy", "pandas", "scipy", "sklearn") if name in sys.modules)
+print(json.dumps({"seconds": elapsed, "rss_kb": rss_kb, "heavy": heavy}))
+"""
+
+
+def boot(mode):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="babytracker.settings", DJANGO_DEBUG="False")
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, mode], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'boot (ms)':>10} {'RSS (MB)':>9}  modules loaded")
+    for mode in ("eager", "lazy"):
+        runs = [boot(mode) for _ in range(args.runs)]
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss = statistics.median(run["rss_kb"] for run in runs)
+        heavy = ", ".join(runs[-1]["heavy"]) or "-"
+        print(f"{mode:>6} {seconds * 1000:>10.0f} {rss / 1024:>9.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Anomalies flagged as feedings and sleeps are written.
+
+Each written event is scored against its baby's running moments
+(``tracker.running_statistics``) once its own value has been folded in, as
+a z-score over the whole history would score it, so flagging costs no
+history scan. Feedings are flagged for a gap since the previous feeding
+more than two standard deviations above the mean interval, or a quantity
+beyond 2.5 standard deviations either way; completed sleeps for a
+duration beyond 2.5 standard deviations. Moments built from fewer than
+five values are not trusted.
+
+An anomaly records that an event stood out when it was written: events
+are rescored when they or their predecessor change, not when later
+writes shift the moments. ``replay_anomalies`` recomputes a baby's
+anomalies as if its history had been written in time order.
+"""
+from datetime import timedelta
+from django.db import transaction
+
+from .models import Anomaly, Feeding, Sleep
+from .running_statistics import (
+    HOUR, moments_add, moments_std, sleep_duration, stored_moments, zscore,
+)
+
+MIN_SAMPLES = 5  # As AIInsights.min_data_points
+
+FEEDING_GAP_LIMIT = 2.0
+FEEDING_QUANTITY_LIMIT = 2.5
+SLEEP_DURATION_LIMIT = 2.5
+
+
+def _score(value, moments, limit, two_sided=True):
+    """The z-score of ``value`` if it lies beyond ``limit``, else None."""
+    if moments[0] < MIN_SAMPLES:
+        return None
+    score = zscore(value, *moments)
+    if score is None or (abs(score) if two_sided else score) <= limit:
+        return None
+    return score
+
+
+def _anomaly(kind, baby_id, time, value, moments, score, **event):
+    return Anomaly(kind=kind, baby_id=baby_id, time=time, value=value, mean=moments[1],
+                   std=moments_std(*moments), zscore=score, **event)
+
+
+def _record(anomaly, fresh, kind, **event):
+    """Store ``anomaly`` as the event's ``kind`` anomaly, or clear it when None.
+
+    ``fresh`` events cannot have one yet, which saves the lookup.
+    """
+    if anomaly is None:
+        if not fresh:
+            Anomaly.objects.filter(kind=kind, **event).delete()
+        return
+    if fresh:
+        anomaly.save()
+        return
+    values = {field: getattr(anomaly, field) for field in ('baby_id', 'time', 'value', 'mean', 'std', 'zscore')}
+    Anomaly.objects.update_or_create(kind=kind, **event, defaults=values)
+
+
+def _gap_anomaly(moments, baby_id, pk, time, previous_time):
+    if previous_time is None:
+        return None
+    gap = (time - previous_time) / HOUR
+    score = _score(gap, moments, FEEDING_GAP_LIMIT, two_sided=False)
+    if score is None:
+        return None
+    return _anomaly('feeding_interval', baby_id, time, gap, moments, score, feeding_id=pk)
+
+
+def _quantity_anomaly(moments, baby_id, pk, time, quantity):
+    score = _score(quantity, moments, FEEDING_QUANTITY_LIMIT)
+    if score is None:
+        return None
+    return _anomaly('feeding_quantity', baby_id, time, quantity, moments, score, feeding_id=pk)
+
+
+def _duration_anomaly(moments, baby_id, pk, start, hours):
+    if hours is None:
+        return None
+    score = _score(hours, moments, SLEEP_DURATION_LIMIT)
+    if score is None:
+        return None
+    return _anomaly('sleep_duration', baby_id, start, hours, moments, score, sleep_id=pk)
+
+
+def flag_feeding_gap(statistics, baby_id, row, previous_time, fresh=False):
+    """Score the gap before the feeding ``row``, a (time, id) pair, that ``previous_time`` (or None) precedes."""
+    time, pk = row
+    anomaly = _gap_anomaly(stored_moments(statistics, 'interval'), baby_id, pk, time, previous_time)
+    _record(anomaly, fresh, 'feeding_interval', feeding_id=pk)
+
+
+def flag_feeding_quantity(statistics, feeding, fresh=False):
+    moments = stored_moments(statistics, 'quantity')
+    anomaly = _quantity_anomaly(moments, feeding.baby_id, feeding.pk, feeding.time, feeding.quantity)
+    _record(anomaly, fresh, 'feeding_quantity', feeding_id=feeding.pk)
+
+
+def flag_feeding(statistics, feeding, before, fresh=False):
+    """Score a written feeding's gap since ``before``, its (time, id) predecessor or None, and its quantity."""
+    flag_feeding_gap(statistics, feeding.baby_id, (feeding.time, feeding.pk), before and before[0], fresh)
+    flag_feeding_quantity(statistics, feeding, fresh)
+
+
+def flag_new_feedings(statistics, baby_id, feedings, sequence):
+    """Score a batch of new feedings and rescore the older ones whose predecessor they became.
+
+    ``sequence`` is the span of (time, id) rows returned by ``add_feedings``.
+    """
+    new = {feeding.pk for feeding in feedings}
+    intervals, quantities = stored_moments(statistics, 'interval'), stored_moments(statistics, 'quantity')
+    anomalies = [
+        _quantity_anomaly(quantities, baby_id, feeding.pk, feeding.time, feeding.quantity) for feeding in feedings
+    ]
+    for (previous_time, previous_pk), (time, pk) in zip(sequence, sequence[1:]):
+        if pk in new:
+            anomalies.append(_gap_anomaly(intervals, baby_id, pk, time, previous_time))
+        elif previous_pk in new:
+            flag_feeding_gap(statistics, baby_id, (time, pk), previous_time)
+    Anomaly.objects.bulk_create([anomaly for anomaly in anomalies if anomaly is not None])
+
+
+def flag_sleep(statistics, sleep, fresh=False):
+    """Score a written sleep's duration; an ongoing sleep, which needs no ``statistics``, clears any earlier flag."""
+    hours = sleep_duration(sleep)
+    anomaly = None
+    if hours is not None:
+        moments = stored_moments(statistics, 'duration')
+        anomaly = _duration_anomaly(moments, sleep.baby_id, sleep.pk, sleep.start_time, hours)
+    _record(anomaly, fresh, 'sleep_duration', sleep_id=sleep.pk)
+
+
+def flag_new_sleeps(statistics, sleeps):
+    moments = stored_moments(statistics, 'duration')
+    anomalies = [
+        _duration_anomaly(moments, sleep.baby_id, sleep.pk, sleep.start_time, sleep_duration(sleep))
+        for sleep in sleeps
+    ]
+    Anomaly.objects.bulk_create([anomaly for anomaly in anomalies if anomaly is not None])
+
+
+def replay_anomalies(baby):
+    """Recompute the baby's anomalies as if its events had been written in time order. Returns their count."""
+    anomalies = []
+    intervals = quantities = durations = (0, 0.0, 0.0)
+
+    previous_time = None
+    feedings = Feeding.objects.filter(baby=baby).order_by('time', 'pk').values_list('pk', 'time', 'quantity')
+    for pk, time, quantity in feedings.iterator():
+        if previous_time is not None:
+            intervals = moments_add(*intervals, (time - previous_time) / HOUR)
+            anomalies.append(_gap_anomaly(intervals, baby.id, pk, time, previous_time))
+        quantities = moments_add(*quantities, quantity)
+        anomalies.append(_quantity_anomaly(quantities, baby.id, pk, time, quantity))
+        previous_time = time
+
+    sleeps = Sleep.objects.filter(baby=baby, end_time__isnull=False).order_by('start_time', 'pk')
+    for pk, start, end in sleeps.values_list('pk', 'start_time', 'end_time').iterator():
+        hours = (end - start) / HOUR
+        durations = moments_add(*durations, hours)
+        anomalies.append(_duration_anomaly(durations, baby.id, pk, start, hours))
+
+    anomalies = [anomaly for anomaly in anomalies if anomaly is not None]
+    with transaction.atomic():
+        Anomaly.objects.filter(baby=baby).delete()
+        Anomaly.objects.bulk_create(anomalies)
+    return len(anomalies)
+
+
+def gap_start(anomaly_time, hours):
+    """When the gap of a ``feeding_interval`` anomaly began."""
+    return anomaly_time - timedelta(microseconds=round(hours * 3.6e9))
@@ -1,11 +1,79 @@
-from rest_framework import generics, permissions
+from datetime import datetime, time, timedelta
+from rest_framework import generics, permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from django_ratelimit.decorators import ratelimit
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils.decorators import method_decorator
+from .models import Baby
+from .pagination import TimeCursorPagination
+from .signals import bulk_created
+
+
+def parse_time_param(params, name, tz=None):
+    """Parse an ISO date or datetime query parameter into an aware datetime.
+
+    A date means its midnight, and values without an offset are read in
+    ``tz`` (the current time zone by default).
+    """
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            parsed_date = parse_date(value)
+            if parsed_date is not None:
+                parsed = datetime.combine(parsed_date, time.min)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Enter an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tz)
+    return parsed
+
+
+# Days of history the insight endpoints analyze unless the request asks otherwise
+INSIGHTS_DEFAULT_WINDOW_DAYS = 90
+INSIGHTS_MAX_WINDOW_DAYS = 3650
+
+
+def parse_insight_window(params, baby):
+    """Return the (since, until) window an insights request analyzes.
+
+    ``?since=`` (inclusive) and ``?until=`` (exclusive) bound it explicitly.
+    Without ``since`` the window reaches ``?window_days=`` days back: from
+    ``until`` when given, otherwise it covers the last that many local days
+    of the baby, today included. ``until`` is None for an open end. Dates
+    and datetimes without an offset are in the baby's time zone.
+    """
+    since = parse_time_param(params, 'since', baby.tzinfo)
+    until = parse_time_param(params, 'until', baby.tzinfo)
+    if since is None:
+        days = params.get('window_days', str(INSIGHTS_DEFAULT_WINDOW_DAYS))
+        if not days.isdigit() or not 1 <= int(days) <= INSIGHTS_MAX_WINDOW_DAYS:
+            raise ValidationError({'window_days': f"Enter a whole number from 1 to {INSIGHTS_MAX_WINDOW_DAYS}."})
+        days = int(days)
+        if until is not None:
+            since = until - timedelta(days=days)
+        else:
+            # Start at local midnight so the window, and the cache key built
+            # from it, only move once a day
+            first_day = timezone.localdate(timezone=baby.tzinfo) - timedelta(days=days - 1)
+            since = timezone.make_aware(datetime.combine(first_day, time.min), baby.tzinfo)
+    if until is not None and since >= until:
+        raise ValidationError({'until': "Must be later than since."})
+    return since, until
 
 
 class BabyOwnedCreateView(generics.ListCreateAPIView):
     """Base view for models that belong to a baby owned by the user"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeCursorPagination
+    time_field = 'time'  # Indexed column lists are paginated on
     
     @method_decorator(ratelimit(key='user', rate='100/h', method='GET'))
     @method_decorator(ratelimit(key='user', rate='1000/h', method='POST'))
@@ -13,7 +81,24 @@ class BabyOwnedCreateView(generics.ListCreateAPIView):
         return super().dispatch(*args, **kwargs)
     
     def get_queryset(self):
-        return self.model.objects.filter(baby__user=self.request.user)
+        queryset = self.model.objects.filter(baby__user=self.request.user)
+        params = self.request.query_params
+
+        # ?baby=, ?since= (inclusive) and ?until= (exclusive) narrow the list to
+        # a range scan on the model's (baby, time_field) index
+        baby_id = params.get('baby')
+        if baby_id:
+            if not baby_id.isdigit():
+                raise ValidationError({'baby': "Enter a valid baby id."})
+            queryset = queryset.filter(baby_id=baby_id)
+
+        is_datetime = isinstance(self.model._meta.get_field(self.time_field), models.DateTimeField)
+        for name, lookup in (('since', 'gte'), ('until', 'lt')):
+            moment = parse_time_param(params, name)
+            if moment is not None:
+                value = moment if is_datetime else timezone.localtime(moment).date()
+                queryset = queryset.filter(**{f'{self.time_field}__{lookup}': value})
+        return queryset
     
     def perform_create(self, serializer):
         # Verify the baby belongs to the current user
@@ -22,12 +107,58 @@ class BabyOwnedCreateView(generics.ListCreateAPIView):
             from .models import Baby
             try:
                 baby = Baby.objects.get(id=baby_id, user=self.request.user)
-                serializer.save(baby=baby)
             except Baby.DoesNotExist:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError("You don't have permission to add data for this baby.")
+            # One transaction for the row and the statistics, rollups and
+            # anomalies its signals keep, rather than one for each of them
+            with transaction.atomic():
+                serializer.save(baby=baby)
         else:
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+
+
+class BabyOwnedBulkCreateView(generics.GenericAPIView):
+    """
+    Base view that creates a batch of baby-owned records from a JSON array.
+
+    Ownership of every referenced baby is checked with one query and the rows
+    are inserted with one ``bulk_create`` in a single transaction. The batch
+    is all-or-nothing: if any item is invalid nothing is saved and the 400
+    response lists the errors for each item, in request order. On success the
+    response carries the new ids, also in request order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_batch_size = 1000
+
+    @method_decorator(ratelimit(key='user', rate='100/h', method='POST'))
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        baby_ids = set()
+        if isinstance(items, list):
+            for item in items[:self.max_batch_size]:
+                baby_id = str(item.get('baby', '')) if isinstance(item, dict) else ''
+                if baby_id.isdigit():
+                    baby_ids.add(int(baby_id))
+        babies = Baby.objects.filter(user=request.user, id__in=baby_ids).in_bulk()
+
+        serializer = self.get_serializer_class()(
+            data=items,
+            many=True,
+            max_length=self.max_batch_size,
+            context={**self.get_serializer_context(), 'babies': babies},
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            instances = serializer.save()
+            bulk_created.send(sender=self.model, instances=instances)
+        # The client already holds every field it sent; echoing the records
+        # back would cost as much as validating them, so return just the ids
+        return Response({'ids': [instance.id for instance in instances]}, status=status.HTTP_201_CREATED)
 
 
 class BabyOwnedDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -43,10 +174,21 @@ class BabyOwnedDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         return self.model.objects.filter(baby__user=self.request.user)
 
+    def perform_update(self, serializer):
+        # One transaction for the row and everything its signals keep, as on create
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
 
 class UserOwnedCreateView(generics.ListCreateAPIView):
     """Base view for models that belong directly to the user"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TimeCursorPagination
+    time_field = None  # Paginate on the primary key unless the model has a time column
     
     @method_decorator(ratelimit(key='user', rate='100/h', method='GET'))
     @method_decorator(ratelimit(key='user', rate='1000/h', method='POST'))
@@ -0,0 +1,62 @@
+"""
+Versioned caching for AI insight payloads.
+
+Every baby has a data-version counter in the default cache. Writes to the
+tracked models bump the counter (see ``tracker.signals``), which moves all of
+that baby's insight payloads onto new keys. Stale payloads are never read
+again and simply expire, so no explicit invalidation is needed.
+"""
+import time
+from datetime import timezone
+
+from django.core.cache import cache
+
+INSIGHTS_CACHE_TIMEOUT = 60 * 60 * 24  # 1 day
+
+
+def _version_key(baby_id):
+    return f"tracker:baby:{baby_id}:data-version"
+
+
+def _initial_version():
+    # Seed from the clock rather than 1 so a counter that was evicted and
+    # recreated can never land on a version whose payloads are still cached.
+    return time.time_ns() // 1000
+
+
+def get_data_version(baby_id):
+    """Return the baby's current data version, creating it on first use."""
+    key = _version_key(baby_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(baby_id):
+    """Invalidate every cached insight payload for the baby."""
+    try:
+        return cache.incr(_version_key(baby_id))
+    except ValueError:
+        # Counter missing or evicted: start a fresh one
+        version = _initial_version()
+        cache.set(_version_key(baby_id), version, timeout=None)
+        return version
+
+
+def window_key(window):
+    """Cache-key fragment for an analysis window of (since, until), either of which may be None."""
+    return "-".join(
+        moment.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%S.%f") if moment else "" for moment in window
+    )
+
+
+def cached_insights(baby_id, kind, compute):
+    """Return the payload for (baby, kind), computing and caching it on a miss."""
+    key = f"tracker:baby:{baby_id}:insights:{kind}:v{get_data_version(baby_id)}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = compute()
+        cache.set(key, payload, INSIGHTS_CACHE_TIMEOUT)
+    return payload
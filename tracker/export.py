@@ -0,0 +1,57 @@
+"""
+Streaming export of a baby's full history.
+
+Rows are read through ``QuerySet.iterator()``, which on PostgreSQL uses a
+server-side cursor, and are encoded one at a time as the response is
+consumed. Only one chunk of rows is held in memory, however long the
+history is.
+"""
+from .models import Feeding, DiaperChange, Sleep, GrowthMeasurement, DevelopmentalMilestone, DoctorAppointment, Reminder
+from .renderers import csv_line, ndjson_line
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (record type, model, ordering field)
+EXPORT_MODELS = (
+    ('feeding', Feeding, 'time'),
+    ('diaper_change', DiaperChange, 'time'),
+    ('sleep', Sleep, 'start_time'),
+    ('growth_measurement', GrowthMeasurement, 'date'),
+    ('developmental_milestone', DevelopmentalMilestone, 'date_achieved'),
+    ('appointment', DoctorAppointment, 'date'),
+    ('reminder', Reminder, 'time'),
+)
+
+
+def _export_fields(model):
+    # Every row belongs to the exported baby, so the owner columns are noise
+    return [field.attname for field in model._meta.concrete_fields if field.name not in ('baby', 'user')]
+
+
+def _rows(baby):
+    for record_type, model, ordering in EXPORT_MODELS:
+        fields = _export_fields(model)
+        queryset = model.objects.filter(baby=baby).order_by(ordering, 'id').values_list(*fields)
+        for values in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield record_type, fields, values
+
+
+def export_columns():
+    """Union of the columns of every exported model, in a stable order."""
+    columns = ['type']
+    for _, model, _ in EXPORT_MODELS:
+        columns.extend(field for field in _export_fields(model) if field not in columns)
+    return columns
+
+
+def stream_ndjson(baby):
+    for record_type, fields, values in _rows(baby):
+        yield ndjson_line({'type': record_type, **dict(zip(fields, values))})
+
+
+def stream_csv(baby):
+    columns = export_columns()
+    yield csv_line(columns)
+    for record_type, fields, values in _rows(baby):
+        row = dict(zip(fields, values), type=record_type)
+        yield csv_line([row.get(column) for column in columns])
@@ -0,0 +1,186 @@
+"""
+Maintenance and reads of the ``ActivityHeatmap`` counters.
+
+Each feeding, sleep or diaper change adds one to the cell of its local
+weekday and hour in the heatmap of its local week. Writes apply the
+difference between the new and the old row as increments of those cells,
+so keeping the heatmaps current costs one upsert per write.
+``rebuild_activity_heatmaps`` recomputes a baby's counters from scratch.
+
+A window reads the weeks it covers in full from the stored rows and counts
+only the partial weeks at its edges by ``GROUP BY``. ``stale_heatmaps``
+compares the stored rows with a recount, for the rebuild command's check.
+"""
+from collections import Counter
+from datetime import datetime, time, timedelta
+from django.db import connection, transaction
+from django.db.models import Count, DateField, Q
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, TruncWeek
+from django.utils import timezone
+
+from .histograms import weekday_hour_counts
+from .models import ActivityHeatmap, DiaperChange, Feeding, Sleep, empty_heatmap
+
+# Model: (event type, time field)
+HEATMAP_EVENTS = {
+    Feeding: ('feeding', 'time'),
+    Sleep: ('sleep', 'start_time'),
+    DiaperChange: ('diaper_change', 'time'),
+}
+
+
+def heatmap_cell(moment, tz):
+    """The local week (its Monday) of ``moment`` and the flat index of its local weekday (0=Monday) and hour."""
+    local = timezone.localtime(moment, tz)
+    return local.date() - timedelta(days=local.weekday()), local.weekday() * 24 + local.hour
+
+
+def heatmap_deltas(instance, tz, sign=1):
+    """Return {(event type, week, cell): amount} that ``instance`` adds to its baby's heatmaps."""
+    event = HEATMAP_EVENTS.get(type(instance))
+    if event is None:
+        return {}
+    event_type, field = event
+    return {(event_type, *heatmap_cell(getattr(instance, field), tz)): sign}
+
+
+def merge_heatmap_deltas(*deltas):
+    """Add several {(event type, week, cell): amount} mappings together, dropping zeros."""
+    merged = Counter()
+    for delta in deltas:
+        for key, amount in delta.items():
+            merged[key] += amount
+    return {key: amount for key, amount in merged.items() if amount}
+
+
+def apply_heatmap_deltas(baby_id, deltas):
+    """Add ``deltas`` to the baby's heatmaps, creating missing weeks."""
+    by_week = {}
+    for (event_type, week, cell), amount in deltas.items():
+        if amount:
+            by_week.setdefault((event_type, week), empty_heatmap())[cell] += amount
+    if not by_week:
+        return
+    # One upsert adds every week's counts cell by cell under the row locks,
+    # taken in a fixed order, so concurrent writers can neither overwrite each
+    # other's increments nor deadlock, and creates the weeks without a row
+    table = ActivityHeatmap._meta.db_table
+    weeks = sorted(by_week.items())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (baby_id, event_type, week, counts) '
+            f'VALUES {", ".join(["(%s, %s, %s, %s)"] * len(weeks))} '
+            'ON CONFLICT (baby_id, event_type, week) DO UPDATE SET counts = ('
+            f'SELECT array_agg(stored + added ORDER BY cell) FROM unnest({table}.counts, EXCLUDED.counts) '
+            'WITH ORDINALITY AS cells(stored, added, cell))',
+            [value for (event_type, week), counts in weeks for value in (baby_id, event_type, week, counts)],
+        )
+
+
+def count_activity_heatmaps(baby):
+    """{(event type, week): counts} of ``baby`` recounted from its raw events, without storing them."""
+    tz = baby.tzinfo
+    heatmaps = {}
+    for model, (event_type, field) in HEATMAP_EVENTS.items():
+        rows = (
+            model.objects.filter(baby=baby).order_by()
+            .annotate(
+                week=TruncWeek(field, output_field=DateField(), tzinfo=tz),
+                weekday=ExtractIsoWeekDay(field, tzinfo=tz),
+                hour=ExtractHour(field, tzinfo=tz),
+            )
+            .values_list('week', 'weekday', 'hour')
+            .annotate(count=Count('id'))
+        )
+        for week, weekday, hour, count in rows:
+            counts = heatmaps.setdefault((event_type, week), empty_heatmap())
+            counts[(weekday - 1) * 24 + hour] = count
+    return heatmaps
+
+
+def rebuild_activity_heatmaps(baby):
+    """Recompute every heatmap of ``baby`` from its raw events. Returns the number of events counted."""
+    heatmaps = [
+        ActivityHeatmap(baby=baby, event_type=event_type, week=week, counts=counts)
+        for (event_type, week), counts in count_activity_heatmaps(baby).items()
+    ]
+    with transaction.atomic():
+        ActivityHeatmap.objects.filter(baby=baby).delete()
+        ActivityHeatmap.objects.bulk_create(heatmaps)
+    return sum(sum(heatmap.counts) for heatmap in heatmaps)
+
+
+def stale_heatmaps(baby):
+    """The (event type, week) keys whose stored heatmap differs from a recount of the baby's events."""
+    fresh = count_activity_heatmaps(baby)
+    stored = {
+        (event_type, week): counts
+        for event_type, week, counts in ActivityHeatmap.objects.filter(baby=baby).values_list(
+            'event_type', 'week', 'counts')
+        # Weeks whose events all moved away keep a row of zeros
+        if any(counts)
+    }
+    return sorted(key for key in fresh.keys() | stored.keys() if fresh.get(key) != stored.get(key))
+
+
+def _weekday_rows(counts):
+    return [list(counts[weekday * 24:(weekday + 1) * 24]) for weekday in range(7)]
+
+
+def _sum_heatmaps(rows):
+    return [sum(cell) for cell in zip(*rows)] or empty_heatmap()
+
+
+def stored_weekday_hours(baby, event_type):
+    """The stored 7x24 counts of one kind of the baby's events over every week; zeros if it has none."""
+    rows = ActivityHeatmap.objects.filter(baby=baby, event_type=event_type).values_list('counts', flat=True)
+    return _weekday_rows(_sum_heatmaps(rows))
+
+
+def _week_start(week, tz):
+    """The instant the local week starting on Monday ``week`` begins."""
+    return timezone.make_aware(datetime.combine(week, time()), tz)
+
+
+def window_weekday_hours(baby, model, since=None, until=None):
+    """7x24 counts by local weekday and hour of the baby's ``model`` events in [since, until).
+
+    The local weeks wholly inside the window are summed from the stored
+    heatmaps and the partial weeks at either edge are counted by the
+    database. The stored weeks are trusted as the signals and the migration
+    backfill keep them; ``rebuild_activity_heatmaps --check`` finds drift.
+    """
+    event_type, field = HEATMAP_EVENTS[model]
+    tz = baby.tzinfo
+    events = model.objects.filter(baby=baby)
+    window = Q()
+    if since is not None:
+        window &= Q(**{f'{field}__gte': since})
+    if until is not None:
+        window &= Q(**{f'{field}__lt': until})
+
+    # The full weeks are those from ``first`` up to, not including, ``end``
+    first = end = None
+    stored = ActivityHeatmap.objects.filter(baby=baby, event_type=event_type)
+    if since is not None:
+        first, _ = heatmap_cell(since, tz)
+        if _week_start(first, tz) < since:
+            first += timedelta(days=7)
+        stored = stored.filter(week__gte=first)
+    if until is not None:
+        end, _ = heatmap_cell(until, tz)
+        stored = stored.filter(week__lt=end)
+    if first is not None and end is not None and first >= end:
+        return weekday_hour_counts(events.filter(window), field, tz)
+
+    counts = _sum_heatmaps(stored.values_list('counts', flat=True))
+
+    edges = Q()
+    if since is not None and since < _week_start(first, tz):
+        edges |= Q(**{f'{field}__gte': since, f'{field}__lt': _week_start(first, tz)})
+    if until is not None and _week_start(end, tz) < until:
+        edges |= Q(**{f'{field}__gte': _week_start(end, tz), f'{field}__lt': until})
+    if edges:
+        edge_counts = sum(weekday_hour_counts(events.filter(edges), field, tz), [])
+        counts = [total + edge for total, edge in zip(counts, edge_counts)]
+    return _weekday_rows(counts)
@@ -0,0 +1,34 @@
+"""
+Weekday-by-hour event counts, aggregated by the database.
+
+A single ``GROUP BY`` over ISO weekday and hour, evaluated in the baby's
+time zone, returns at most 168 rows however long the history is. Peak
+hours, weekday and weekend patterns and hour histograms all derive from
+the resulting 7x24 matrix, so the rows themselves never leave the database.
+"""
+from django.db.models import Count
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+
+
+def weekday_hour_counts(queryset, field, tz):
+    """Count the rows of ``queryset`` by local weekday and hour of ``field``.
+
+    Returns a 7x24 nested list; rows are weekdays (0=Monday, as pandas
+    numbers them) and columns hours of the day in ``tz``.
+    """
+    counts = [[0] * 24 for _ in range(7)]
+    rows = (
+        queryset.order_by()
+        .annotate(weekday=ExtractIsoWeekDay(field, tzinfo=tz), hour=ExtractHour(field, tzinfo=tz))
+        .values_list("weekday", "hour")
+        .annotate(count=Count("id"))
+    )
+    for weekday, hour, count in rows:
+        counts[weekday - 1][hour] = count
+    return counts
+
+
+def hour_totals(counts):
+    """Collapse a weekday-by-hour matrix into {hour: count}, ascending, empty hours left out."""
+    totals = [sum(day[hour] for day in counts) for hour in range(24)]
+    return {hour: total for hour, total in enumerate(totals) if total}
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tracker.sync import SYNC_RETENTION, prune_tombstones
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than the sync retention window."
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones()
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones older than {SYNC_RETENTION.days} days"))
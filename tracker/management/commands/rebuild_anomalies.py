@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tracker.cache import bump_data_version
+from tracker.anomalies import replay_anomalies
+from tracker.models import Baby
+
+
+class Command(BaseCommand):
+    help = "Recompute the flagged feeding and sleep anomalies by replaying each baby's history in time order."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baby", type=int, action="append", dest="baby_ids",
+                            help="Only rebuild this baby (repeatable). Defaults to every baby.")
+
+    def handle(self, *args, baby_ids=None, **options):
+        babies = Baby.objects.order_by("id")
+        if baby_ids:
+            babies = babies.filter(id__in=baby_ids)
+
+        total = 0
+        for baby in babies.iterator():
+            anomalies = replay_anomalies(baby)
+            # Cached insights and charts were computed from the old rows
+            bump_data_version(baby.id)
+            total += anomalies
+            self.stdout.write(f"Baby {baby.id}: {anomalies} anomalies")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} anomalies"))
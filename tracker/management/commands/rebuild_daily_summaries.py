@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from tracker.cache import bump_data_version
+from tracker.models import Baby
+from tracker.rollups import rebuild_daily_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily activity summaries from raw feedings, sleep and diaper changes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baby", type=int, action="append", dest="baby_ids",
+                            help="Only rebuild this baby (repeatable). Defaults to every baby.")
+
+    def handle(self, *args, baby_ids=None, **options):
+        babies = Baby.objects.order_by("id")
+        if baby_ids:
+            babies = babies.filter(id__in=baby_ids)
+
+        total = 0
+        for baby in babies.iterator():
+            days = rebuild_daily_summaries(baby)
+            # Cached insights and charts were computed from the old rows
+            bump_data_version(baby.id)
+            total += days
+            self.stdout.write(f"Baby {baby.id}: {days} days")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} daily summaries"))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.cache import bump_data_version
+from tracker.models import Baby, FeedingStatistics, SleepStatistics
+from tracker.running_statistics import (
+    batch_feeding_moments, batch_sleep_moments, moments_match, rebuild_statistics, stored_moments,
+)
+
+# Statistics model, the baby's accessor for it, and its batch recomputation
+STATISTICS = (
+    (FeedingStatistics, "feeding_statistics", batch_feeding_moments),
+    (SleepStatistics, "sleep_statistics", batch_sleep_moments),
+)
+
+
+class Command(BaseCommand):
+    help = "Check the running feeding and sleep moments against a batch recomputation."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baby", type=int, action="append", dest="baby_ids",
+                            help="Only check this baby (repeatable). Defaults to every baby.")
+        parser.add_argument("--repair", action="store_true",
+                            help="Overwrite moments that disagree with the recomputed ones.")
+
+    def handle(self, *args, baby_ids=None, repair=False, **options):
+        babies = Baby.objects.select_related(*(accessor for _, accessor, _ in STATISTICS)).order_by("id")
+        if baby_ids:
+            babies = babies.filter(id__in=baby_ids)
+
+        checked = mismatched = 0
+        for baby in babies.iterator():
+            checked += 1
+            drifted = False
+            for model, accessor, recompute in STATISTICS:
+                try:
+                    statistics = getattr(baby, accessor)
+                except model.DoesNotExist:
+                    statistics = model(baby=baby)
+                batch = recompute(baby)
+                differing = [name for name, moments in batch.items()
+                             if not moments_match(stored_moments(statistics, name), moments)]
+                for name in differing:
+                    self.stdout.write(
+                        f"Baby {baby.id} {name}: stored {stored_moments(statistics, name)}, recomputed {batch[name]}"
+                    )
+                if differing and repair:
+                    rebuild_statistics(model, baby, batch)
+                drifted = drifted or bool(differing)
+            if drifted and repair:
+                # Cached insights may reflect anomalies scored against the drifted moments
+                bump_data_version(baby.id)
+            mismatched += drifted
+
+        if mismatched and not repair:
+            raise CommandError(f"{mismatched} of {checked} babies have drifted; rerun with --repair to fix them")
+        verb = "repaired" if mismatched else "differ"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} babies, {mismatched} {verb}"))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0011_rename_milestone_models'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='developmentalmilestone',
+            index=models.Index(fields=['baby', 'date_achieved'], name='tracker_dev_baby_id_c06b00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorappointment',
+            index=models.Index(fields=['baby', 'date'], name='tracker_doc_baby_id_57c5ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='growthmeasurement',
+            index=models.Index(fields=['baby', 'date'], name='tracker_gro_baby_id_a5e067_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medication',
+            index=models.Index(fields=['user', 'start_date'], name='tracker_med_user_id_f9f59f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pumpingsession',
+            index=models.Index(fields=['user', 'time'], name='tracker_pum_user_id_a96c89_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'time'], name='tracker_rem_user_id_407f67_idx'),
+        ),
+    ]
@@ -0,0 +1,131 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0012_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField(blank=True, null=True)),
+                ('baby_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='baby',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='developmentalmilestone',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='diaperchange',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='doctorappointment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='feeding',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='growthmeasurement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='medication',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pumpingsession',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='reminder',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='sleep',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='baby',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_bab_user_id_cdd3f6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='developmentalmilestone',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_dev_baby_id_096e5c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diaperchange',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_dia_baby_id_a4e745_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorappointment',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_doc_baby_id_f911a2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feeding',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_fee_baby_id_76a3ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='growthmeasurement',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_gro_baby_id_78b185_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='medication',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_med_user_id_007a40_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pumpingsession',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_pum_user_id_b0a1a3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_rec_user_id_b01227_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reminder',
+            index=models.Index(fields=['user', 'updated_at'], name='tracker_rem_user_id_632f91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sleep',
+            index=models.Index(fields=['baby', 'updated_at'], name='tracker_sle_baby_id_85852b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user_id', 'deleted_at'], name='tracker_tom_user_id_350e60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['baby_id', 'deleted_at'], name='tracker_tom_baby_id_a5d314_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0013_sync_updated_at_tombstone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='diaperchange',
+            name='time',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='feeding',
+            name='time',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:31
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SUMMARY_FIELDS = (
+    'feed_count', 'total_quantity', 'sleep_count', 'sleep_minutes', 'wet_count', 'dirty_count', 'mixed_count',
+)
+
+
+def minutes_by_local_day(start, end, tz):
+    """Yield (local date, minutes) for the pieces of a sleep split at local midnight."""
+    while start < end:
+        local = start.astimezone(tz)
+        midnight = datetime.combine(local.date() + timedelta(days=1), time.min, tzinfo=tz)
+        piece_end = min(end, midnight)
+        yield local.date(), (piece_end - start) / timedelta(minutes=1)
+        start = piece_end
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    # Self-contained on the historical models, so later changes to
+    # tracker.rollups cannot change what this migration writes
+    Baby = apps.get_model('tracker', 'Baby')
+    DailyActivitySummary = apps.get_model('tracker', 'DailyActivitySummary')
+    DiaperChange = apps.get_model('tracker', 'DiaperChange')
+    Feeding = apps.get_model('tracker', 'Feeding')
+    Sleep = apps.get_model('tracker', 'Sleep')
+
+    for baby in Baby.objects.only('id', 'timezone').iterator():
+        tz = ZoneInfo(baby.timezone)
+        days = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+        for moment, quantity in Feeding.objects.filter(baby=baby).values_list('time', 'quantity').iterator():
+            day = days[moment.astimezone(tz).date()]
+            day['feed_count'] += 1
+            day['total_quantity'] += quantity or 0
+        diapers = DiaperChange.objects.filter(baby=baby).values_list('time', 'diaper_type')
+        for moment, diaper_type in diapers.iterator():
+            field = f'{diaper_type}_count'
+            if field in SUMMARY_FIELDS:
+                days[moment.astimezone(tz).date()][field] += 1
+        for start, end in Sleep.objects.filter(baby=baby).values_list('start_time', 'end_time').iterator():
+            days[start.astimezone(tz).date()]['sleep_count'] += 1
+            if end is not None:
+                for day, minutes in minutes_by_local_day(start, end, tz):
+                    days[day]['sleep_minutes'] += minutes
+        DailyActivitySummary.objects.bulk_create(
+            [DailyActivitySummary(baby=baby, date=day, **amounts) for day, amounts in days.items()],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0014_event_time_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baby',
+            name='timezone',
+            field=models.CharField(default='UTC', help_text='IANA time zone, e.g. Europe/London', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='DailyActivitySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('feed_count', models.IntegerField(default=0)),
+                ('total_quantity', models.FloatField(default=0)),
+                ('sleep_count', models.IntegerField(default=0)),
+                ('sleep_minutes', models.FloatField(default=0, help_text='Completed sleep, by the day the session started')),
+                ('wet_count', models.IntegerField(default=0)),
+                ('dirty_count', models.IntegerField(default=0)),
+                ('mixed_count', models.IntegerField(default=0)),
+                ('baby', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_summaries', to='tracker.baby')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyactivitysummary',
+            constraint=models.UniqueConstraint(fields=('baby', 'date'), name='unique_daily_summary_per_baby'),
+        ),
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
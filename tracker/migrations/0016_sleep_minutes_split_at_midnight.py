@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-18 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0015_daily_activity_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyactivitysummary',
+            name='sleep_minutes',
+            field=models.FloatField(default=0, help_text='Completed sleep, split at local midnight'),
+        ),
+    ]
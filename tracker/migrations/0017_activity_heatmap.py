@@ -0,0 +1,67 @@
+# Generated by Django 4.2.10 on 2026-10-18 13:41
+
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+import tracker.models
+
+
+# Model name: (event type, time field)
+HEATMAP_EVENTS = {
+    'Feeding': ('feeding', 'time'),
+    'Sleep': ('sleep', 'start_time'),
+    'DiaperChange': ('diaper_change', 'time'),
+}
+
+
+def backfill_activity_heatmaps(apps, schema_editor):
+    # Self-contained on the historical models, so later changes to
+    # tracker.heatmaps cannot change what this migration writes
+    ActivityHeatmap = apps.get_model('tracker', 'ActivityHeatmap')
+    Baby = apps.get_model('tracker', 'Baby')
+
+    for baby in Baby.objects.only('id', 'timezone').iterator():
+        tz = ZoneInfo(baby.timezone)
+        heatmaps = {}
+        for model_name, (event_type, field) in HEATMAP_EVENTS.items():
+            model = apps.get_model('tracker', model_name)
+            for moment in model.objects.filter(baby=baby).values_list(field, flat=True).iterator():
+                local = moment.astimezone(tz)
+                week = local.date() - timedelta(days=local.weekday())
+                counts = heatmaps.setdefault((event_type, week), [0] * 7 * 24)
+                counts[local.weekday() * 24 + local.hour] += 1
+        ActivityHeatmap.objects.bulk_create(
+            [
+                ActivityHeatmap(baby=baby, event_type=event_type, week=week, counts=counts)
+                for (event_type, week), counts in heatmaps.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0016_sleep_minutes_split_at_midnight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityHeatmap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('feeding', 'Feeding'), ('sleep', 'Sleep'), ('diaper_change', 'Diaper change')], max_length=20)),
+                ('week', models.DateField(help_text='Local Monday the week starts on')),
+                ('counts', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=tracker.models.empty_heatmap, size=168)),
+                ('baby', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_heatmaps', to='tracker.baby')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='activityheatmap',
+            constraint=models.UniqueConstraint(fields=('baby', 'event_type', 'week'), name='unique_activity_heatmap_per_week'),
+        ),
+        migrations.RunPython(backfill_activity_heatmaps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.10 on 2026-10-18 13:50
+
+import math
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def batch_moments(values):
+    """(count, mean, m2) of ``values``."""
+    if not values:
+        return 0, 0.0, 0.0
+    mean = math.fsum(values) / len(values)
+    return len(values), mean, math.fsum((value - mean) ** 2 for value in values)
+
+
+def backfill_feeding_statistics(apps, schema_editor):
+    # Self-contained on the historical models, so later changes to
+    # tracker.running_statistics cannot change what this migration writes
+    Baby = apps.get_model('tracker', 'Baby')
+    Feeding = apps.get_model('tracker', 'Feeding')
+    FeedingStatistics = apps.get_model('tracker', 'FeedingStatistics')
+
+    statistics = []
+    for baby in Baby.objects.only('id').iterator():
+        rows = list(Feeding.objects.filter(baby=baby).order_by('time').values_list('time', 'quantity'))
+        times = [time for time, _ in rows]
+        interval = batch_moments([(later - earlier) / timedelta(hours=1) for earlier, later in zip(times, times[1:])])
+        quantity = batch_moments([quantity for _, quantity in rows])
+        statistics.append(FeedingStatistics(
+            baby=baby,
+            interval_count=interval[0], interval_mean=interval[1], interval_m2=interval[2],
+            quantity_count=quantity[0], quantity_mean=quantity[1], quantity_m2=quantity[2],
+        ))
+    FeedingStatistics.objects.bulk_create(statistics, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0017_activity_heatmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedingStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('interval_count', models.IntegerField(default=0)),
+                ('interval_mean', models.FloatField(default=0, help_text='Hours between consecutive feedings')),
+                ('interval_m2', models.FloatField(default=0)),
+                ('quantity_count', models.IntegerField(default=0)),
+                ('quantity_mean', models.FloatField(default=0)),
+                ('quantity_m2', models.FloatField(default=0)),
+                ('baby', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='feeding_statistics', to='tracker.baby')),
+            ],
+        ),
+        migrations.RunPython(backfill_feeding_statistics, migrations.RunPython.noop),
+    ]
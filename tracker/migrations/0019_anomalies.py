@@ -0,0 +1,139 @@
+# Generated by Django 4.2.10 on 2026-10-18 13:58
+
+import math
+from datetime import timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+HOUR = timedelta(hours=1)
+
+MIN_SAMPLES = 5
+
+FEEDING_GAP_LIMIT = 2.0
+FEEDING_QUANTITY_LIMIT = 2.5
+SLEEP_DURATION_LIMIT = 2.5
+
+
+def moments_add(count, mean, m2, value):
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    return count, mean, m2 + delta * (value - mean)
+
+
+def moments_std(count, mean, m2):
+    return math.sqrt(max(m2, 0.0) / count) if count else 0.0
+
+
+def score(value, moments, limit, two_sided=True):
+    """The z-score of ``value`` if it lies beyond ``limit``, else None."""
+    count, mean, _ = moments
+    std = moments_std(*moments)
+    if count < MIN_SAMPLES or std < 1e-10:
+        return None
+    zscore = (value - mean) / std
+    if (abs(zscore) if two_sided else zscore) <= limit:
+        return None
+    return zscore
+
+
+def backfill_sleep_statistics_and_anomalies(apps, schema_editor):
+    # Self-contained on the historical models, so later changes to
+    # tracker.running_statistics or tracker.anomalies cannot change what this
+    # migration writes. Anomalies are replayed in time order, each event
+    # scored against the moments up to and including itself.
+    Anomaly = apps.get_model('tracker', 'Anomaly')
+    Baby = apps.get_model('tracker', 'Baby')
+    Feeding = apps.get_model('tracker', 'Feeding')
+    Sleep = apps.get_model('tracker', 'Sleep')
+    SleepStatistics = apps.get_model('tracker', 'SleepStatistics')
+
+    def anomaly(kind, baby, time, value, moments, zscore, **event):
+        return Anomaly(kind=kind, baby=baby, time=time, value=value, mean=moments[1],
+                       std=moments_std(*moments), zscore=zscore, **event)
+
+    for baby in Baby.objects.only('id').iterator():
+        anomalies = []
+        intervals = quantities = durations = (0, 0.0, 0.0)
+
+        previous_time = None
+        feedings = Feeding.objects.filter(baby=baby).order_by('time', 'pk').values_list('pk', 'time', 'quantity')
+        for pk, time, quantity in feedings.iterator():
+            if previous_time is not None:
+                gap = (time - previous_time) / HOUR
+                intervals = moments_add(*intervals, gap)
+                zscore = score(gap, intervals, FEEDING_GAP_LIMIT, two_sided=False)
+                if zscore is not None:
+                    anomalies.append(anomaly('feeding_interval', baby, time, gap, intervals, zscore, feeding_id=pk))
+            quantities = moments_add(*quantities, quantity)
+            zscore = score(quantity, quantities, FEEDING_QUANTITY_LIMIT)
+            if zscore is not None:
+                anomalies.append(anomaly('feeding_quantity', baby, time, quantity, quantities, zscore, feeding_id=pk))
+            previous_time = time
+
+        sleeps = Sleep.objects.filter(baby=baby, end_time__isnull=False).order_by('start_time', 'pk')
+        for pk, start, end in sleeps.values_list('pk', 'start_time', 'end_time').iterator():
+            hours = (end - start) / HOUR
+            durations = moments_add(*durations, hours)
+            zscore = score(hours, durations, SLEEP_DURATION_LIMIT)
+            if zscore is not None:
+                anomalies.append(anomaly('sleep_duration', baby, start, hours, durations, zscore, sleep_id=pk))
+
+        # The batch moments, as the running ones would drift by rounding
+        hours = [(end - start) / HOUR for start, end in sleeps.values_list('start_time', 'end_time')]
+        mean = math.fsum(hours) / len(hours) if hours else 0.0
+        SleepStatistics.objects.create(
+            baby=baby, duration_count=len(hours), duration_mean=mean,
+            duration_m2=math.fsum((value - mean) ** 2 for value in hours),
+        )
+        Anomaly.objects.bulk_create(anomalies, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0018_feeding_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SleepStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('duration_count', models.IntegerField(default=0)),
+                ('duration_mean', models.FloatField(default=0, help_text='Hours')),
+                ('duration_m2', models.FloatField(default=0)),
+                ('baby', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sleep_statistics', to='tracker.baby')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Anomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('feeding_interval', 'Long gap since the previous feeding'), ('feeding_quantity', 'Unusual feeding quantity'), ('sleep_duration', 'Unusual sleep duration')], max_length=20)),
+                ('time', models.DateTimeField(help_text="When the event happened; a sleep's start")),
+                ('value', models.FloatField(help_text='The gap or duration in hours, or the quantity')),
+                ('mean', models.FloatField(help_text="Mean of the baby's values when the event was scored")),
+                ('std', models.FloatField(help_text='Their standard deviation')),
+                ('zscore', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('baby', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='tracker.baby')),
+                ('feeding', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='tracker.feeding')),
+                ('sleep', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to='tracker.sleep')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['baby', 'time'], name='tracker_ano_baby_id_84208b_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='anomaly',
+            constraint=models.UniqueConstraint(fields=('kind', 'feeding'), name='unique_anomaly_per_feeding'),
+        ),
+        migrations.AddConstraint(
+            model_name='anomaly',
+            constraint=models.UniqueConstraint(fields=('kind', 'sleep'), name='unique_anomaly_per_sleep'),
+        ),
+        migrations.RunPython(backfill_sleep_statistics_and_anomalies, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from zoneinfo import ZoneInfo
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .enums import FeedingSideEnum, PumpingSideEnum
 
 class Recipe(models.Model):
@@ -10,6 +13,12 @@ class Recipe(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="recipes")
     category = models.CharField(max_length=100, default="baby food")
     is_private = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.name
@@ -28,16 +37,24 @@ class Baby(models.Model):
     name = models.CharField(max_length=100)
     birth_date = models.DateField(db_index=True)
     gender = models.CharField(max_length=10)
+    timezone = models.CharField(max_length=64, default="UTC", help_text="IANA time zone, e.g. Europe/London")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['user', 'name']),
             models.Index(fields=['user', 'birth_date']),
+            models.Index(fields=['user', 'updated_at']),
         ]
 
     def __str__(self):
         return self.name
 
+    @property
+    def tzinfo(self):
+        """The baby's local time zone, which decides what "a day" means for it."""
+        return ZoneInfo(self.timezone)
+
 class Feeding(models.Model):
     FEEDING_TYPES = [
         ("breastfeeding", "Breastfeeding"),
@@ -52,7 +69,7 @@ class Feeding(models.Model):
     ]
         
     baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="feedings", db_index=True)
-    time = models.DateTimeField(auto_now_add=True, db_index=True)
+    time = models.DateTimeField(default=timezone.now, db_index=True)
     feeding_type = models.CharField(max_length=20, choices=FEEDING_TYPES)
     quantity = models.FloatField(help_text="Amount in ounces/ml")
     last_side = models.CharField(
@@ -61,11 +78,13 @@ class Feeding(models.Model):
         null=True,
         blank=True
     )
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['baby', 'time']),
             models.Index(fields=['baby', 'feeding_type']),
+            models.Index(fields=['baby', 'updated_at']),
         ]
 
     def __str__(self):
@@ -79,13 +98,15 @@ class DiaperChange(models.Model):
     ]
     
     baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="diaper_changes", db_index=True)
-    time = models.DateTimeField(auto_now_add=True, db_index=True)
+    time = models.DateTimeField(default=timezone.now, db_index=True)
     diaper_type = models.CharField(max_length=10, choices=DIAPER_TYPES)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['baby', 'time']),
             models.Index(fields=['baby', 'diaper_type']),
+            models.Index(fields=['baby', 'updated_at']),
         ]
 
     def __str__(self):
@@ -95,11 +116,13 @@ class Sleep(models.Model):
     baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="sleep_sessions", db_index=True)
     start_time = models.DateTimeField(db_index=True)
     end_time = models.DateTimeField(null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['baby', 'start_time']),
             models.Index(fields=['baby', 'end_time']),
+            models.Index(fields=['baby', 'updated_at']),
         ]
 
     def __str__(self):
@@ -110,6 +133,13 @@ class Reminder(models.Model):
     baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="reminders")
     message = models.CharField(max_length=255)
     time = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'time']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"Reminder for {self.baby.name}: {self.message} at {self.time}"
@@ -120,6 +150,13 @@ class GrowthMeasurement(models.Model):
     height = models.FloatField(help_text="Height in cm")
     weight = models.FloatField(help_text="Weight in kg")
     notes = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['baby', 'date']),
+            models.Index(fields=['baby', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.baby.name} - {self.height} cm, {self.weight} kg on {self.date}"
@@ -138,6 +175,13 @@ class DevelopmentalMilestone(models.Model):
     category = models.CharField(max_length=20, choices=MILESTONE_CATEGORIES)
     date_achieved = models.DateField()
     notes = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['baby', 'date_achieved']),
+            models.Index(fields=['baby', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.baby.name} - {self.title} ({self.category}) on {self.date_achieved}"
@@ -156,6 +200,13 @@ class PumpingSession(models.Model):
         choices=PumpingSideEnum.choices(),
     )  
     quantity = models.FloatField(help_text="Milk pumped in ounces/ml")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'time']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.quantity} oz/ml pumped at {self.time}"
@@ -169,6 +220,13 @@ class DoctorAppointment(models.Model):
     time = models.TimeField()
     reason = models.TextField(blank=True, null=True)
     notes = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['baby', 'date']),
+            models.Index(fields=['baby', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.baby.name} - {self.doctor_name} on {self.date}"
@@ -181,6 +239,173 @@ class Medication(models.Model):
     frequency = models.CharField(max_length=50, choices=[("daily", "Daily"), ("weekly", "Weekly"), ("as_needed", "As Needed")])
     start_date = models.DateField()
     end_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'start_date']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.name} ({self.dosage})"
+
+
+class DailyActivitySummary(models.Model):
+    """
+    Per-day totals of a baby's feedings, sleep and diaper changes.
+
+    Days are local dates in the baby's time zone. Rows are kept current by
+    the save/delete signals in ``tracker.signals`` and can be rebuilt from
+    the raw events with ``manage.py rebuild_daily_summaries``.
+    """
+    baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="daily_summaries")
+    date = models.DateField()
+    feed_count = models.IntegerField(default=0)
+    total_quantity = models.FloatField(default=0)
+    sleep_count = models.IntegerField(default=0)
+    sleep_minutes = models.FloatField(default=0, help_text="Completed sleep, split at local midnight")
+    wet_count = models.IntegerField(default=0)
+    dirty_count = models.IntegerField(default=0)
+    mixed_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['baby', 'date'], name='unique_daily_summary_per_baby'),
+        ]
+
+    def __str__(self):
+        return f"{self.baby.name} - summary for {self.date}"
+
+
+class FeedingStatistics(models.Model):
+    """
+    Running moments of a baby's feeding intervals and quantities.
+
+    Each is kept as a count, a mean and ``m2``, the sum of squared
+    deviations from the mean, with Welford's update, so the save/delete
+    signals in ``tracker.signals`` adjust them in constant time and the
+    standard deviation is ``sqrt(m2 / count)``. Intervals are the hours
+    between consecutive feedings in time order. Check them against the raw
+    feedings with ``manage.py verify_running_statistics``.
+    """
+    baby = models.OneToOneField(Baby, on_delete=models.CASCADE, related_name="feeding_statistics")
+    interval_count = models.IntegerField(default=0)
+    interval_mean = models.FloatField(default=0, help_text="Hours between consecutive feedings")
+    interval_m2 = models.FloatField(default=0)
+    quantity_count = models.IntegerField(default=0)
+    quantity_mean = models.FloatField(default=0)
+    quantity_m2 = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.baby.name} - feeding statistics"
+
+
+class SleepStatistics(models.Model):
+    """
+    Running moments of the durations of a baby's completed sleeps, kept like
+    ``FeedingStatistics``.
+    """
+    baby = models.OneToOneField(Baby, on_delete=models.CASCADE, related_name="sleep_statistics")
+    duration_count = models.IntegerField(default=0)
+    duration_mean = models.FloatField(default=0, help_text="Hours")
+    duration_m2 = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"{self.baby.name} - sleep statistics"
+
+
+class Anomaly(models.Model):
+    """
+    A feeding or sleep that stood out from the baby's history when it was written.
+
+    Flagged by the save signals in ``tracker.signals`` from the running
+    moments, and read by the insights instead of rescoring every event.
+    ``manage.py rebuild_anomalies`` replays a baby's history to recompute them.
+    """
+    KINDS = [
+        ('feeding_interval', 'Long gap since the previous feeding'),
+        ('feeding_quantity', 'Unusual feeding quantity'),
+        ('sleep_duration', 'Unusual sleep duration'),
+    ]
+
+    baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="anomalies")
+    kind = models.CharField(max_length=20, choices=KINDS)
+    feeding = models.ForeignKey(Feeding, on_delete=models.CASCADE, null=True, blank=True, related_name="anomalies")
+    sleep = models.ForeignKey(Sleep, on_delete=models.CASCADE, null=True, blank=True, related_name="anomalies")
+    time = models.DateTimeField(help_text="When the event happened; a sleep's start")
+    value = models.FloatField(help_text="The gap or duration in hours, or the quantity")
+    mean = models.FloatField(help_text="Mean of the baby's values when the event was scored")
+    std = models.FloatField(help_text="Their standard deviation")
+    zscore = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['baby', 'time']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'feeding'], name='unique_anomaly_per_feeding'),
+            models.UniqueConstraint(fields=['kind', 'sleep'], name='unique_anomaly_per_sleep'),
+        ]
+
+    def __str__(self):
+        return f"{self.baby.name} - {self.kind} at {self.time}"
+
+
+def empty_heatmap():
+    return [0] * 7 * 24
+
+
+class ActivityHeatmap(models.Model):
+    """
+    Counts of one kind of a baby's events in one local week by weekday and hour.
+
+    ``week`` is the local Monday the week starts on, and ``counts`` the 7x24
+    matrix flattened row by row: index ``weekday * 24 + hour``, with weekdays
+    numbered from 0=Monday in the baby's time zone. Sleeps count at their
+    start. Cells are incremented in place by the save/delete signals in
+    ``tracker.signals`` and can be rebuilt from the raw events with
+    ``manage.py rebuild_activity_heatmaps``.
+    """
+    EVENT_TYPES = [
+        ('feeding', 'Feeding'),
+        ('sleep', 'Sleep'),
+        ('diaper_change', 'Diaper change'),
+    ]
+
+    baby = models.ForeignKey(Baby, on_delete=models.CASCADE, related_name="activity_heatmaps")
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    week = models.DateField(help_text="Local Monday the week starts on")
+    counts = ArrayField(models.IntegerField(), size=7 * 24, default=empty_heatmap)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['baby', 'event_type', 'week'], name='unique_activity_heatmap_per_week'),
+        ]
+
+    def __str__(self):
+        return f"{self.baby.name} - {self.event_type} heatmap for the week of {self.week}"
+
+
+class Tombstone(models.Model):
+    """
+    Record of a deleted row so sync clients can drop their local copy.
+
+    Owners are stored as plain ids rather than foreign keys: the owning baby or
+    user may itself be mid-deletion when the tombstone is written.
+    """
+    model = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    baby_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_id', 'deleted_at']),
+            models.Index(fields=['baby_id', 'deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
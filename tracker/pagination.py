@@ -0,0 +1,21 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TimeCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a view's ``time_field``, newest first.
+
+    The cursor encodes the last row's position, so every page is a range
+    read on the model's (baby, time) style index and page N costs the same
+    as page 1. Views without a time column fall back to the primary key.
+
+    Rows sharing a timestamp are told apart by an offset from the cursor
+    position, so the id tie-breaker keeps their order the same on every page.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        time_field = getattr(view, 'time_field', None)
+        return ('-' + time_field, '-id') if time_field else ('-id',)
@@ -0,0 +1,62 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import renderers
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """
+    Newline-delimited JSON, one object per line.
+
+    Streaming views write their rows directly; this renders the regular
+    responses (such as errors) that DRF produces for the same request.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(ndjson_line(row) for row in rows).encode(self.charset)
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """CSV with a header row taken from the keys of the first object."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b''
+        header = list(rows[0])
+        return ''.join(
+            [csv_line(header)] + [csv_line([row.get(key) for key in header]) for row in rows]
+        ).encode(self.charset)
+
+
+class _Echo:
+    """File-like object whose write() hands the line back instead of storing it."""
+    def write(self, value):
+        return value
+
+
+_encoder = DjangoJSONEncoder()
+
+
+def ndjson_line(row):
+    return json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_line(values):
+    # Format dates and times the same way as the JSON renderers
+    return csv.writer(_Echo()).writerow(
+        ['' if value is None else _encoder.default(value) if hasattr(value, 'isoformat') else value
+         for value in values]
+    )
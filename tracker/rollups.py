@@ -0,0 +1,135 @@
+"""
+Maintenance of the ``DailyActivitySummary`` rollup.
+
+Each feeding, sleep or diaper change contributes fixed amounts to the
+summaries of the days it touches. Writes apply those contributions as deltas
+(the new row's minus the old row's) in a single upsert, so keeping the
+rollup current costs one query per write, whatever the size of the history.
+``rebuild_daily_summaries`` recomputes a baby's rows from scratch.
+
+Sleep is counted on the day a session starts, but its minutes are split at
+local midnight, so an overnight sleep adds to both days it spans.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyActivitySummary, DiaperChange, Feeding, Sleep
+
+SUMMARY_FIELDS = (
+    'feed_count', 'total_quantity', 'sleep_count', 'sleep_minutes', 'wet_count', 'dirty_count', 'mixed_count',
+)
+
+SUMMARY_MODELS = (Feeding, Sleep, DiaperChange)
+
+
+def summary_deltas(instance, tz, sign=1):
+    """Return {date: {field: amount}} that ``instance`` adds to its baby's summaries."""
+    if isinstance(instance, Feeding):
+        day = timezone.localtime(instance.time, tz).date()
+        return {day: {'feed_count': sign, 'total_quantity': sign * (instance.quantity or 0)}}
+    if isinstance(instance, DiaperChange):
+        field = f'{instance.diaper_type}_count'
+        if field not in SUMMARY_FIELDS:
+            return {}
+        return {timezone.localtime(instance.time, tz).date(): {field: sign}}
+    if isinstance(instance, Sleep):
+        from .sleep_split import sleep_minutes_by_day, utc64
+
+        deltas = {timezone.localtime(instance.start_time, tz).date(): {'sleep_count': sign}}
+        minutes = sleep_minutes_by_day(utc64([instance.start_time]), utc64([instance.end_time]), tz)
+        for day, amount in minutes.items():
+            deltas.setdefault(day, {})['sleep_minutes'] = sign * amount
+        return deltas
+    return {}
+
+
+def merge_deltas(*deltas):
+    """Add several {date: {field: amount}} mappings together, dropping zeros."""
+    merged = defaultdict(lambda: defaultdict(int))
+    for delta in deltas:
+        for day, amounts in delta.items():
+            for field, amount in amounts.items():
+                merged[day][field] += amount
+    return {
+        day: {field: amount for field, amount in amounts.items() if amount}
+        for day, amounts in merged.items()
+        if any(amounts.values())
+    }
+
+
+def apply_summary_deltas(baby_id, deltas):
+    """Add ``deltas`` to the baby's summary rows, creating missing days."""
+    days = sorted((day, amounts) for day, amounts in deltas.items() if amounts)
+    if not days:
+        return
+    # One upsert adds every day's amounts under the row locks, taken in date
+    # order, so concurrent writers can neither overwrite each other's changes
+    # nor deadlock, and days without a row are created in the same statement
+    table = DailyActivitySummary._meta.db_table
+    row = '(%s, %s, ' + ', '.join(['%s'] * len(SUMMARY_FIELDS)) + ')'
+    increments = ', '.join(f'{field} = {table}.{field} + EXCLUDED.{field}' for field in SUMMARY_FIELDS)
+    params = [
+        value
+        for day, amounts in days
+        for value in (baby_id, day, *(amounts.get(field, 0) for field in SUMMARY_FIELDS))
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (baby_id, date, {", ".join(SUMMARY_FIELDS)}) VALUES {", ".join([row] * len(days))} '
+            f'ON CONFLICT (baby_id, date) DO UPDATE SET {increments}',
+            params,
+        )
+
+
+def summaries_in_window(baby, since=None, until=None):
+    """The baby's summary rows for the local days touched by [since, until)."""
+    summaries = DailyActivitySummary.objects.filter(baby=baby)
+    tz = baby.tzinfo
+    if since is not None:
+        summaries = summaries.filter(date__gte=timezone.localtime(since, tz).date())
+    if until is not None:
+        # The day holding the last instant before ``until``
+        last_day = timezone.localtime(until - timedelta(microseconds=1), tz).date()
+        summaries = summaries.filter(date__lte=last_day)
+    return summaries
+
+
+def _grouped(queryset, field, tz):
+    return queryset.annotate(day=TruncDate(field, tzinfo=tz)).order_by().values('day')
+
+
+def rebuild_daily_summaries(baby):
+    """Recompute every summary row for ``baby`` from its raw events. Returns the row count."""
+    tz = baby.tzinfo
+    days = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+
+    feedings = _grouped(Feeding.objects.filter(baby=baby), 'time', tz)
+    for row in feedings.annotate(count=Count('id'), quantity=Sum('quantity')):
+        days[row['day']].update(feed_count=row['count'], total_quantity=row['quantity'] or 0)
+
+    diapers = _grouped(DiaperChange.objects.filter(baby=baby), 'time', tz)
+    for row in diapers.values('day', 'diaper_type').annotate(count=Count('id')):
+        field = f"{row['diaper_type']}_count"
+        if field in SUMMARY_FIELDS:
+            days[row['day']][field] = row['count']
+
+    from .sleep_split import sleep_minutes_by_day, utc64
+
+    sleeps = Sleep.objects.filter(baby=baby)
+    for row in _grouped(sleeps, 'start_time', tz).annotate(count=Count('id')):
+        days[row['day']]['sleep_count'] = row['count']
+    spans = list(sleeps.values_list('start_time', 'end_time'))
+    starts, ends = utc64([start for start, _ in spans]), utc64([end for _, end in spans])
+    for day, minutes in sleep_minutes_by_day(starts, ends, tz).items():
+        days[day]['sleep_minutes'] = minutes
+
+    with transaction.atomic():
+        DailyActivitySummary.objects.filter(baby=baby).delete()
+        DailyActivitySummary.objects.bulk_create(
+            [DailyActivitySummary(baby=baby, date=day, **amounts) for day, amounts in days.items()]
+        )
+    return len(days)
@@ -0,0 +1,333 @@
+"""
+Maintenance of the running moments in ``FeedingStatistics`` and ``SleepStatistics``.
+
+A write only changes the feeding intervals next to the feeding it touches:
+placing a feeding at ``t`` between neighbours ``p`` and ``n`` replaces the
+interval ``n - p`` with ``t - p`` and ``n - t``. One query probes the index
+for both neighbours and a single UPDATE merges the changed values into the
+stored moments, so keeping them current costs the same whatever the size
+of the history. Writers take the statistics row lock before reading the
+neighbours, which orders concurrent writes to one baby's feedings. A sleep
+contributes its duration once it has ended. The ``batch_*_moments``
+functions recompute the moments from the raw events, for verification and
+repair.
+"""
+import math
+from collections import Counter
+from datetime import timedelta
+from django.db import IntegrityError, connection, transaction
+
+from .models import Feeding, FeedingStatistics, Sleep, SleepStatistics
+
+HOUR = timedelta(hours=1)
+
+MOMENT_PARTS = ('count', 'mean', 'm2')
+
+
+def moments_add(count, mean, m2, value):
+    """Fold ``value`` into (count, mean, m2)."""
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    return count, mean, m2 + delta * (value - mean)
+
+
+def moments_std(count, mean, m2):
+    """Population standard deviation, as ``np.std`` computes it."""
+    if not count:
+        return 0.0
+    # Removals can leave rounding error just below zero
+    return math.sqrt(max(m2, 0.0) / count)
+
+
+def zscore(value, count, mean, m2):
+    """Standard score of ``value`` against the moments; None while they show no spread."""
+    std = moments_std(count, mean, m2)
+    if count < 2 or std < 1e-10:
+        return None
+    return (value - mean) / std
+
+
+def stored_moments(statistics, name):
+    """(count, mean, m2) of ``name``, such as 'interval', from a statistics row."""
+    return tuple(getattr(statistics, f'{name}_{part}') for part in MOMENT_PARTS)
+
+
+def moments_merge(count, mean, m2, added=(0, 0.0, 0.0), removed=(0, 0.0, 0.0)):
+    """(count, mean, m2) after adding and removing batches given as their own (count, mean, m2).
+
+    Deviations are taken from the old mean, which keeps the update stable
+    when the values sit far from zero, and the result depends only on the
+    old moments, as the SET clause of one UPDATE can compute it.
+    """
+    (added_count, added_mean, added_m2), (removed_count, removed_mean, removed_m2) = added, removed
+    size = count + added_count - removed_count
+    if size <= 0:
+        return 0, 0.0, 0.0
+    shift = added_count * (added_mean - mean) - removed_count * (removed_mean - mean)
+    squares = (m2 + added_m2 + added_count * (added_mean - mean) ** 2
+               - removed_m2 - removed_count * (removed_mean - mean) ** 2)
+    return size, mean + shift / size, squares - shift * shift / size
+
+
+# moments_merge over the stored columns; %(a_*)s and %(r_*)s are the added and removed batches
+_MERGE_SQL = {
+    'count': 'GREATEST({count} + %({name}_a_count)s - %({name}_r_count)s, 0)',
+    'mean': (
+        'CASE WHEN {size} > 0 THEN {mean} + ({shift}) / {size} ELSE 0 END'
+    ),
+    'm2': (
+        'CASE WHEN {size} > 0 THEN {m2} + %({name}_a_m2)s + %({name}_a_count)s * power(%({name}_a_mean)s - {mean}, 2)'
+        ' - %({name}_r_m2)s - %({name}_r_count)s * power(%({name}_r_mean)s - {mean}, 2)'
+        ' - power({shift}, 2) / {size} ELSE 0 END'
+    ),
+}
+
+
+def _moment_changes(removed, added):
+    """{name: (added batch, removed batch)} moments of the values that actually change."""
+    changes = {}
+    for name in removed.keys() | added.keys():
+        out, into = Counter(removed.get(name, ())), Counter(added.get(name, ()))
+        # A value both removed and added, such as an interval a move left in
+        # place, would only pick up rounding error
+        common = out & into
+        out, into = out - common, into - common
+        if out or into:
+            changes[name] = (_batch(list(into.elements())), _batch(list(out.elements())))
+    return changes
+
+
+def _merge(model, baby_id, changes):
+    # One UPDATE folds every change in under the row lock and returns the
+    # result, so concurrent writers cannot overwrite each other's changes
+    table = model._meta.db_table
+    assignments, params = [], {'baby_id': baby_id}
+    for name, (into, out) in changes.items():
+        columns = {part: f'{table}.{name}_{part}' for part in MOMENT_PARTS}
+        size = f'({columns["count"]} + %({name}_a_count)s - %({name}_r_count)s)'
+        shift = (f'%({name}_a_count)s * (%({name}_a_mean)s - {columns["mean"]})'
+                 f' - %({name}_r_count)s * (%({name}_r_mean)s - {columns["mean"]})')
+        for part in MOMENT_PARTS:
+            expression = _MERGE_SQL[part].format(name=name, size=size, shift=shift, **columns)
+            assignments.append(f'{name}_{part} = {expression}')
+        for prefix, batch in (('a', into), ('r', out)):
+            params.update({f'{name}_{prefix}_{part}': amount for part, amount in zip(MOMENT_PARTS, batch)})
+    fields = [field.column for field in model._meta.concrete_fields]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET {", ".join(assignments)} WHERE baby_id = %(baby_id)s RETURNING {", ".join(fields)}',
+            params,
+        )
+        row = cursor.fetchone()
+    return None if row is None else model(**dict(zip(fields, row)))
+
+
+def apply_moment_changes(model, baby_id, removed, added):
+    """Fold {name: [values]} mappings of removed and added values into the baby's ``model`` row.
+
+    Returns the updated row, or None when the changes cancel out. A missing
+    row is created, as if from empty moments.
+    """
+    changes = _moment_changes(removed, added)
+    if not changes:
+        return None
+    statistics = _merge(model, baby_id, changes)
+    if statistics is not None:
+        return statistics
+    values = {
+        f'{name}_{part}': amount
+        for name, (into, out) in changes.items()
+        for part, amount in zip(MOMENT_PARTS, moments_merge(0, 0.0, 0.0, into, out))
+    }
+    try:
+        with transaction.atomic():
+            return model.objects.create(baby_id=baby_id, **values)
+    except IntegrityError:
+        # Another writer created the row first
+        return _merge(model, baby_id, changes)
+
+
+def _gaps(times):
+    return [(later - earlier) / HOUR for earlier, later in zip(times, times[1:])]
+
+
+# Both neighbours of each probed time in one round trip. The feeding itself
+# is excluded by id, as a moved feeding is probed at its old time, and the
+# bounds on time alone let the (baby, time) index serve the row comparisons.
+_NEIGHBOURS_SQL = """
+(SELECT {position}, time, id FROM {table}
+ WHERE baby_id = %(baby_id)s AND id <> %(pk)s AND time <= %(time_{position})s
+ AND (time, id) < (%(time_{position})s, %(pk)s)
+ ORDER BY time DESC, id DESC LIMIT 1)
+UNION ALL
+(SELECT {position}, time, id FROM {table}
+ WHERE baby_id = %(baby_id)s AND id <> %(pk)s AND time >= %(time_{position})s
+ AND (time, id) > (%(time_{position})s, %(pk)s)
+ ORDER BY time, id LIMIT 1)
+"""
+
+
+def _neighbours(baby_id, pk, *times):
+    """The baby's feedings just before and after ``(time, pk)`` in (time, id) order, for each of ``times``.
+
+    Returns a (before, after) pair per time, each as (time, id) or None.
+    """
+    query = '\nUNION ALL\n'.join(
+        _NEIGHBOURS_SQL.strip().format(table=Feeding._meta.db_table, position=position)
+        for position in range(len(times))
+    )
+    params = {'baby_id': baby_id, 'pk': pk, **{f'time_{position}': time for position, time in enumerate(times)}}
+    pairs = [{} for _ in times]
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        for position, *row in cursor.fetchall():
+            row = tuple(row)
+            pairs[position][row < (times[position], pk)] = row
+    return [(pair.get(True), pair.get(False)) for pair in pairs]
+
+
+def _placement(time, before, after):
+    """The interval a feeding at ``time`` between ``before`` and ``after`` splits, and the intervals it creates."""
+    outer = [row[0] for row in (before, after) if row is not None]
+    inner = [moment for moment in (before and before[0], time, after and after[0]) if moment is not None]
+    return _gaps(outer), _gaps(inner)
+
+
+def add_feeding(feeding):
+    """Fold a feeding in. Returns the updated statistics and its neighbours (see ``_neighbours``)."""
+    with transaction.atomic(savepoint=False):
+        # Folding the quantity in first takes the row lock, so the neighbours
+        # are read once any writer ahead of this one has committed its feeding
+        statistics = apply_moment_changes(FeedingStatistics, feeding.baby_id, {}, {'quantity': [feeding.quantity]})
+        [(before, after)] = _neighbours(feeding.baby_id, feeding.pk, feeding.time)
+        joined, split = _placement(feeding.time, before, after)
+        statistics = apply_moment_changes(
+            FeedingStatistics, feeding.baby_id, {'interval': joined}, {'interval': split}
+        ) or statistics
+    return statistics, before, after
+
+
+def remove_feeding(feeding):
+    """Take a feeding back out. Returns the updated statistics and its former neighbours."""
+    with transaction.atomic(savepoint=False):
+        # The row lock comes first, as in add_feeding
+        statistics = apply_moment_changes(FeedingStatistics, feeding.baby_id, {'quantity': [feeding.quantity]}, {})
+        [(before, after)] = _neighbours(feeding.baby_id, feeding.pk, feeding.time)
+        joined, split = _placement(feeding.time, before, after)
+        statistics = apply_moment_changes(
+            FeedingStatistics, feeding.baby_id, {'interval': split}, {'interval': joined}
+        ) or statistics
+    return statistics, before, after
+
+
+def move_feeding(old, feeding):
+    """Move a feeding within its baby's history from ``old``, its row as stored before the save.
+
+    Takes the row lock, probes the neighbours of both places in one query
+    and folds every change in with one UPDATE, where removing and adding
+    the feeding would take three each. Returns the updated statistics, the
+    (before, after) neighbours of the old place and those of the new one.
+    """
+    with transaction.atomic(savepoint=False):
+        statistics = FeedingStatistics.objects.select_for_update().filter(baby_id=feeding.baby_id).first()
+        left, entered = _neighbours(feeding.baby_id, feeding.pk, old.time, feeding.time)
+        left_joined, left_split = _placement(old.time, *left)
+        entered_joined, entered_split = _placement(feeding.time, *entered)
+        statistics = apply_moment_changes(
+            FeedingStatistics, feeding.baby_id,
+            {'interval': left_split + entered_joined, 'quantity': [old.quantity]},
+            {'interval': left_joined + entered_split, 'quantity': [feeding.quantity]},
+        ) or statistics
+    return statistics, left, entered
+
+
+def change_feeding_quantity(feeding, old_quantity):
+    """Swap the quantity of a feeding that stayed in place. Returns the updated statistics."""
+    return apply_moment_changes(
+        FeedingStatistics, feeding.baby_id, {'quantity': [old_quantity]}, {'quantity': [feeding.quantity]}
+    )
+
+
+def add_feedings(baby_id, feedings):
+    """Fold a batch of one baby's new feedings in with three queries, however they interleave with older ones.
+
+    Returns the updated statistics and the (time, id) rows from the new
+    feedings' earliest predecessor to their latest successor, in time order.
+    """
+    ids = {feeding.pk for feeding in feedings}
+    start = min(feeding.time for feeding in feedings)
+    end = max(feeding.time for feeding in feedings)
+    rows = Feeding.objects.filter(baby_id=baby_id)
+    with transaction.atomic(savepoint=False):
+        # The quantities take the row lock before the history is read, as in add_feeding
+        statistics = apply_moment_changes(
+            FeedingStatistics, baby_id, {}, {'quantity': [feeding.quantity for feeding in feedings]}
+        )
+        span = list(rows.filter(time__gte=start, time__lte=end).order_by('time', 'pk').values_list('time', 'pk'))
+        before = rows.filter(time__lt=start).order_by('-time', '-pk').values_list('time', 'pk').first()
+        after = rows.filter(time__gt=end).order_by('time', 'pk').values_list('time', 'pk').first()
+        sequence = [row for row in (before, *span, after) if row is not None]
+        old = [time for time, pk in sequence if pk not in ids]
+        new = [time for time, _ in sequence]
+        statistics = apply_moment_changes(
+            FeedingStatistics, baby_id, {'interval': _gaps(old)}, {'interval': _gaps(new)}
+        ) or statistics
+    return statistics, sequence
+
+
+def sleep_duration(sleep):
+    """Hours a sleep lasted, or None while it is ongoing."""
+    if sleep.end_time is None:
+        return None
+    return (sleep.end_time - sleep.start_time) / HOUR
+
+
+def apply_sleep_durations(baby_id, removed=(), added=()):
+    """Fold durations (None for ongoing sleeps, which are skipped) in and out. Returns the updated statistics."""
+    return apply_moment_changes(
+        SleepStatistics, baby_id,
+        {'duration': [hours for hours in removed if hours is not None]},
+        {'duration': [hours for hours in added if hours is not None]},
+    )
+
+
+def _batch(values):
+    if not values:
+        return 0, 0.0, 0.0
+    mean = math.fsum(values) / len(values)
+    return len(values), mean, math.fsum((value - mean) ** 2 for value in values)
+
+
+def batch_feeding_moments(baby):
+    """{name: (count, mean, m2)} recomputed from every feeding of ``baby``."""
+    rows = list(Feeding.objects.filter(baby=baby).order_by('time').values_list('time', 'quantity'))
+    return {
+        'interval': _batch(_gaps([time for time, _ in rows])),
+        'quantity': _batch([quantity for _, quantity in rows]),
+    }
+
+
+def batch_sleep_moments(baby):
+    """{'duration': (count, mean, m2)} recomputed from every completed sleep of ``baby``."""
+    spans = Sleep.objects.filter(baby=baby, end_time__isnull=False).values_list('start_time', 'end_time')
+    return {'duration': _batch([(end - start) / HOUR for start, end in spans])}
+
+
+def moments_match(stored, batch):
+    """Whether running moments agree with a batch recomputation up to accumulated rounding."""
+    return (
+        stored[0] == batch[0]
+        and math.isclose(stored[1], batch[1], rel_tol=1e-9, abs_tol=1e-9)
+        and math.isclose(stored[2], batch[2], rel_tol=1e-6, abs_tol=1e-6)
+    )
+
+
+def rebuild_statistics(model, baby, moments):
+    """Overwrite the baby's ``model`` row with {name: (count, mean, m2)} ``moments``."""
+    values = {
+        f'{name}_{part}': amount
+        for name, parts in moments.items()
+        for part, amount in zip(MOMENT_PARTS, parts)
+    }
+    model.objects.update_or_create(baby=baby, defaults=values)
@@ -1,3 +1,4 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from rest_framework import serializers
 from .models import Baby, Feeding, DiaperChange, Sleep, Reminder, GrowthMeasurement, DevelopmentalMilestone, Medication, DoctorAppointment, PumpingSession, Recipe, Ingredient
 from django.contrib.auth.models import User
@@ -12,29 +13,74 @@ class BabyInsightSerializer(serializers.Serializer):
 class BabySerializer(serializers.ModelSerializer):
     class Meta:
         model = Baby
-        fields = ['id', 'name', 'birth_date', 'gender', 'user']
+        fields = ['id', 'name', 'birth_date', 'gender', 'timezone', 'user', 'updated_at']
         read_only_fields = ['user']
 
+    def validate_timezone(self, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise serializers.ValidationError("Enter a valid IANA time zone, such as 'America/New_York'.")
+        return value
+
 class BabyStatsSerializer(serializers.Serializer):
     height = serializers.FloatField()
     weight = serializers.FloatField()
     age_months = serializers.IntegerField()
 
+class PrefetchedBabyField(serializers.PrimaryKeyRelatedField):
+    """
+    Baby reference resolved against ``context['babies']``, the requesting
+    user's babies keyed by id, instead of one query per value.
+    """
+    def get_queryset(self):
+        return Baby.objects.none()
+
+    def to_internal_value(self, data):
+        try:
+            return self.context['babies'][int(data)]
+        except (KeyError, TypeError, ValueError):
+            self.fail('does_not_exist', pk_value=data)
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """Saves every validated item with a single ``bulk_create``."""
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create([model(**item) for item in validated_data])
+
 class FeedingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Feeding
         fields = "__all__"
 
+class FeedingBulkSerializer(FeedingSerializer):
+    baby = PrefetchedBabyField()
+
+    class Meta(FeedingSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
 class DiaperChangeSerializer(serializers.ModelSerializer):
     class Meta:
         model = DiaperChange
         fields = "__all__"
 
+class DiaperChangeBulkSerializer(DiaperChangeSerializer):
+    baby = PrefetchedBabyField()
+
+    class Meta(DiaperChangeSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
 class SleepSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sleep
         fields = "__all__"
 
+class SleepBulkSerializer(SleepSerializer):
+    baby = PrefetchedBabyField()
+
+    class Meta(SleepSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
 class ReminderSerializer(serializers.ModelSerializer):
     class Meta:
         model = Reminder
@@ -87,7 +133,7 @@ class RegisterSerializer(serializers.ModelSerializer):
 class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = ['id', 'name', 'cover_image', 'description', 'instructions', 'category', 'is_private', 'user']
+        fields = ['id', 'name', 'cover_image', 'description', 'instructions', 'category', 'is_private', 'user', 'updated_at']
         read_only_fields = ['user']
 
 class IngredientSerializer(serializers.ModelSerializer):
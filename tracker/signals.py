@@ -0,0 +1,253 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver, Signal
+from .models import (
+    Baby, Feeding, Sleep, DiaperChange, GrowthMeasurement, DevelopmentalMilestone, DoctorAppointment,
+    Reminder, PumpingSession, Medication, Recipe, Tombstone,
+)
+from .anomalies import (
+    flag_feeding, flag_feeding_gap, flag_feeding_quantity, flag_new_feedings, flag_new_sleeps, flag_sleep,
+)
+from .cache import bump_data_version
+from .heatmaps import apply_heatmap_deltas, heatmap_deltas, merge_heatmap_deltas, rebuild_activity_heatmaps
+from .rollups import apply_summary_deltas, merge_deltas, rebuild_daily_summaries, summary_deltas
+from .running_statistics import (
+    add_feeding, add_feedings, apply_sleep_durations, change_feeding_quantity, move_feeding, remove_feeding,
+    sleep_duration,
+)
+
+# bulk_create() skips post_save, so bulk endpoints send this once per batch
+# with the created rows as ``instances``
+bulk_created = Signal()
+
+
+def _invalidate_insights(baby_id):
+    # Bump after commit so a concurrent request cannot cache results computed
+    # from rows that are about to change under the new version
+    transaction.on_commit(lambda: bump_data_version(baby_id))
+
+
+@receiver([post_save, post_delete], sender=Feeding)
+@receiver([post_save, post_delete], sender=Sleep)
+@receiver([post_save, post_delete], sender=DiaperChange)
+@receiver([post_save, post_delete], sender=GrowthMeasurement)
+def invalidate_insights_on_event_change(sender, instance, **kwargs):
+    _invalidate_insights(instance.baby_id)
+
+
+@receiver(bulk_created, sender=Feeding)
+@receiver(bulk_created, sender=Sleep)
+@receiver(bulk_created, sender=DiaperChange)
+def invalidate_insights_on_bulk_create(sender, instances, **kwargs):
+    for baby_id in {instance.baby_id for instance in instances}:
+        _invalidate_insights(baby_id)
+
+
+@receiver(post_save, sender=Baby)
+def invalidate_insights_on_baby_change(sender, instance, **kwargs):
+    # Age-based recommendations depend on the birth date
+    _invalidate_insights(instance.id)
+
+
+@receiver(post_delete, sender=Feeding)
+@receiver(post_delete, sender=Sleep)
+@receiver(post_delete, sender=DiaperChange)
+@receiver(post_delete, sender=GrowthMeasurement)
+@receiver(post_delete, sender=DevelopmentalMilestone)
+@receiver(post_delete, sender=DoctorAppointment)
+def record_baby_owned_deletion(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk, baby_id=instance.baby_id)
+
+
+@receiver(post_delete, sender=Reminder)
+@receiver(post_delete, sender=PumpingSession)
+@receiver(post_delete, sender=Medication)
+@receiver(post_delete, sender=Recipe)
+def record_user_owned_deletion(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=Baby)
+def record_baby_deletion(sender, instance, **kwargs):
+    # Cascaded children were tombstoned just before this; the baby's own
+    # tombstone tells clients to drop them, so theirs are redundant
+    Tombstone.objects.filter(baby_id=instance.id).delete()
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+def discard_user_tombstones(sender, instance, **kwargs):
+    # Nobody is left to sync them
+    Tombstone.objects.filter(user_id=instance.id).delete()
+
+
+def _deleted_with_owner(origin):
+    """True when a row is being removed because its baby or user is being deleted."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, (Baby, User))
+
+
+@receiver(pre_save, sender=Feeding)
+@receiver(pre_save, sender=Sleep)
+@receiver(pre_save, sender=DiaperChange)
+def remember_summarized_row(sender, instance, **kwargs):
+    # The rollup and heatmaps need the row as stored to take back its old contribution.
+    # The same query brings its baby, for the time zone, and for a sleep the
+    # statistics that a moved start is rescored against
+    instance._summarized_row = None
+    if not instance._state.adding:
+        related = ('baby', 'baby__sleep_statistics') if sender is Sleep else ('baby',)
+        instance._summarized_row = sender.objects.filter(pk=instance.pk).select_related(*related).first()
+
+
+def _flag_placement(feeding, statistics, before, after, fresh):
+    flag_feeding(statistics, feeding, before, fresh)
+    if after is not None:
+        # The feeding that follows now has a shorter gap before it
+        flag_feeding_gap(statistics, feeding.baby_id, after, feeding.time)
+
+
+# Registered ahead of update_rollups_on_save, which clears the remembered row
+@receiver(post_save, sender=Feeding)
+def update_feeding_statistics_on_save(sender, instance, **kwargs):
+    old = getattr(instance, '_summarized_row', None)
+    if old is None:
+        _flag_placement(instance, *add_feeding(instance), fresh=True)
+    elif old.baby_id == instance.baby_id and old.time != instance.time:
+        statistics, (before, after), entered = move_feeding(old, instance)
+        if after is not None:
+            # The feeding that followed the old place now follows its predecessor
+            flag_feeding_gap(statistics, old.baby_id, after, before and before[0])
+        _flag_placement(instance, statistics, *entered, fresh=False)
+    elif old.baby_id != instance.baby_id:
+        statistics, before, after = remove_feeding(old)
+        if after is not None:
+            flag_feeding_gap(statistics, old.baby_id, after, before and before[0])
+        _flag_placement(instance, *add_feeding(instance), fresh=False)
+    elif old.quantity != instance.quantity:
+        flag_feeding_quantity(change_feeding_quantity(instance, old.quantity), instance)
+
+
+@receiver(post_delete, sender=Feeding)
+def update_feeding_statistics_on_delete(sender, instance, origin=None, **kwargs):
+    if _deleted_with_owner(origin):
+        return
+    statistics, before, after = remove_feeding(instance)
+    if after is not None:
+        flag_feeding_gap(statistics, instance.baby_id, after, before and before[0])
+
+
+@receiver(bulk_created, sender=Feeding)
+def update_feeding_statistics_on_bulk_create(sender, instances, **kwargs):
+    by_baby = {}
+    for instance in instances:
+        by_baby.setdefault(instance.baby_id, []).append(instance)
+    for baby_id, feedings in by_baby.items():
+        statistics, sequence = add_feedings(baby_id, feedings)
+        flag_new_feedings(statistics, baby_id, feedings, sequence)
+
+
+@receiver(post_save, sender=Sleep)
+def update_sleep_statistics_on_save(sender, instance, **kwargs):
+    old = getattr(instance, '_summarized_row', None)
+    hours = sleep_duration(instance)
+    old_hours = sleep_duration(old) if old is not None else None
+    if hours is None and old_hours is None:
+        return
+    if old is not None and (old.baby_id, old.start_time, old_hours) == (instance.baby_id, instance.start_time, hours):
+        return
+    if old is not None and old.baby_id != instance.baby_id:
+        apply_sleep_durations(old.baby_id, removed=[old_hours])
+        statistics = apply_sleep_durations(instance.baby_id, added=[hours])
+    else:
+        statistics = apply_sleep_durations(instance.baby_id, removed=[old_hours], added=[hours])
+    if statistics is None and hours is not None:
+        # Only the start moved, which leaves the moments as read in pre_save
+        statistics = old.baby.sleep_statistics
+    # Only a completed sleep can have been flagged
+    flag_sleep(statistics, instance, fresh=old_hours is None)
+
+
+@receiver(post_delete, sender=Sleep)
+def update_sleep_statistics_on_delete(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_owner(origin):
+        apply_sleep_durations(instance.baby_id, removed=[sleep_duration(instance)])
+
+
+@receiver(bulk_created, sender=Sleep)
+def update_sleep_statistics_on_bulk_create(sender, instances, **kwargs):
+    by_baby = {}
+    for instance in instances:
+        by_baby.setdefault(instance.baby_id, []).append(instance)
+    for baby_id, sleeps in by_baby.items():
+        statistics = apply_sleep_durations(baby_id, added=[sleep_duration(sleep) for sleep in sleeps])
+        if statistics is not None:
+            flag_new_sleeps(statistics, sleeps)
+
+
+@receiver(post_save, sender=Feeding)
+@receiver(post_save, sender=Sleep)
+@receiver(post_save, sender=DiaperChange)
+def update_rollups_on_save(sender, instance, **kwargs):
+    old = getattr(instance, '_summarized_row', None)
+    # The baby read with the stored row spares a lookup when it is unchanged
+    baby = old.baby if old is not None and old.baby_id == instance.baby_id else instance.baby
+    new_deltas = summary_deltas(instance, baby.tzinfo)
+    new_cells = heatmap_deltas(instance, baby.tzinfo)
+    if old is None:
+        apply_summary_deltas(instance.baby_id, new_deltas)
+        apply_heatmap_deltas(instance.baby_id, new_cells)
+    elif old.baby_id == instance.baby_id:
+        apply_summary_deltas(instance.baby_id, merge_deltas(new_deltas, summary_deltas(old, old.baby.tzinfo, sign=-1)))
+        apply_heatmap_deltas(
+            instance.baby_id, merge_heatmap_deltas(new_cells, heatmap_deltas(old, old.baby.tzinfo, sign=-1))
+        )
+    else:
+        apply_summary_deltas(old.baby_id, summary_deltas(old, old.baby.tzinfo, sign=-1))
+        apply_heatmap_deltas(old.baby_id, heatmap_deltas(old, old.baby.tzinfo, sign=-1))
+        apply_summary_deltas(instance.baby_id, new_deltas)
+        apply_heatmap_deltas(instance.baby_id, new_cells)
+    instance._summarized_row = None
+
+
+@receiver(post_delete, sender=Feeding)
+@receiver(post_delete, sender=Sleep)
+@receiver(post_delete, sender=DiaperChange)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # The baby's summaries and heatmaps are deleted along with it
+    if _deleted_with_owner(origin):
+        return
+    apply_summary_deltas(instance.baby_id, summary_deltas(instance, instance.baby.tzinfo, sign=-1))
+    apply_heatmap_deltas(instance.baby_id, heatmap_deltas(instance, instance.baby.tzinfo, sign=-1))
+
+
+@receiver(bulk_created, sender=Feeding)
+@receiver(bulk_created, sender=Sleep)
+@receiver(bulk_created, sender=DiaperChange)
+def update_rollups_on_bulk_create(sender, instances, **kwargs):
+    by_baby = {}
+    for instance in instances:
+        tz = instance.baby.tzinfo
+        days, cells = by_baby.setdefault(instance.baby_id, ([], []))
+        days.append(summary_deltas(instance, tz))
+        cells.append(heatmap_deltas(instance, tz))
+    for baby_id, (days, cells) in by_baby.items():
+        apply_summary_deltas(baby_id, merge_deltas(*days))
+        apply_heatmap_deltas(baby_id, merge_heatmap_deltas(*cells))
+
+
+@receiver(post_init, sender=Baby)
+def remember_baby_timezone(sender, instance, **kwargs):
+    instance._loaded_timezone = instance.__dict__.get('timezone')
+
+
+@receiver(post_save, sender=Baby)
+def rebuild_rollups_on_timezone_change(sender, instance, created, **kwargs):
+    # Moving time zone moves the day boundaries and local hour of every event
+    loaded = instance._loaded_timezone
+    if not created and loaded is not None and loaded != instance.timezone:
+        rebuild_daily_summaries(instance)
+        rebuild_activity_heatmaps(instance)
+    instance._loaded_timezone = instance.timezone
@@ -0,0 +1,68 @@
+"""
+Splitting of sleep sessions into per-day pieces at local midnight.
+
+Kept apart from ``tracker.rollups`` so NumPy is only imported once a sleep
+is first written or summarized, not when a worker boots.
+"""
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+
+def utc64(values):
+    """Aware datetimes (None for missing) as a naive-UTC ``datetime64[us]`` array."""
+    return np.array(
+        [None if value is None else value.astimezone(dt_timezone.utc).replace(tzinfo=None) for value in values],
+        dtype='datetime64[us]',
+    )
+
+
+def _local_midnights(first_day, last_day, tz):
+    """UTC instants of local midnight from ``first_day`` through the day after ``last_day``."""
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 2)]
+    midnights = [datetime.combine(day, time.min, tzinfo=tz).astimezone(dt_timezone.utc) for day in days]
+    return days, np.array([moment.replace(tzinfo=None) for moment in midnights], dtype='datetime64[us]')
+
+
+def split_sleep_by_day(starts, ends, tz):
+    """
+    Clip sleep sessions at local midnight in ``tz``.
+
+    ``starts`` and ``ends`` are naive-UTC ``datetime64`` arrays; sessions
+    with a missing end are still ongoing and contribute nothing. Returns
+    ``(days, piece_days, minutes)``: the local dates covered, then for each
+    piece the index of its day in ``days`` and the minutes slept in it.
+    Every session is expanded into one piece per day it touches with
+    ``np.repeat``, so the split is a fixed number of array operations.
+    """
+    starts = np.asarray(starts, dtype='datetime64[us]')
+    ends = np.asarray(ends, dtype='datetime64[us]')
+    done = ~np.isnat(ends) & (ends > starts)
+    starts, ends = starts[done], ends[done]
+    if not len(starts):
+        return [], np.zeros(0, dtype=int), np.zeros(0)
+
+    def local_date(moment):
+        return timezone.localtime(moment.item().replace(tzinfo=dt_timezone.utc), tz).date()
+
+    days, midnights = _local_midnights(local_date(starts.min()), local_date(ends.max()), tz)
+    first = np.searchsorted(midnights, starts, side='right') - 1
+    # A session ending exactly at midnight does not reach the next day
+    last = np.searchsorted(midnights, ends, side='left') - 1
+    pieces = last - first + 1
+
+    session = np.repeat(np.arange(len(starts)), pieces)
+    offset = np.arange(len(session)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    day = first[session] + offset
+    lower = np.maximum(starts[session], midnights[day])
+    upper = np.minimum(ends[session], midnights[day + 1])
+    minutes = (upper - lower) / np.timedelta64(1, 'm')
+    return days, day, minutes
+
+
+def sleep_minutes_by_day(starts, ends, tz):
+    """Return {local date: minutes slept} for the sessions, split at midnight."""
+    days, piece_days, minutes = split_sleep_by_day(starts, ends, tz)
+    totals = np.bincount(piece_days, weights=minutes, minlength=len(days))
+    return {days[index]: float(totals[index]) for index in np.flatnonzero(totals)}
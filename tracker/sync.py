@@ -0,0 +1,176 @@
+"""
+Delta sync for mobile clients.
+
+A client sends the opaque watermark it got from its previous sync and
+receives only the rows created or updated since then (via each model's
+``updated_at``) plus the ids of rows deleted since then (via ``Tombstone``).
+Every lookup is a range read on an (owner, updated_at) style index, so the
+cost of a sync follows the amount of change rather than the size of history.
+
+Responses are paged: each holds at most ``SYNC_PAGE_SIZE`` rows, walked per
+model in (updated_at, id) order, and ``more`` says whether the ``next`` token
+continues the same sync or is the watermark for the next one. Tombstones
+are kept for ``SYNC_RETENTION``; a watermark older than that can no longer
+be answered and the client is told to run a full sync instead.
+"""
+from datetime import timedelta
+
+from django.core import signing
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from .models import (
+    Baby, Feeding, DiaperChange, Sleep, Reminder, GrowthMeasurement, DevelopmentalMilestone,
+    PumpingSession, DoctorAppointment, Medication, Recipe, Tombstone,
+)
+from .serializers import (
+    BabySerializer, FeedingSerializer, DiaperChangeSerializer, SleepSerializer, ReminderSerializer,
+    GrowthMeasurementSerializer, DevelopmentalMilestoneSerializer, PumpingSessionSerializer,
+    DoctorAppointmentSerializer, MedicationSerializer, RecipeSerializer,
+)
+
+# (response key, model, serializer, lookup from the model to its owning user)
+SYNC_MODELS = (
+    ('babies', Baby, BabySerializer, 'user'),
+    ('feedings', Feeding, FeedingSerializer, 'baby__user'),
+    ('diaper_changes', DiaperChange, DiaperChangeSerializer, 'baby__user'),
+    ('sleep', Sleep, SleepSerializer, 'baby__user'),
+    ('growth_measurements', GrowthMeasurement, GrowthMeasurementSerializer, 'baby__user'),
+    ('developmental_milestones', DevelopmentalMilestone, DevelopmentalMilestoneSerializer, 'baby__user'),
+    ('appointments', DoctorAppointment, DoctorAppointmentSerializer, 'baby__user'),
+    ('reminders', Reminder, ReminderSerializer, 'user'),
+    ('pumping_sessions', PumpingSession, PumpingSessionSerializer, 'user'),
+    ('medications', Medication, MedicationSerializer, 'user'),
+    ('recipes', Recipe, RecipeSerializer, 'user'),
+)
+
+SYNC_KEYS = {model._meta.label_lower: key for key, model, _, _ in SYNC_MODELS}
+
+# Rows are stamped when they are saved but only become visible when their
+# transaction commits, so a write in flight during a sync can land slightly
+# behind the watermark. Rewinding the next watermark by this much re-sends
+# such rows instead of losing them; clients apply changes by id, so repeats
+# are harmless.
+SYNC_OVERLAP = timedelta(seconds=5)
+
+SYNC_PAGE_SIZE = 500
+
+# Tombstones older than this are pruned (see the prune_tombstones command),
+# so watermarks older than this are refused
+SYNC_RETENTION = timedelta(days=30)
+
+_TOKEN_SALT = 'tracker.sync'
+
+
+class ResyncRequired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token is too old; start a full sync without 'since'."
+    default_code = 'resync_required'
+
+
+def make_sync_token(moment, position=None):
+    """A token for the ``moment`` watermark, or for resuming a paged sync at ``position``.
+
+    ``position`` is (started, model index, last (updated_at, id) or None),
+    as ``collect_changes`` returns it.
+    """
+    if position is None:
+        return signing.dumps(moment.isoformat(), salt=_TOKEN_SALT)
+    started, index, after = position
+    payload = [moment and moment.isoformat(), started.isoformat(), index]
+    if after is not None:
+        payload += [after[0].isoformat(), after[1]]
+    return signing.dumps(payload, salt=_TOKEN_SALT)
+
+
+def _parse(value):
+    moment = parse_datetime(value)
+    if moment is None:
+        raise ValueError(value)
+    return moment
+
+
+def read_sync_token(token):
+    """Return the watermark (or None) and the paging position encoded by ``make_sync_token``."""
+    try:
+        payload = signing.loads(token, salt=_TOKEN_SALT)
+        if isinstance(payload, str):
+            moment, position = _parse(payload), None
+        else:
+            since, started, index, *after = payload
+            moment = since and _parse(since)
+            after = (_parse(after[0]), int(after[1])) if after else None
+            position = (_parse(started), int(index), after)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValidationError({'since': "Invalid sync token."})
+    return moment, position
+
+
+def collect_changes(user, since=None, position=None):
+    """
+    Return a page of everything that changed for ``user`` since the ``since`` watermark.
+
+    Without a watermark this is a full sync of every record the user owns.
+    ``position`` resumes a sync where its previous page stopped.
+    """
+    now = timezone.now()
+    started, index, after = position or (now, 0, None)
+    if (since or started) < now - SYNC_RETENTION:
+        raise ResyncRequired()
+
+    changes = {key: [] for key, _, _, _ in SYNC_MODELS}
+    remaining = SYNC_PAGE_SIZE
+    resume = None
+    for i, (key, model, serializer_class, owner) in enumerate(SYNC_MODELS[index:], start=index):
+        if not remaining:
+            resume = (started, i, None)
+            break
+        queryset = model.objects.filter(**{owner: user})
+        if since is not None:
+            queryset = queryset.filter(updated_at__gte=since)
+        if i == index and after is not None:
+            updated_at, pk = after
+            queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+        # One row past the page tells whether this model has more
+        rows = list(queryset.order_by('updated_at', 'id')[:remaining + 1])
+        if len(rows) > remaining:
+            rows = rows[:remaining]
+            resume = (started, i, (rows[-1].updated_at, rows[-1].id))
+        changes[key] = serializer_class(rows, many=True).data
+        remaining -= len(rows)
+        if resume is not None:
+            break
+
+    deleted = {key: [] for key, _, _, _ in SYNC_MODELS}
+    if since is not None and position is None:
+        # Baby-owned rows are tombstoned under their baby's id; deleted babies
+        # and user-owned rows under the user's. Rows deleted while later pages
+        # are fetched have newer tombstones, which the next sync reports.
+        tombstones = Tombstone.objects.filter(
+            Q(user_id=user.id) | Q(baby_id__in=Baby.objects.filter(user=user).values('id')),
+            deleted_at__gte=since,
+        )
+        for label, object_id in tombstones.values_list('model', 'object_id'):
+            deleted[SYNC_KEYS[label]].append(object_id)
+
+    if resume is not None:
+        token = make_sync_token(since, resume)
+    else:
+        # Rows changed while the pages were fetched are sent again next time
+        token = make_sync_token(started - SYNC_OVERLAP)
+    return {
+        'next': token,
+        'more': resume is not None,
+        'changes': changes,
+        'deleted': deleted,
+    }
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than ``SYNC_RETENTION``. Returns how many were deleted."""
+    cutoff = (now or timezone.now()) - SYNC_RETENTION
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
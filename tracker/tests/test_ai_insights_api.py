@@ -216,3 +216,74 @@ class AIInsightsAPITestCase(TestCase):
         # Test unauthenticated user cannot get predictions
         response = self.unauthenticated_client.get(url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class InsightsWindowTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        now = datetime.now(pytz.UTC)
+        # Six changes in the last three days and eight around 200 days ago
+        for i in range(6):
+            DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=now - timedelta(hours=i * 12))
+        for i in range(8):
+            DiaperChange.objects.create(baby=self.baby, diaper_type='dirty',
+                                        time=now - timedelta(days=200, hours=i * 12))
+
+    def _total(self, **params):
+        url = reverse('baby-ai-insights', kwargs={'baby_id': self.baby.id}) + '?type=diaper'
+        response = self.client.get(url + ''.join(f'&{k}={v}' for k, v in params.items()))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['diaper_insights']['basic_stats']['total_changes']
+
+    def test_default_window_skips_old_history(self):
+        self.assertEqual(self._total(), 6)
+
+    def test_window_days(self):
+        self.assertEqual(self._total(window_days=3650), 14)
+        # Each window is cached under its own key
+        self.assertEqual(self._total(window_days=7), 6)
+
+    def test_since_and_until(self):
+        old = (datetime.now(pytz.UTC) - timedelta(days=210)).date()
+        self.assertEqual(self._total(since=old), 14)
+        self.assertEqual(self._total(since=old, until=old + timedelta(days=30)), 8)
+        # Without since, window_days counts back from until
+        self.assertEqual(self._total(until=old + timedelta(days=30), window_days=30), 8)
+
+    def test_dates_are_local_to_the_baby(self):
+        self.baby.timezone = 'America/Los_Angeles'
+        self.baby.save()
+        # Six changes on the evening of March 9th in Los Angeles, which is
+        # already March 10th in UTC, and six on the afternoon of the 10th
+        evening = datetime(2024, 3, 10, 2, tzinfo=pytz.UTC)
+        afternoon = datetime(2024, 3, 10, 21, tzinfo=pytz.UTC)
+        for i in range(6):
+            DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=evening + timedelta(hours=i))
+            DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=afternoon + timedelta(minutes=i * 10))
+        self.assertEqual(self._total(since='2024-03-10', until='2024-03-11'), 6)
+        self.assertEqual(self._total(since='2024-03-09', until='2024-03-10'), 6)
+
+    def test_visualizations_accept_window(self):
+        url = reverse('baby-insights-visualizations', kwargs={'baby_id': self.baby.id})
+        response = self.client.get(url + '?type=diaper&window_days=7')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['diaper_distribution'], {'wet': 6})
+
+    def test_only_window_rows_are_fetched(self):
+        from tracker.ai_insights import AIInsights
+        now = datetime.now(pytz.UTC)
+        ai = AIInsights(self.baby, since=now - timedelta(days=7))
+        self.assertEqual(len(ai.data.diaper_change_rows), 6)
+        self.assertEqual(len(ai.data.daily_summaries), len({
+            (now - timedelta(hours=i * 12)).date() for i in range(6)
+        }))
+
+    def test_invalid_window_rejected(self):
+        url = reverse('baby-ai-insights', kwargs={'baby_id': self.baby.id})
+        for query in ('window_days=0', 'window_days=week', 'window_days=100000', 'since=garbage',
+                      'since=2024-03-10&until=2024-03-01'):
+            response = self.client.get(f'{url}?{query}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
@@ -4,7 +4,8 @@ Unit tests for AIInsights class methods, targeting branches not covered by API t
 from django.test import TestCase
 from django.contrib.auth.models import User
 from tracker.models import Baby, Feeding, Sleep, DiaperChange, GrowthMeasurement
-from tracker.ai_insights import AIInsights
+from tracker.ai_insights import AIInsights, hour_change_point, linear_slopes, two_means
+from tracker.trends import linear_slope
 from datetime import datetime, timedelta, date
 import pytz
 
@@ -16,11 +17,10 @@ def make_baby(user, birth_date='2024-01-01'):
 
 
 def make_feedings(baby, count, hours_apart=3, feeding_type='bottle', quantity=120):
-    """Create feedings with real timestamps (bypasses auto_now_add via update)."""
     now = datetime.now(pytz.UTC)
     for i in range(count):
-        f = Feeding.objects.create(baby=baby, feeding_type=feeding_type, quantity=quantity)
-        Feeding.objects.filter(id=f.id).update(time=now - timedelta(hours=i * hours_apart))
+        Feeding.objects.create(baby=baby, feeding_type=feeding_type, quantity=quantity,
+                               time=now - timedelta(hours=i * hours_apart))
 
 
 def make_sleeps(baby, count, hours_apart=8, duration_hours=2):
@@ -31,11 +31,9 @@ def make_sleeps(baby, count, hours_apart=8, duration_hours=2):
 
 
 def make_diapers(baby, count, hours_apart=4, diaper_type='wet'):
-    """Create diaper changes with real timestamps (bypasses auto_now_add via update)."""
     now = datetime.now(pytz.UTC)
     for i in range(count):
-        dc = DiaperChange.objects.create(baby=baby, diaper_type=diaper_type)
-        DiaperChange.objects.filter(id=dc.id).update(time=now - timedelta(hours=i * hours_apart))
+        DiaperChange.objects.create(baby=baby, diaper_type=diaper_type, time=now - timedelta(hours=i * hours_apart))
 
 
 class AIInsightsFeedingTest(TestCase):
@@ -67,12 +65,13 @@ class AIInsightsFeedingTest(TestCase):
     def test_feeding_anomaly_unusual_interval(self):
         """A huge gap between feedings should be flagged as an anomaly."""
         now = datetime.now(pytz.UTC)
-        # 9 feedings 1 hour apart (tight cluster), then one 72 hours before
+        # 9 feedings 1 hour apart (tight cluster), then one 72 hours before;
+        # anomalies are flagged on save, so the times are set at creation
         for i in range(9):
-            f = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
-            Feeding.objects.filter(id=f.id).update(time=now - timedelta(hours=i))
-        f = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
-        Feeding.objects.filter(id=f.id).update(time=now - timedelta(hours=72))
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120,
+                                   time=now - timedelta(hours=i))
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120,
+                               time=now - timedelta(hours=72))
 
         ai = AIInsights(self.baby)
         result = ai.get_feeding_insights()
@@ -115,6 +114,67 @@ class AIInsightsFeedingTest(TestCase):
         self.assertEqual(result['predictions']['confidence'], 'medium')
 
 
+class FeedingPatternShiftTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.baby = make_baby(self.user)
+
+    def _schedule(self, first_day, days, offset_minutes=0, tz=pytz.UTC):
+        """Eight feedings a day, every three hours from 01:00 local time plus the offset."""
+        feedings = []
+        for day in range(first_day, first_day + days):
+            midnight = tz.localize(datetime(2024, 1, 1) + timedelta(days=day))
+            for i in range(8):
+                minutes = 60 + i * 180 + offset_minutes + (day * 7 + i * 13) % 41 - 20
+                feedings.append(Feeding(baby=self.baby, feeding_type='bottle', quantity=120,
+                                        time=midnight + timedelta(minutes=minutes)))
+        Feeding.objects.bulk_create(feedings)
+
+    def _shift(self):
+        ai = AIInsights(self.baby)
+        shifts = [a for a in ai.get_feeding_insights()['anomalies'] if a['type'] == 'feeding_pattern_shift']
+        return shifts[0]['details'] if shifts else None
+
+    def test_steady_schedule_has_no_shift(self):
+        self._schedule(0, 60)
+        self.assertIsNone(self._shift())
+
+    def test_shift_located_away_from_midpoint(self):
+        # Four weeks on one schedule, then a week ninety minutes later
+        self._schedule(0, 28)
+        self._schedule(28, 7, offset_minutes=90)
+        details = self._shift()
+        self.assertEqual(details['changed_on'], '2024-01-29')
+        self.assertGreater(details['pattern_difference'], 50)
+
+    def test_shift_follows_local_time(self):
+        # A steady local schedule across the start of daylight saving time
+        # moves every feeding an hour in UTC, which is not a change
+        tz = pytz.timezone('America/New_York')
+        self.baby.timezone = 'America/New_York'
+        self.baby.save()
+        self._schedule(50, 40, tz=tz)
+        self.assertIsNone(self._shift())
+
+
+class HourChangePointTest(TestCase):
+    def test_locates_split(self):
+        hours = [2, 5, 8] * 10 + [3, 6, 9] * 4
+        split, difference, statistic, degrees = hour_change_point(hours)
+        self.assertEqual(split, 30)
+        self.assertAlmostEqual(difference, 1.0)
+        self.assertEqual(degrees, 5)
+        self.assertAlmostEqual(statistic, len(hours))
+
+    def test_keeps_min_size_on_each_side(self):
+        split, _, _, _ = hour_change_point([2] * 20 + [9] * 2, min_size=5)
+        self.assertEqual(split, 17)
+
+    def test_too_little_data(self):
+        self.assertIsNone(hour_change_point([2, 3] * 4))
+        self.assertIsNone(hour_change_point([7] * 30))
+
+
 class AIInsightsSleepTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='u', password='p')
@@ -141,6 +201,35 @@ class AIInsightsSleepTest(TestCase):
         # clusters should be a dict when >= 10 records
         self.assertIsInstance(result['pattern_insights']['sleep_clusters'], dict)
 
+    def test_sleep_clusters_separate_naps_from_night_sleep(self):
+        day = datetime(2024, 3, 1, tzinfo=pytz.UTC)
+        for i in range(5):
+            for hour, hours in ((9, 1.5), (13, 1), (20, 10)):
+                start = day + timedelta(days=i, hours=hour)
+                Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=hours))
+        result = AIInsights(self.baby).get_sleep_insights()
+        self.assertEqual(result['pattern_insights']['sleep_clusters'], {
+            0: {'avg_start_hour': 11.0, 'avg_duration': 1.25, 'count': 10},
+            1: {'avg_start_hour': 20.0, 'avg_duration': 10.0, 'count': 5},
+        })
+        self.assertEqual(result['pattern_insights']['nap_insights']['naps_per_day'], 2.0)
+        self.assertEqual(result['pattern_insights']['night_sleep_insights']['typical_bedtime'], [20])
+
+    def test_sleep_hours_follow_local_time(self):
+        # The same routine as above, recorded by a baby nine hours ahead of UTC
+        self.baby.timezone = 'Asia/Tokyo'
+        self.baby.save()
+        day = datetime(2024, 3, 1, tzinfo=pytz.UTC) - timedelta(hours=9)
+        for i in range(5):
+            for hour, hours in ((9, 1.5), (13, 1), (20, 10)):
+                start = day + timedelta(days=i, hours=hour)
+                Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=hours))
+        result = AIInsights(self.baby).get_sleep_insights()
+        self.assertEqual(result['basic_insights']['recommended_sleep_times'], [9, 13, 20])
+        self.assertEqual(result['pattern_insights']['nap_insights']['recommended_nap_times'], [9, 13])
+        self.assertEqual(result['pattern_insights']['nap_insights']['naps_per_day'], 2.0)
+        self.assertEqual(result['pattern_insights']['night_sleep_insights']['typical_bedtime'], [20])
+
     def test_sleep_no_clustering_below_10_records(self):
         make_sleeps(self.baby, 6)
         ai = AIInsights(self.baby)
@@ -174,6 +263,42 @@ class AIInsightsSleepTest(TestCase):
         result = ai.get_sleep_insights()
         self.assertIn('next_predicted_sleep', result['predictions'])
 
+    def test_predict_next_sleep_averages_awake_time(self):
+        start = datetime(2024, 3, 1, 8, tzinfo=pytz.UTC)
+        for awake in [0, 2, 3, 4, 2, 3]:
+            start += timedelta(hours=awake)
+            Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=1))
+            start += timedelta(hours=1)
+        prediction = AIInsights(self.baby).get_sleep_insights()['predictions']
+        self.assertEqual(prediction['average_awake_time'], 2.8)
+        self.assertEqual(prediction['next_predicted_sleep'], '2024-03-02 06:48:00+00:00')
+
+    def test_bedtime_spread_wraps_past_midnight(self):
+        start = datetime(2024, 3, 1, 23, tzinfo=pytz.UTC)
+        for i in range(8):
+            # Alternating 23:00 and 00:00 bedtimes are an hour apart
+            bedtime = start + timedelta(days=i, hours=i % 2)
+            Sleep.objects.create(baby=self.baby, start_time=bedtime, end_time=bedtime + timedelta(hours=10))
+        quality = AIInsights(self.baby).get_sleep_insights()['sleep_quality']
+        self.assertIn('Fairly consistent bedtime', quality['factors'])
+
+    def test_sleep_analysis_makes_no_per_row_calls(self):
+        import cProfile
+        import pstats
+
+        def calls(count):
+            Sleep.objects.filter(baby=self.baby).delete()
+            make_sleeps(self.baby, count, hours_apart=5)
+            ai = AIInsights(self.baby)
+            # Load the rows first: only the analysis itself is profiled
+            ai.data.sleeps, ai.data.daily_summaries
+            profiler = cProfile.Profile()
+            profiler.runcall(ai.get_sleep_insights)
+            return pstats.Stats(profiler).total_calls
+
+        # Ten times the rows must not mean more Python-level calls
+        self.assertLessEqual(calls(400), calls(40) * 1.05)
+
 
 class AIInsightsGrowthTest(TestCase):
     def setUp(self):
@@ -201,6 +326,8 @@ class AIInsightsGrowthTest(TestCase):
         ai = AIInsights(self.baby)
         result = ai.get_growth_insights()
         self.assertIn('height_cm_per_month', result['growth_velocity'])
+        self.assertEqual(result['growth_velocity']['height_trend'], 'increasing')
+        self.assertEqual(result['growth_velocity']['weight_trend'], 'increasing')
 
     def test_growth_without_birth_date(self):
         """Should still work using relative dates when birth_date is missing."""
@@ -237,8 +364,7 @@ class AIInsightsDiaperTest(TestCase):
         now = datetime.now(pytz.UTC)
         # Only dirty diapers spread over 5 days — zero wet/day (below threshold of 4)
         for i in range(5):
-            dc = DiaperChange.objects.create(baby=young_baby, diaper_type='dirty')
-            DiaperChange.objects.filter(id=dc.id).update(time=now - timedelta(days=i))
+            DiaperChange.objects.create(baby=young_baby, diaper_type='dirty', time=now - timedelta(days=i))
         ai = AIInsights(young_baby)
         result = ai.get_diaper_insights()
         concern_types = [c['type'] for c in result.get('concerns', [])]
@@ -257,6 +383,44 @@ class AIInsightsDiaperTest(TestCase):
         self.assertIn('mixed', dist)
 
 
+class TwoMeansTest(TestCase):
+    # Start hours, durations and the labels KMeans(n_clusters=2, random_state=42)
+    # assigned them
+    FIXTURES = [
+        ([20, 9, 13, 21, 10, 14, 19, 9, 15, 20, 11, 13],
+         [10.0, 1.5, 1.0, 9.5, 2.0, 1.25, 11.0, 0.75, 1.5, 8.5, 1.0, 2.5],
+         [1, 0, 0, 1, 0, 0, 1, 0, 0, 1, 0, 0]),
+        ([1, 2, 3, 1, 2, 3, 13, 14, 15, 13, 14, 15],
+         [1.0] * 12,
+         [0, 0, 0, 0, 0, 0, 1, 1, 1, 1, 1, 1]),
+        ([3, 3, 19, 11, 14, 14, 17, 0, 11, 3, 9, 22, 13, 1, 13, 3],
+         [9.51, 6.41, 4.01, 5.36, 6.8, 3.12, 1.81, 7.99, 6.87, 5.37, 8.26, 5.72, 9.82, 2.44, 5.76, 5.09],
+         [0, 0, 1, 1, 0, 1, 1, 0, 0, 1, 0, 1, 0, 1, 1, 1]),
+    ]
+
+    def _features(self, hours, durations):
+        import numpy as np
+        angles = np.array(hours) * (2 * np.pi / 24)
+        return np.column_stack([np.sin(angles), np.cos(angles), durations])
+
+    def test_labels_match_kmeans(self):
+        for hours, durations, expected in self.FIXTURES:
+            labels, _ = two_means(self._features(hours, durations))
+            # Cluster ids are arbitrary, so compare the partitions
+            self.assertIn(labels.tolist(), (expected, [1 - label for label in expected]))
+
+    def test_labels_ordered_by_duration(self):
+        hours, durations, _ = self.FIXTURES[0]
+        labels, centroids = two_means(self._features(hours, durations))
+        self.assertEqual(labels.tolist(), [1, 0, 0] * 4)
+        self.assertLess(centroids[0, -1], centroids[1, -1])
+
+    def test_identical_rows_form_one_cluster(self):
+        labels, centroids = two_means(self._features([9] * 10, [1.5] * 10))
+        self.assertEqual(labels.tolist(), [0] * 10)
+        self.assertEqual(len(centroids), 1)
+
+
 class AIInsightsCalculateTrendTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='u', password='p')
@@ -305,6 +469,34 @@ class AIInsightsCalculateTrendTest(TestCase):
         result = self.ai._calculate_trend(df, 'value')
         self.assertEqual(result, 'non-numeric data')
 
+    def test_slopes_match_least_squares_fit(self):
+        import numpy as np
+        values = np.random.default_rng(3).normal(size=(12, 4)).cumsum(axis=0)
+        expected = [np.polyfit(np.arange(12), values[:, column], 1)[0] for column in range(4)]
+        np.testing.assert_allclose(linear_slopes(values), expected)
+        self.assertAlmostEqual(linear_slopes(values[:, 0]), expected[0])
+        for column in range(4):
+            self.assertAlmostEqual(linear_slope(values[:, column].tolist()), expected[column])
+
+    def test_batched_slopes_match_per_column_slopes(self):
+        import numpy as np
+        values = np.random.default_rng(8).normal(size=(40, 6)).cumsum(axis=0)
+        per_column = [linear_slopes(values[:, column]) for column in range(6)]
+        np.testing.assert_allclose(linear_slopes(values), per_column)
+
+    def test_batched_trends_match_single_column_trends(self):
+        import pandas as pd
+        df = pd.DataFrame({
+            'time': pd.date_range('2024-01-01', periods=5)[::-1],
+            'up': [5, 4, 3, 2, 1],
+            'flat': [2.0] * 5,
+            'label': list('abcde'),
+        })
+        columns = ['up', 'flat', 'label', 'missing']
+        trends = self.ai._calculate_trends(df, columns)
+        self.assertEqual(trends, {column: self.ai._calculate_trend(df, column) for column in columns})
+        self.assertEqual(list(trends.values()), ['increasing', 'stable', 'non-numeric data', 'insufficient data'])
+
 
 class AIInsightsBabyAgeTest(TestCase):
     def setUp(self):
@@ -357,6 +549,22 @@ class AIInsightsComprehensiveTest(TestCase):
         self.assertIn('correlations', result)
         self.assertIn('recommendations', result)
 
+    def test_comprehensive_loads_each_table_once(self):
+        make_feedings(self.baby, 6)
+        make_sleeps(self.baby, 6)
+        make_diapers(self.baby, 6)
+        ai = AIInsights(self.baby)
+        # One query per event table and one for the daily rollup, plus the
+        # stored weekly heatmaps of feedings and diaper changes, the diaper
+        # counts by type and the flagged anomalies
+        with self.assertNumQueries(9):
+            ai.get_feeding_insights()
+            ai.get_sleep_insights()
+            ai.get_growth_insights()
+            ai.get_diaper_insights()
+            result = ai.get_comprehensive_insights()
+        self.assertIs(result['individual_insights']['feeding'], ai.get_feeding_insights())
+
     def test_correlations_require_two_data_types(self):
         make_feedings(self.baby, 6)
         # Only feeding data — should get "need at least two" message
@@ -509,6 +717,13 @@ class AIInsightsInsightTypeTest(TestCase):
         for key in ['feeding_insights', 'sleep_insights', 'growth_insights', 'diaper_insights', 'comprehensive_insights']:
             self.assertIn(key, response.data)
 
+    def test_all_insight_type_queries_each_table_once(self):
+        # One lookup for the baby, then one query per table, plus the stored
+        # weekly heatmap and the partial weeks at the edges
+        with self.assertNumQueries(6):
+            response = self.client.get(self._insights_url('all'))
+        self.assertEqual(response.status_code, 200)
+
     def test_default_insight_type_is_all(self):
         response = self.client.get(self._insights_url())
         self.assertEqual(response.status_code, 200)
@@ -523,3 +738,110 @@ class AIInsightsInsightTypeTest(TestCase):
         response = self.client.post(self._insights_url('all'), {})
         self.assertEqual(response.status_code, 200)
         self.assertIn('feeding_insights', response.data)
+
+
+class HasEventBeforeTest(TestCase):
+    def test_only_events_inside_open_window_count(self):
+        import numpy as np
+        from tracker.ai_insights import has_event_before
+        base = np.datetime64('2024-01-01T12:00')
+        events = np.array([base - np.timedelta64(30, 'm'), base + np.timedelta64(3, 'h')])
+        anchors = np.array([
+            base,                                # event 30 min before
+            base + np.timedelta64(3, 'h'),       # event exactly at anchor is excluded
+            base + np.timedelta64(30, 'm'),      # event exactly one hour before is excluded
+            base - np.timedelta64(2, 'h'),       # nothing before
+        ])
+        result = has_event_before(events, anchors, np.timedelta64(1, 'h'))
+        self.assertEqual(result.tolist(), [True, False, False, False])
+
+    def test_unsorted_events(self):
+        import numpy as np
+        from tracker.ai_insights import has_event_before
+        base = np.datetime64('2024-01-01T12:00')
+        events = np.array([base + np.timedelta64(5, 'h'), base - np.timedelta64(10, 'm')])
+        result = has_event_before(events, np.array([base]), np.timedelta64(1, 'h'))
+        self.assertEqual(result.tolist(), [True])
+
+
+class FeedingSleepCorrelationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.baby = make_baby(self.user)
+
+    def test_feeding_before_sleep_correlation_details(self):
+        now = datetime.now(pytz.UTC).replace(microsecond=0)
+        # Three 3-hour sleeps preceded by a feeding, three 1-hour sleeps without one
+        for i in range(6):
+            start = now - timedelta(hours=12 * (i + 1))
+            fed = i % 2 == 0
+            Sleep.objects.create(baby=self.baby, start_time=start,
+                                 end_time=start + timedelta(hours=3 if fed else 1))
+            f = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
+            offset = timedelta(minutes=30) if fed else timedelta(hours=2)
+            Feeding.objects.filter(id=f.id).update(time=start - offset)
+
+        ai = AIInsights(self.baby)
+        result = ai._find_cross_activity_correlations(has_feeding=True, has_sleep=True)
+        self.assertEqual(result, [{
+            'type': 'feeding_sleep',
+            'description': 'Feeding before sleep may lead to longer sleep duration',
+            'details': {
+                'with_feeding_hours': 3.0,
+                'without_feeding_hours': 1.0,
+                'difference_percent': 200.0,
+            },
+        }])
+
+
+class CountEventsInIntervalsTest(TestCase):
+    def setUp(self):
+        import numpy as np
+        self.base = np.datetime64('2024-01-01T00:00')
+        self.hour = np.timedelta64(1, 'h')
+        self.events = np.array([self.base + self.hour * h for h in (5, 1, 3, 2)])
+
+    def test_closed_both_includes_boundaries(self):
+        from tracker.ai_insights import count_events_in_intervals
+        counts = count_events_in_intervals(
+            self.events, [self.base + self.hour, self.base + self.hour * 6], [self.base + self.hour * 3, self.base + self.hour * 8]
+        )
+        self.assertEqual(counts.tolist(), [3, 0])
+
+    def test_closed_variants(self):
+        from tracker.ai_insights import count_events_in_intervals
+        starts, ends = [self.base + self.hour], [self.base + self.hour * 3]
+        self.assertEqual(count_events_in_intervals(self.events, starts, ends, closed='left').tolist(), [2])
+        self.assertEqual(count_events_in_intervals(self.events, starts, ends, closed='right').tolist(), [2])
+        self.assertEqual(count_events_in_intervals(self.events, starts, ends, closed='neither').tolist(), [1])
+
+    def test_open_intervals(self):
+        import numpy as np
+        from tracker.ai_insights import count_events_in_intervals
+        starts = [self.base + self.hour * 2]
+        ends = np.array(['NaT'], dtype='datetime64[ns]')
+        self.assertEqual(count_events_in_intervals(self.events, starts, ends).tolist(), [0])
+        counts = count_events_in_intervals(self.events, starts, ends, open_end=self.base + self.hour * 4)
+        self.assertEqual(counts.tolist(), [2])
+
+
+class DiaperSleepDisruptionTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='u', password='p')
+        self.baby = make_baby(self.user)
+
+    def test_diaper_changes_during_sleep_flagged(self):
+        now = datetime.now(pytz.UTC).replace(microsecond=0)
+        for i in range(4):
+            start = now - timedelta(hours=10 * (i + 1))
+            Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=2))
+            if i < 2:
+                dc = DiaperChange.objects.create(baby=self.baby, diaper_type='wet')
+                DiaperChange.objects.filter(id=dc.id).update(time=start + timedelta(hours=1))
+        # An ongoing session never counts as disrupted
+        Sleep.objects.create(baby=self.baby, start_time=now - timedelta(minutes=30), end_time=None)
+
+        ai = AIInsights(self.baby)
+        result = ai._find_cross_activity_correlations(has_diaper=True, has_sleep=True)
+        self.assertEqual(result[0]['type'], 'diaper_sleep_disruption')
+        self.assertEqual(result[0]['details']['disruption_rate'], 40.0)
@@ -0,0 +1,148 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.ai_insights import AIInsights
+from tracker.cache import get_data_version
+from tracker.models import Anomaly, Baby, Feeding, Sleep, SleepStatistics
+from datetime import date, datetime, timedelta
+import pytz
+
+
+class AnomalyFlaggingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date=date(2023, 1, 1), gender='Male', user=self.user)
+        self.start = datetime(2024, 3, 4, 6, 0, tzinfo=pytz.UTC)
+
+    def _feed(self, hours, quantity=120):
+        return Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=quantity,
+                                      time=self.start + timedelta(hours=hours))
+
+    def _sleep(self, day, hours):
+        start = self.start + timedelta(days=day)
+        return Sleep.objects.create(baby=self.baby, start_time=start,
+                                    end_time=start + timedelta(hours=hours) if hours else None)
+
+    def _flagged(self):
+        return sorted(Anomaly.objects.filter(baby=self.baby).values_list('kind', 'feeding_id', 'sleep_id'))
+
+    def test_quantity_flagged_on_write_and_cleared_on_edit(self):
+        for i in range(9):
+            self._feed(i * 3, 120 + i % 2)
+        feeding = self._feed(27, 400)
+        anomaly = Anomaly.objects.get(feeding=feeding)
+        self.assertEqual((anomaly.kind, anomaly.value, anomaly.time), ('feeding_quantity', 400, feeding.time))
+        self.assertGreater(anomaly.zscore, 2.5)
+
+        feeding.quantity = 121
+        feeding.save()
+        self.assertEqual(self._flagged(), [])
+
+    def test_long_gap_flagged_and_rescored_with_neighbours(self):
+        for i in range(8):
+            self._feed(i * 3)
+        late = self._feed(21 + 30)
+        self.assertEqual(self._flagged(), [('feeding_interval', late.id, None)])
+        self.assertEqual(Anomaly.objects.get(feeding=late).value, 30)
+
+        # A feeding recorded later inside the gap splits it
+        self._feed(21 + 15)
+        self.assertEqual(self._flagged(), [])
+
+    def test_no_flags_while_history_is_short(self):
+        self._feed(0, 120)
+        self._feed(3, 120)
+        self._feed(30, 1000)
+        self.assertEqual(self._flagged(), [])
+
+    def test_sleep_flagged_when_it_ends(self):
+        for day in range(8):
+            self._sleep(day, 2 + day % 2 * 0.5)
+        sleep = self._sleep(8, None)
+        self.assertEqual(self._flagged(), [])
+        sleep.end_time = sleep.start_time + timedelta(hours=12)
+        sleep.save()
+        self.assertEqual(self._flagged(), [('sleep_duration', None, sleep.id)])
+
+        sleep.end_time = None
+        sleep.save()
+        self.assertEqual(self._flagged(), [])
+
+    def test_flagged_sleep_reopened_on_another_baby(self):
+        other = Baby.objects.create(name='Baby Two', birth_date=date(2023, 1, 1), gender='Female', user=self.user)
+        for day in range(8):
+            self._sleep(day, 2 + day % 2 * 0.5)
+        sleep = self._sleep(8, 12)
+        self.assertEqual(self._flagged(), [('sleep_duration', None, sleep.id)])
+
+        # The other baby has no sleep statistics yet
+        sleep.baby = other
+        sleep.end_time = None
+        sleep.save()
+        self.assertFalse(Anomaly.objects.exists())
+        self.assertEqual(SleepStatistics.objects.get(baby=self.baby).duration_count, 8)
+        self.assertFalse(SleepStatistics.objects.filter(baby=other).exists())
+
+    def test_bulk_create_flags(self):
+        for i in range(9):
+            self._feed(i * 3, 120 + i % 2)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        items = [{'baby': self.baby.id, 'feeding_type': 'bottle', 'quantity': quantity,
+                  'time': (self.start + timedelta(hours=hours)).isoformat()}
+                 for hours, quantity in ((27, 120), (30, 500))]
+        response = client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._flagged(), [('feeding_quantity', response.data['ids'][1], None)])
+
+    def test_replay_matches_writes_in_time_order(self):
+        rng = random.Random(4)
+        hours = 0
+        for _ in range(60):
+            hours += rng.choice([2, 3, 3, 4, 12])
+            self._feed(hours, rng.choice([90, 120, 120, 150, 400]))
+        for day in range(30):
+            self._sleep(day, rng.choice([1, 1.5, 2, 10]))
+        written = list(Anomaly.objects.filter(baby=self.baby).order_by('kind', 'time')
+                       .values_list('kind', 'feeding_id', 'sleep_id', 'zscore'))
+        self.assertTrue(written)
+
+        version = get_data_version(self.baby.id)
+        out = StringIO()
+        call_command('rebuild_anomalies', '--baby', str(self.baby.id), stdout=out)
+        self.assertIn(f'Rebuilt {len(written)} anomalies', out.getvalue())
+        self.assertNotEqual(get_data_version(self.baby.id), version)
+        replayed = list(Anomaly.objects.filter(baby=self.baby).order_by('kind', 'time')
+                        .values_list('kind', 'feeding_id', 'sleep_id', 'zscore'))
+        self.assertEqual([row[:3] for row in written], [row[:3] for row in replayed])
+        for before, after in zip(written, replayed):
+            self.assertAlmostEqual(before[3], after[3], places=9)
+
+    def test_insights_read_flagged_anomalies(self):
+        for i in range(9):
+            self._feed(i * 3, 120 + i % 2)
+        self._feed(27, 400)
+        types = [anomaly['type'] for anomaly in AIInsights(self.baby).get_feeding_insights()['anomalies']]
+        self.assertEqual(types, ['unusual_feeding_quantity'])
+        # Outside the window
+        types = [anomaly['type'] for anomaly in AIInsights(
+            self.baby, until=self.start + timedelta(hours=25)).get_feeding_insights()['anomalies']]
+        self.assertEqual(types, [])
+
+        # Nothing is rescored when the insights are read
+        Anomaly.objects.all().delete()
+        self.assertEqual(AIInsights(self.baby).get_feeding_insights()['anomalies'], [])
+
+    def test_interval_anomaly_details(self):
+        for i in range(8):
+            self._feed(i * 3)
+        self._feed(21 + 30)
+        anomaly = AIInsights(self.baby).get_feeding_insights()['anomalies'][0]
+        self.assertEqual(anomaly['type'], 'unusual_feeding_interval')
+        self.assertEqual(anomaly['details']['instances'], 1)
+        self.assertEqual(anomaly['details']['example'], '2024-03-05 03:00:00+00:00 to 2024-03-06 09:00:00+00:00')
@@ -53,14 +53,14 @@ class BabyAPITestCase(TestCase):
         # Test authenticated user can list their babies
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Baby One')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Baby One')
         
         # Test second user can list their babies
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Baby Two')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Baby Two')
         
         # Test unauthenticated user cannot list babies
         response = self.unauthenticated_client.get(url)
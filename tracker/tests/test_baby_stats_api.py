@@ -42,8 +42,7 @@ class BabyStatsAPITestCase(TestCase):
     def test_stats_counts_feedings_today(self):
         now = datetime.now(pytz.UTC)
         for _ in range(2):
-            f = Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120)
-            Feeding.objects.filter(id=f.id).update(time=now)
+            Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120, time=now)
 
         response = self.client1.get(self._stats_url(self.baby1.id))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -51,8 +50,7 @@ class BabyStatsAPITestCase(TestCase):
 
     def test_stats_does_not_count_old_feedings(self):
         now = datetime.now(pytz.UTC)
-        f = Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120)
-        Feeding.objects.filter(id=f.id).update(time=now - timedelta(days=2))
+        Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120, time=now - timedelta(days=2))
 
         response = self.client1.get(self._stats_url(self.baby1.id))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -96,6 +94,33 @@ class BabyStatsAPITestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['total_sleep_hours'], 0)
 
+    def test_stats_average_feeding_interval(self):
+        now = datetime.now(pytz.UTC)
+        for hours_ago in (0, 2, 6, 9):
+            Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120,
+                                   time=now - timedelta(hours=hours_ago))
+
+        response = self.client1.get(self._stats_url(self.baby1.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['avg_feeding_interval'], 3.0)
+
+    def test_stats_average_feeding_interval_needs_two_feedings(self):
+        Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120)
+        response = self.client1.get(self._stats_url(self.baby1.id))
+        self.assertIsNone(response.data['avg_feeding_interval'])
+
+    def test_stats_query_count_independent_of_history(self):
+        now = datetime.now(pytz.UTC)
+        for i in range(30):
+            Feeding.objects.create(baby=self.baby1, feeding_type='bottle', quantity=120, time=now - timedelta(hours=i * 3))
+            Sleep.objects.create(baby=self.baby1, start_time=now - timedelta(hours=i * 5 + 2),
+                                 end_time=now - timedelta(hours=i * 5))
+
+        # Baby lookup, rollup totals, first/last feeding span
+        with self.assertNumQueries(3):
+            response = self.client1.get(self._stats_url(self.baby1.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_stats_baby_not_found(self):
         response = self.client1.get(self._stats_url(99999))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
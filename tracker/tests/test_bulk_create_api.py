@@ -0,0 +1,98 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, DiaperChange, Sleep
+from tracker.cache import get_data_version
+from tracker.base_views import BabyOwnedBulkCreateView
+
+
+class BulkCreateTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.other_user = User.objects.create_user(username='testuser2', password='testpassword2')
+        self.baby1 = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.baby2 = Baby.objects.create(name='Baby Two', birth_date='2023-01-01', gender='Female', user=self.user)
+        self.other_baby = Baby.objects.create(name='Other', birth_date='2023-01-01', gender='Male', user=self.other_user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _feeding(self, baby, hour=8, **overrides):
+        item = {'baby': baby.id, 'feeding_type': 'bottle', 'quantity': 120, 'time': f'2024-03-10T{hour:02d}:00:00Z'}
+        item.update(overrides)
+        return item
+
+    def test_bulk_create_feedings(self):
+        items = [self._feeding(self.baby1, hour) for hour in range(10)] + [self._feeding(self.baby2)]
+        response = self.client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['ids']), 11)
+        self.assertEqual(Feeding.objects.filter(baby=self.baby1).count(), 10)
+        # Ids come back in request order, and offline clients keep the time the event happened
+        feeding = Feeding.objects.get(id=response.data['ids'][3])
+        self.assertEqual(feeding.time.isoformat(), '2024-03-10T03:00:00+00:00')
+        self.assertEqual(Feeding.objects.get(id=response.data['ids'][10]).baby, self.baby2)
+
+    def test_query_count_is_constant(self):
+        items = [self._feeding(self.baby1, hour % 24) for hour in range(200)]
+        # Baby lookup, savepoint, insert, one rollup upsert for the batch's
+        # single day and one heatmap upsert for its week, the quantities'
+        # running moments (an update, then savepoint/insert/release for the
+        # new row), three probes for the feeding intervals and an update
+        # folding them in, one insert for the feedings flagged as anomalies,
+        # savepoint release
+        with self.assertNumQueries(15):
+            response = self.client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        items = [
+            self._feeding(self.baby1),
+            self._feeding(self.baby1, feeding_type='juice'),
+            self._feeding(self.baby1, quantity='lots'),
+        ]
+        response = self.client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertIn('feeding_type', response.data[1])
+        self.assertIn('quantity', response.data[2])
+        self.assertFalse(Feeding.objects.exists())
+
+    def test_other_users_baby_rejected(self):
+        items = [self._feeding(self.baby1), self._feeding(self.other_baby)]
+        response = self.client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('baby', response.data[1])
+        self.assertFalse(Feeding.objects.exists())
+
+    def test_requires_a_list(self):
+        response = self.client.post(reverse('feeding-bulk'), self._feeding(self.baby1), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_size_is_limited(self):
+        items = [self._feeding(self.baby1)] * (BabyOwnedBulkCreateView.max_batch_size + 1)
+        response = self.client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Feeding.objects.exists())
+
+    def test_bulk_create_diaper_changes_and_sleep(self):
+        response = self.client.post(reverse('diaper-change-bulk'), [
+            {'baby': self.baby1.id, 'diaper_type': 'wet', 'time': '2024-03-10T08:00:00Z'},
+            {'baby': self.baby1.id, 'diaper_type': 'dirty'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DiaperChange.objects.filter(baby=self.baby1).count(), 2)
+
+        response = self.client.post(reverse('sleep-bulk'), [
+            {'baby': self.baby1.id, 'start_time': '2024-03-10T20:00:00Z', 'end_time': '2024-03-11T06:00:00Z'},
+            {'baby': self.baby2.id, 'start_time': '2024-03-10T13:00:00Z'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Sleep.objects.count(), 2)
+
+    def test_bulk_create_invalidates_insights(self):
+        version = get_data_version(self.baby1.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('feeding-bulk'), [self._feeding(self.baby1)], format='json')
+        self.assertNotEqual(get_data_version(self.baby1.id), version)
@@ -0,0 +1,172 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.cache import get_data_version
+from tracker.models import Baby, Feeding, Sleep, DiaperChange, DailyActivitySummary
+from tracker.rollups import SUMMARY_FIELDS
+from tracker.sleep_split import sleep_minutes_by_day
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+import numpy as np
+import pytz
+
+
+class DailyActivitySummaryTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.day = datetime(2024, 3, 10, 12, 0, tzinfo=pytz.UTC)
+
+    def _summary(self, day=date(2024, 3, 10), baby=None):
+        row = DailyActivitySummary.objects.filter(baby=baby or self.baby, date=day).values(*SUMMARY_FIELDS).first()
+        return row or dict.fromkeys(SUMMARY_FIELDS, 0)
+
+    def _snapshot(self):
+        return {
+            row.pop('date'): row
+            for row in DailyActivitySummary.objects.filter(baby=self.baby).values('date', *SUMMARY_FIELDS)
+            if any(row[field] for field in SUMMARY_FIELDS)
+        }
+
+    def test_feeding_create_update_and_delete(self):
+        feeding = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.day)
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90, time=self.day)
+        self.assertEqual(self._summary()['feed_count'], 2)
+        self.assertEqual(self._summary()['total_quantity'], 210)
+
+        feeding.quantity = 150
+        feeding.save()
+        self.assertEqual(self._summary()['total_quantity'], 240)
+
+        feeding.time = self.day + timedelta(days=1)
+        feeding.save()
+        self.assertEqual(self._summary()['feed_count'], 1)
+        self.assertEqual(self._summary(date(2024, 3, 11))['feed_count'], 1)
+
+        feeding.delete()
+        self.assertEqual(self._summary(date(2024, 3, 11))['feed_count'], 0)
+        self.assertEqual(self._summary()['total_quantity'], 90)
+
+    def test_unchanged_save_does_not_touch_summaries(self):
+        feeding = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.day)
+        # Only the old-row lookup and the feeding update itself
+        with self.assertNumQueries(2):
+            feeding.last_side = 'left_feeding'
+            feeding.save()
+
+    def test_diaper_type_change_moves_count(self):
+        diaper = DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=self.day)
+        diaper.diaper_type = 'mixed'
+        diaper.save()
+        summary = self._summary()
+        self.assertEqual((summary['wet_count'], summary['mixed_count']), (0, 1))
+
+    def test_sleep_minutes_counted_once_completed(self):
+        sleep = Sleep.objects.create(baby=self.baby, start_time=self.day)
+        self.assertEqual((self._summary()['sleep_count'], self._summary()['sleep_minutes']), (1, 0))
+        sleep.end_time = self.day + timedelta(minutes=90)
+        sleep.save()
+        self.assertEqual((self._summary()['sleep_count'], self._summary()['sleep_minutes']), (1, 90))
+
+    def test_overnight_sleep_split_at_midnight(self):
+        sleep = Sleep.objects.create(baby=self.baby, start_time=datetime(2024, 3, 10, 22, 0, tzinfo=pytz.UTC),
+                                     end_time=datetime(2024, 3, 11, 8, 0, tzinfo=pytz.UTC))
+        self.assertEqual((self._summary()['sleep_count'], self._summary()['sleep_minutes']), (1, 120))
+        next_day = self._summary(date(2024, 3, 11))
+        self.assertEqual((next_day['sleep_count'], next_day['sleep_minutes']), (0, 480))
+
+        sleep.end_time = datetime(2024, 3, 11, 0, 0, tzinfo=pytz.UTC)
+        sleep.save()
+        self.assertEqual(self._summary()['sleep_minutes'], 120)
+        self.assertEqual(self._summary(date(2024, 3, 11))['sleep_minutes'], 0)
+
+    def test_split_follows_local_midnight_across_dst(self):
+        tz = ZoneInfo('America/New_York')
+        # Clocks spring forward on 2024-03-10, so that local day is 23 hours long
+        starts = np.array(['2024-03-10T03:00', '2024-03-09T12:00'], dtype='datetime64[us]')
+        ends = np.array(['2024-03-11T06:00', 'NaT'], dtype='datetime64[us]')
+        self.assertEqual(sleep_minutes_by_day(starts, ends, tz), {
+            date(2024, 3, 9): 120.0,
+            date(2024, 3, 10): 23 * 60.0,
+            date(2024, 3, 11): 120.0,
+        })
+
+    def test_days_follow_the_baby_time_zone(self):
+        baby = Baby.objects.create(name='NY', birth_date='2023-01-01', gender='Male', user=self.user,
+                                   timezone='America/New_York')
+        # 03:00 UTC is still the previous evening in New York
+        Feeding.objects.create(baby=baby, feeding_type='bottle', quantity=120,
+                               time=datetime(2024, 3, 10, 3, 0, tzinfo=pytz.UTC))
+        self.assertEqual(self._summary(date(2024, 3, 9), baby=baby)['feed_count'], 1)
+
+    def test_time_zone_change_rebuilds(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120,
+                               time=datetime(2024, 3, 10, 3, 0, tzinfo=pytz.UTC))
+        self.baby.timezone = 'America/New_York'
+        self.baby.save()
+        self.assertEqual(self._summary(date(2024, 3, 9))['feed_count'], 1)
+        self.assertEqual(self._summary(date(2024, 3, 10))['feed_count'], 0)
+
+    def test_bulk_create_updates_summaries(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        items = [{'baby': self.baby.id, 'diaper_type': 'wet', 'time': '2024-03-10T08:00:00Z'}] * 3
+        response = client.post(reverse('diaper-change-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._summary()['wet_count'], 3)
+
+    def test_deleting_baby_and_user_cascades_cleanly(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.day)
+        Sleep.objects.create(baby=self.baby, start_time=self.day, end_time=self.day + timedelta(hours=1))
+        self.baby.delete()
+        self.assertFalse(DailyActivitySummary.objects.exists())
+
+        baby = Baby.objects.create(name='Baby Two', birth_date='2023-01-01', gender='Male', user=self.user)
+        DiaperChange.objects.create(baby=baby, diaper_type='wet', time=self.day)
+        self.user.delete()
+        self.assertFalse(DailyActivitySummary.objects.exists())
+
+    def test_incremental_state_matches_rebuild(self):
+        rng = random.Random(7)
+        feedings, sleeps, diapers = [], [], []
+        for _ in range(60):
+            moment = self.day - timedelta(minutes=rng.randrange(0, 60 * 24 * 10))
+            feedings.append(Feeding.objects.create(
+                baby=self.baby, feeding_type='bottle', quantity=rng.choice([60, 90.5, 120]), time=moment))
+            diapers.append(DiaperChange.objects.create(
+                baby=self.baby, diaper_type=rng.choice(['wet', 'dirty', 'mixed']), time=moment))
+            end = moment + timedelta(minutes=rng.randrange(20, 600)) if rng.random() < 0.8 else None
+            sleeps.append(Sleep.objects.create(baby=self.baby, start_time=moment, end_time=end))
+        for feeding in rng.sample(feedings, 10):
+            feeding.time -= timedelta(hours=rng.randrange(1, 48))
+            feeding.save()
+        for sleep in rng.sample(sleeps, 10):
+            sleep.delete()
+        for diaper in rng.sample(diapers, 10):
+            diaper.diaper_type = 'wet'
+            diaper.save()
+
+        incremental = self._snapshot()
+        version = get_data_version(self.baby.id)
+        out = StringIO()
+        call_command('rebuild_daily_summaries', '--baby', str(self.baby.id), stdout=out)
+        self.assertIn('Rebuilt', out.getvalue())
+        rebuilt = self._snapshot()
+        # Insights cached before the rebuild are not served again
+        self.assertNotEqual(get_data_version(self.baby.id), version)
+
+        self.assertEqual(incremental.keys(), rebuilt.keys())
+        for day, row in rebuilt.items():
+            for field in SUMMARY_FIELDS:
+                self.assertAlmostEqual(incremental[day][field], row[field], places=6, msg=(day, field))
+
+    def test_invalid_time_zone_rejected(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.patch(reverse('baby-detail', kwargs={'pk': self.baby.id}), {'timezone': 'Mars/Olympus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -64,16 +64,16 @@ class DiaperChangeAPITestCase(TestCase):
         # Test authenticated user can list their diaper changes
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
-        self.assertEqual(response.data[0]['diaper_type'], 'wet')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
+        self.assertEqual(response.data['results'][0]['diaper_type'], 'wet')
         
         # Test second user can list their diaper changes
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertEqual(response.data[0]['diaper_type'], 'dirty')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertEqual(response.data['results'][0]['diaper_type'], 'dirty')
         
         # Test unauthenticated user cannot list diaper changes
         response = self.unauthenticated_client.get(url)
@@ -79,18 +79,18 @@ class DoctorAppointmentAPITestCase(TestCase):
         # Test authenticated user can list their doctor appointments
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
-        self.assertEqual(response.data[0]['doctor_name'], 'Dr. Smith')
-        self.assertEqual(response.data[0]['location'], 'Pediatric Clinic')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
+        self.assertEqual(response.data['results'][0]['doctor_name'], 'Dr. Smith')
+        self.assertEqual(response.data['results'][0]['location'], 'Pediatric Clinic')
         
         # Test second user can list their doctor appointments
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertEqual(response.data[0]['doctor_name'], 'Dr. Johnson')
-        self.assertEqual(response.data[0]['location'], 'Family Health Center')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertEqual(response.data['results'][0]['doctor_name'], 'Dr. Johnson')
+        self.assertEqual(response.data['results'][0]['location'], 'Family Health Center')
         
         # Test unauthenticated user cannot list doctor appointments
         response = self.unauthenticated_client.get(url)
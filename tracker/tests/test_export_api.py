@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, DiaperChange, Sleep, GrowthMeasurement
+from tracker import export
+from datetime import datetime, timedelta
+import pytz
+
+
+class BabyExportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.other_user = User.objects.create_user(username='testuser2', password='testpassword2')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.other_baby = Baby.objects.create(name='Other', birth_date='2023-01-01', gender='Male', user=self.other_user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        start = datetime(2024, 3, 10, 8, 0, tzinfo=pytz.UTC)
+        for i in range(3):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=100 + i, time=start + timedelta(hours=i))
+        DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=start)
+        Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=2))
+        GrowthMeasurement.objects.create(baby=self.baby, date='2024-03-01', height=60, weight=5)
+        Feeding.objects.create(baby=self.other_baby, feeding_type='bottle', quantity=90)
+
+    def _url(self, fmt=None, baby=None):
+        url = reverse('baby-export', kwargs={'baby_id': (baby or self.baby).id})
+        return url + (f'?format={fmt}' if fmt else '')
+
+    def _content(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        response = self.client.get(self._url('ndjson'))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        self.assertIn('attachment', response['Content-Disposition'])
+        rows = [json.loads(line) for line in self._content(response).splitlines()]
+
+        self.assertEqual([r['type'] for r in rows].count('feeding'), 3)
+        self.assertEqual([r['quantity'] for r in rows if r['type'] == 'feeding'], [100, 101, 102])
+        self.assertEqual({r['type'] for r in rows}, {'feeding', 'diaper_change', 'sleep', 'growth_measurement'})
+        feeding = rows[0]
+        self.assertEqual(feeding['time'], '2024-03-10T08:00:00Z')
+        self.assertNotIn('baby_id', feeding)
+
+    def test_ndjson_is_the_default(self):
+        response = self.client.get(self._url())
+        self.assertEqual(len(self._content(response).splitlines()), 6)
+
+    def test_csv_export(self):
+        response = self.client.get(self._url('csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(self._content(response))))
+
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['type'], 'feeding')
+        self.assertEqual(rows[0]['time'], '2024-03-10T08:00:00Z')
+        sleep = next(r for r in rows if r['type'] == 'sleep')
+        self.assertEqual(sleep['end_time'], '2024-03-10T10:00:00Z')
+        self.assertEqual(sleep['quantity'], '')
+
+    def test_rows_are_read_in_chunks(self):
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 2):
+            with mock.patch('django.db.models.query.QuerySet.iterator', autospec=True,
+                            side_effect=lambda qs, chunk_size=None: iter(list(qs))) as iterator:
+                self._content(self.client.get(self._url('ndjson')))
+        self.assertEqual(iterator.call_count, len(export.EXPORT_MODELS))
+        self.assertTrue(all(call.kwargs['chunk_size'] == 2 for call in iterator.call_args_list))
+
+    def test_other_users_baby_not_found(self):
+        response = self.client.get(self._url('ndjson', baby=self.other_baby))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_unknown_format_rejected(self):
+        response = self.client.get(self._url('xml'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -67,16 +67,16 @@ class FeedingAPITestCase(TestCase):
         # Test authenticated user can list their feedings
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
-        self.assertEqual(response.data[0]['feeding_type'], 'breastfeeding')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
+        self.assertEqual(response.data['results'][0]['feeding_type'], 'breastfeeding')
         
         # Test second user can list their feedings
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertEqual(response.data[0]['feeding_type'], 'bottle')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertEqual(response.data['results'][0]['feeding_type'], 'bottle')
         
         # Test unauthenticated user cannot list feedings
         response = self.unauthenticated_client.get(url)
@@ -70,18 +70,18 @@ class GrowthMilestoneAPITestCase(TestCase):
         # Test authenticated user can list their growth measurements
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
-        self.assertEqual(float(response.data[0]['height']), 60.5)
-        self.assertEqual(float(response.data[0]['weight']), 5.2)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
+        self.assertEqual(float(response.data['results'][0]['height']), 60.5)
+        self.assertEqual(float(response.data['results'][0]['weight']), 5.2)
         
         # Test second user can list their growth measurements
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertEqual(float(response.data[0]['height']), 62.0)
-        self.assertEqual(float(response.data[0]['weight']), 6.1)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertEqual(float(response.data['results'][0]['height']), 62.0)
+        self.assertEqual(float(response.data['results'][0]['weight']), 6.1)
         
         # Test unauthenticated user cannot list growth measurements
         response = self.unauthenticated_client.get(url)
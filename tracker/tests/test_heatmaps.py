@@ -0,0 +1,171 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.cache import get_data_version
+from tracker.heatmaps import stored_weekday_hours, window_weekday_hours
+from tracker.histograms import weekday_hour_counts
+from tracker.models import ActivityHeatmap, Baby, Feeding, Sleep, DiaperChange
+from datetime import date, datetime, timedelta
+import pytz
+
+
+class ActivityHeatmapTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date=date(2023, 1, 1), gender='Male', user=self.user,
+                                        timezone='Asia/Tokyo')
+        # Monday 2024-03-04 22:00 UTC is Tuesday 07:00 in Tokyo
+        self.monday = datetime(2024, 3, 4, 22, 0, tzinfo=pytz.UTC)
+
+    def _cells(self, event_type, baby=None):
+        counts = stored_weekday_hours(baby or self.baby, event_type)
+        return {(weekday, hour): count
+                for weekday, row in enumerate(counts) for hour, count in enumerate(row) if count}
+
+    def _heatmaps(self):
+        rows = ActivityHeatmap.objects.filter(baby=self.baby).values_list('event_type', 'week', 'counts')
+        # Weeks whose events all moved away keep a row of zeros
+        return {(event_type, week): counts for event_type, week, counts in rows if any(counts)}
+
+    def test_create_update_and_delete(self):
+        feeding = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.monday)
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90, time=self.monday)
+        self.assertEqual(self._cells('feeding'), {(1, 7): 2})
+
+        feeding.time = self.monday + timedelta(days=1, hours=2)
+        feeding.save()
+        self.assertEqual(self._cells('feeding'), {(1, 7): 1, (2, 9): 1})
+
+        feeding.delete()
+        self.assertEqual(self._cells('feeding'), {(1, 7): 1})
+
+    def test_sleep_counts_at_its_start(self):
+        sleep = Sleep.objects.create(baby=self.baby, start_time=self.monday)
+        # Ending the session does not move it: the old-row lookup, the sleep
+        # update, the running duration moments (an update, then savepoint/
+        # insert/release for the new row) and the rollup's minutes, but no
+        # heatmap update
+        with self.assertNumQueries(7):
+            sleep.end_time = self.monday + timedelta(hours=3)
+            sleep.save()
+        self.assertEqual(self._cells('sleep'), {(1, 7): 1})
+
+    def test_move_to_another_baby(self):
+        other = Baby.objects.create(name='Baby Two', birth_date=date(2023, 1, 1), gender='Female', user=self.user)
+        diaper = DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=self.monday)
+        diaper.baby = other
+        diaper.save()
+        self.assertEqual(self._cells('diaper_change'), {})
+        # The other baby counts in UTC
+        self.assertEqual(self._cells('diaper_change', baby=other), {(0, 22): 1})
+
+    def test_time_zone_change_rebuilds(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.monday)
+        self.baby.timezone = 'America/New_York'
+        self.baby.save()
+        self.assertEqual(self._cells('feeding'), {(0, 17): 1})
+
+    def test_bulk_create_updates_heatmap(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        items = [{'baby': self.baby.id, 'diaper_type': 'wet', 'time': '2024-03-04T22:30:00Z'}] * 3
+        response = client.post(reverse('diaper-change-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._cells('diaper_change'), {(1, 7): 3})
+
+    def test_deleting_baby_cascades_cleanly(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.monday)
+        self.baby.delete()
+        self.assertFalse(ActivityHeatmap.objects.exists())
+
+    def test_incremental_state_matches_rebuild(self):
+        rng = random.Random(11)
+        feedings, sleeps, diapers = [], [], []
+        for _ in range(60):
+            moment = self.monday + timedelta(minutes=rng.randrange(0, 60 * 24 * 21))
+            feedings.append(Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90, time=moment))
+            diapers.append(DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=moment))
+            sleeps.append(Sleep.objects.create(baby=self.baby, start_time=moment))
+        for feeding in rng.sample(feedings, 10):
+            feeding.time -= timedelta(hours=rng.randrange(1, 48))
+            feeding.save()
+        for sleep in rng.sample(sleeps, 10):
+            sleep.delete()
+        for diaper in rng.sample(diapers, 10):
+            diaper.time += timedelta(minutes=rng.randrange(1, 600))
+            diaper.save()
+
+        incremental = self._heatmaps()
+        version = get_data_version(self.baby.id)
+        out = StringIO()
+        call_command('rebuild_activity_heatmaps', '--baby', str(self.baby.id), stdout=out)
+        self.assertIn('Rebuilt heatmaps from 170 events', out.getvalue())
+        self.assertEqual(incremental, self._heatmaps())
+        self.assertNotEqual(get_data_version(self.baby.id), version)
+
+    def _window(self, since=None, until=None):
+        events = Feeding.objects.filter(baby=self.baby)
+        if since is not None:
+            events = events.filter(time__gte=since)
+        if until is not None:
+            events = events.filter(time__lt=until)
+        return weekday_hour_counts(events, 'time', self.baby.tzinfo)
+
+    def test_weeks_are_local(self):
+        # Sunday 23:00 and Monday 00:00 in Tokyo fall in different weeks
+        sunday = self.monday + timedelta(days=5, hours=16)
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90, time=sunday)
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90, time=sunday + timedelta(hours=1))
+        self.assertEqual(sorted(self._heatmaps()), [('feeding', date(2024, 3, 4)), ('feeding', date(2024, 3, 11))])
+
+    def test_window_sums_full_weeks_and_counts_edges(self):
+        for hours in range(0, 24 * 28, 7):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90,
+                                   time=self.monday + timedelta(hours=hours))
+        since, until = self.monday + timedelta(days=3, hours=5), self.monday + timedelta(days=20)
+        # The stored weeks and the two partial weeks
+        with self.assertNumQueries(2):
+            counts = window_weekday_hours(self.baby, Feeding, since=since, until=until)
+        self.assertEqual(counts, self._window(since, until))
+        self.assertEqual(window_weekday_hours(self.baby, Feeding, since=since), self._window(since))
+        self.assertEqual(window_weekday_hours(self.baby, Feeding, until=until), self._window(until=until))
+        self.assertEqual(window_weekday_hours(self.baby, Feeding), self._window())
+        # A window inside one week is counted directly
+        with self.assertNumQueries(1):
+            counts = window_weekday_hours(self.baby, Feeding, since=since, until=since + timedelta(days=2))
+        self.assertEqual(counts, self._window(since, since + timedelta(days=2)))
+
+        # Moving a count between cells of a full week keeps the total, which
+        # shows the stored week answered
+        week = ActivityHeatmap.objects.get(baby=self.baby, event_type='feeding', week=date(2024, 3, 11))
+        cell = week.counts.index(1)
+        week.counts[cell], week.counts[0] = 0, week.counts[0] + 1
+        week.save()
+        counts = window_weekday_hours(self.baby, Feeding, since=since, until=until)
+        self.assertEqual(counts[0][0], self._window(since, until)[0][0] + 1)
+
+    def test_check_reports_stale_heatmaps(self):
+        for hours in range(0, 24 * 28, 7):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90,
+                                   time=self.monday + timedelta(hours=hours))
+        out = StringIO()
+        call_command('rebuild_activity_heatmaps', '--check', stdout=out)
+        self.assertIn('Checked 1 babies, 0 differ', out.getvalue())
+
+        # Events moved behind the signals' back
+        Feeding.objects.filter(baby=self.baby, time__gte=self.monday + timedelta(days=14)).update(time=self.monday)
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_activity_heatmaps', '--check', stdout=out)
+        self.assertIn(f'Baby {self.baby.id} feeding week of 2024-03-18', out.getvalue())
+        self.assertNotEqual(window_weekday_hours(self.baby, Feeding), self._window())
+
+        call_command('rebuild_activity_heatmaps', stdout=StringIO())
+        call_command('rebuild_activity_heatmaps', '--check', stdout=StringIO())
+        self.assertEqual(window_weekday_hours(self.baby, Feeding), self._window())
@@ -0,0 +1,56 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from tracker.ai_insights import AIInsights
+from tracker.histograms import hour_totals, weekday_hour_counts
+from tracker.models import Baby, Feeding, DiaperChange
+from datetime import date, datetime, timedelta
+import pytz
+
+
+class WeekdayHourCountsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date=date(2023, 1, 1), gender='Male', user=self.user,
+                                        timezone='Asia/Tokyo')
+        # Monday 2024-03-04 22:00 UTC is Tuesday 07:00 in Tokyo
+        self.monday = datetime(2024, 3, 4, 22, 0, tzinfo=pytz.UTC)
+
+    def test_counts_in_local_time_with_one_query(self):
+        for days, hours in ((0, 0), (0, 0), (7, 0), (5, 3), (6, 12)):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90,
+                                   time=self.monday + timedelta(days=days, hours=hours))
+        with self.assertNumQueries(1):
+            counts = weekday_hour_counts(Feeding.objects.filter(baby=self.baby), 'time', self.baby.tzinfo)
+        self.assertEqual(len(counts), 7)
+        self.assertEqual(counts[1][7], 3)  # Tuesdays 07:00
+        self.assertEqual(counts[6][10], 1)  # Sunday 10:00
+        self.assertEqual(counts[0][19], 1)  # Monday 19:00
+        self.assertEqual(sum(map(sum, counts)), 5)
+        self.assertEqual(hour_totals(counts), {7: 3, 10: 1, 19: 1})
+
+    def test_feeding_patterns_follow_local_time(self):
+        for days in range(6):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90,
+                                   time=self.monday + timedelta(days=days))
+        insights = AIInsights(self.baby).get_feeding_insights()
+        self.assertEqual(insights['basic_insights']['recommended_feeding_hours'], [7])
+        self.assertEqual(insights['pattern_insights']['weekday_patterns'], {1: [7], 2: [7], 3: [7], 4: [7]})
+        self.assertEqual(insights['pattern_insights']['weekend_patterns'], {5: [7], 6: [7]})
+        # The next feeding is predicted for the following Monday, which has none
+        self.assertIsNone(insights['predictions']['day_specific_pattern'])
+
+    def test_diaper_insights_from_aggregates(self):
+        for hours, diaper_type in ((0, 'wet'), (0, 'wet'), (2, 'dirty'), (2, 'wet'), (5, 'dirty'), (49, 'mixed')):
+            DiaperChange.objects.create(baby=self.baby, diaper_type=diaper_type,
+                                        time=self.monday + timedelta(hours=hours))
+        ai = AIInsights(self.baby)
+        # The stored weekly heatmap, counts and first and last change by
+        # type, and the daily rollup
+        with self.assertNumQueries(3):
+            insights = ai.get_diaper_insights()
+        self.assertNotIn('diaper_change_rows', vars(ai.data))
+        self.assertEqual(insights['basic_stats'], {'total_changes': 6, 'days_analyzed': 3, 'changes_per_day': 2.0})
+        self.assertEqual(insights['type_distribution'], {'wet': 3, 'dirty': 2, 'mixed': 1})
+        self.assertEqual(insights['time_patterns']['hour_distribution'], {7: 2, 8: 1, 9: 2, 12: 1})
+        # Ties go to the earlier hour
+        self.assertEqual(insights['time_patterns']['peak_hours'], [7, 9, 8])
@@ -0,0 +1,82 @@
+import json
+import random
+from django.test import TestCase
+from django.contrib.auth.models import User
+from rest_framework.utils.encoders import JSONEncoder
+from tracker.ai_insights import AIInsights, modes, value_counts
+from tracker.heatmaps import rebuild_activity_heatmaps
+from tracker.models import Baby, Feeding, DiaperChange
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytz
+
+
+class FeedingInsightArraysTestCase(TestCase):
+    """Feeding insights run on NumPy arrays; they must agree with the same figures computed by pandas."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+
+    def _baby(self, rng, rows, span_days):
+        baby = Baby.objects.create(name='Baby', birth_date=date(2024, 1, 1), gender='Female', user=self.user)
+        start = datetime(2024, 1, 1, tzinfo=pytz.UTC)
+        # A few repeated instants exercise tie ordering in sorts and counts
+        moments = [start + timedelta(microseconds=rng.randrange(span_days * 86_400_000_000)) for _ in range(rows)]
+        moments += rng.sample(moments, rows // 10)
+        Feeding.objects.bulk_create([
+            Feeding(baby=baby, time=moment, feeding_type=rng.choice(['bottle', 'breast', 'solid']),
+                    quantity=round(rng.uniform(30, 200), 1))
+            for moment in moments
+        ])
+        DiaperChange.objects.bulk_create([
+            DiaperChange(baby=baby, time=moment, diaper_type=rng.choice(['wet', 'dirty', 'mixed']))
+            for moment in moments
+        ])
+        # bulk_create skips the signals, so the windows read stored heatmaps
+        rebuild_activity_heatmaps(baby)
+        return baby
+
+    def test_matches_pandas(self):
+        rng = random.Random(11)
+        cases = [(5, 1), (12, 3), (40, 20), (300, 90), (900, 400)]
+        for rows, span_days in cases:
+            with self.subTest(rows=rows, span_days=span_days):
+                baby = self._baby(rng, rows, span_days)
+                insights = AIInsights(baby).get_feeding_insights()
+                df = pd.DataFrame(list(baby.feedings.values('time', 'feeding_type', 'quantity')))
+                intervals = np.diff(sorted(df['time'].tolist()))
+                self.assertEqual(
+                    insights['basic_insights']['average_feeding_interval'],
+                    round(intervals.mean() / timedelta(hours=1), 2),
+                )
+                self.assertEqual(
+                    insights['pattern_insights']['feeding_type_distribution'],
+                    df['feeding_type'].value_counts().to_dict(),
+                )
+                self.assertEqual(
+                    insights['quantity_insights']['average_quantity'], round(df['quantity'].mean(), 2)
+                )
+                self.assertEqual(
+                    insights['predictions']['next_predicted_feeding'],
+                    str(pd.Timestamp(df['time'].max()) + pd.Timedelta(seconds=np.diff(
+                        [moment.timestamp() for moment in sorted(df['time'])]).mean())),
+                )
+
+    def test_insights_fetch_no_diaper_rows(self):
+        baby = self._baby(random.Random(3), 20, 5)
+        ai = AIInsights(baby)
+        ai.get_feeding_insights()
+        ai.get_diaper_insights()
+        self.assertNotIn('diaper_change_rows', vars(ai.data))
+
+    def test_value_counts_matches_pandas_order(self):
+        rng = np.random.default_rng(5)
+        for _ in range(200):
+            values = rng.integers(0, 24, int(rng.integers(1, 300)))
+            expected = pd.Series(values).value_counts()
+            self.assertEqual(value_counts(values), (expected.index.tolist(), expected.tolist()))
+
+    def test_modes_of_empty_histogram(self):
+        self.assertEqual(modes(np.zeros(24, dtype=np.int64)), [])
+        self.assertEqual(modes(np.array([0, 2, 1, 2])), [1, 3])
@@ -0,0 +1,67 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from tracker.models import Baby, Feeding, GrowthMeasurement
+from tracker.cache import get_data_version, bump_data_version
+
+
+class InsightsCacheTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(5):
+                Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
+
+    def _url(self, name, insight_type):
+        return reverse(name, kwargs={'baby_id': self.baby.id}) + f'?type={insight_type}'
+
+    def test_repeat_request_served_from_cache(self):
+        first = self.client.get(self._url('baby-ai-insights', 'feeding'))
+        # Only the baby ownership lookup hits the database
+        with self.assertNumQueries(1):
+            second = self.client.get(self._url('baby-ai-insights', 'feeding'))
+        self.assertEqual(first.data, second.data)
+
+    def test_visualizations_are_cached(self):
+        self.client.get(self._url('baby-insights-visualizations', 'growth'))
+        with self.assertNumQueries(1):
+            response = self.client.get(self._url('baby-insights-visualizations', 'growth'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_save_invalidates_cached_insights(self):
+        url = self._url('baby-ai-insights', 'growth')
+        response = self.client.get(url)
+        self.assertIn('message', response.data['growth_insights'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            GrowthMeasurement.objects.create(baby=self.baby, date='2023-03-01', height=60, weight=5)
+            GrowthMeasurement.objects.create(baby=self.baby, date='2023-05-01', height=64, weight=6)
+
+        response = self.client.get(url)
+        self.assertIn('current_stats', response.data['growth_insights'])
+
+    def test_delete_invalidates_cached_insights(self):
+        url = self._url('baby-ai-insights', 'feeding')
+        response = self.client.get(url)
+        self.assertIn('basic_insights', response.data['feeding_insights'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Feeding.objects.filter(baby=self.baby).first().delete()
+
+        response = self.client.get(url)
+        self.assertIn('message', response.data['feeding_insights'])
+
+    def test_bump_changes_version(self):
+        version = get_data_version(self.baby.id)
+        self.assertEqual(get_data_version(self.baby.id), version)
+        self.assertNotEqual(bump_data_version(self.baby.id), version)
+
+    def test_version_is_per_baby(self):
+        other = Baby.objects.create(name='Baby Two', birth_date='2023-01-01', gender='Female', user=self.user)
+        version = get_data_version(other.id)
+        bump_data_version(self.baby.id)
+        self.assertEqual(get_data_version(other.id), version)
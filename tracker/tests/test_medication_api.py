@@ -57,16 +57,16 @@ class MedicationAPITestCase(TestCase):
         # Test authenticated user can list their medications
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Vitamin D')
-        self.assertEqual(response.data[0]['dosage'], '400 IU')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Vitamin D')
+        self.assertEqual(response.data['results'][0]['dosage'], '400 IU')
         
         # Test second user can list their medications
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], 'Iron Supplement')
-        self.assertEqual(response.data[0]['dosage'], '15 mg')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Iron Supplement')
+        self.assertEqual(response.data['results'][0]['dosage'], '15 mg')
         
         # Test unauthenticated user cannot list medications
         response = self.unauthenticated_client.get(url)
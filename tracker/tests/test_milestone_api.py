@@ -68,18 +68,18 @@ class DevelopmentalMilestoneAPITestCase(TestCase):
         # Test authenticated user can list their developmental milestones
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
-        self.assertEqual(response.data[0]['title'], 'First Smile')
-        self.assertEqual(response.data[0]['category'], 'social')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
+        self.assertEqual(response.data['results'][0]['title'], 'First Smile')
+        self.assertEqual(response.data['results'][0]['category'], 'social')
         
         # Test second user can list their developmental milestones
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertEqual(response.data[0]['title'], 'First Roll Over')
-        self.assertEqual(response.data[0]['category'], 'physical')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertEqual(response.data['results'][0]['title'], 'First Roll Over')
+        self.assertEqual(response.data['results'][0]['category'], 'physical')
         
         # Test unauthenticated user cannot list developmental milestones
         response = self.unauthenticated_client.get(url)
@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, Sleep
+from datetime import datetime, timedelta
+import pytz
+
+
+class CursorPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.now = datetime.now(pytz.UTC)
+
+    def _collect(self, url):
+        """Follow next links and return every result in order."""
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results.extend(response.data['results'])
+            url = response.data['next']
+        return results
+
+    def test_feedings_paginated_newest_first(self):
+        ids = []
+        for i in range(7):
+            f = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
+            Feeding.objects.filter(id=f.id).update(time=self.now - timedelta(hours=i))
+            ids.append(f.id)
+
+        response = self.client.get(reverse('feeding-list') + '?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['previous'])
+
+        results = self._collect(reverse('feeding-list') + '?page_size=3')
+        self.assertEqual([r['id'] for r in results], ids)
+
+    def test_pages_with_duplicate_timestamps(self):
+        for _ in range(5):
+            f = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120)
+            Feeding.objects.filter(id=f.id).update(time=self.now)
+
+        results = self._collect(reverse('feeding-list') + '?page_size=2')
+        self.assertEqual(len({r['id'] for r in results}), 5)
+
+    def test_sleep_paginated_on_start_time(self):
+        for i in range(4):
+            start = self.now - timedelta(hours=i * 3)
+            Sleep.objects.create(baby=self.baby, start_time=start, end_time=start + timedelta(hours=1))
+
+        results = self._collect(reverse('sleep-list') + '?page_size=3')
+        starts = [r['start_time'] for r in results]
+        self.assertEqual(starts, sorted(starts, reverse=True))
+        self.assertEqual(len(starts), 4)
+
+    def test_page_size_is_capped(self):
+        response = self.client.get(reverse('feeding-list') + '?page_size=100000')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('results', response.data)
+
+    def test_user_owned_list_paginated(self):
+        for i in range(3):
+            Baby.objects.create(name=f'Baby {i}', birth_date='2023-01-01', gender='Female', user=self.user)
+        results = self._collect(reverse('baby-list') + '?page_size=2')
+        self.assertEqual(len(results), 4)
@@ -73,18 +73,18 @@ class PumpingSessionAPITestCase(TestCase):
         # Test authenticated user can list their pumping sessions
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['user'], self.user1.id)
-        self.assertEqual(response.data[0]['quantity'], 120)
-        self.assertEqual(response.data[0]['side'], 'both_pump')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['user'], self.user1.id)
+        self.assertEqual(response.data['results'][0]['quantity'], 120)
+        self.assertEqual(response.data['results'][0]['side'], 'both_pump')
         
         # Test second user can list their pumping sessions
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['user'], self.user2.id)
-        self.assertEqual(response.data[0]['quantity'], 150)
-        self.assertEqual(response.data[0]['side'], 'right_pump')
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['user'], self.user2.id)
+        self.assertEqual(response.data['results'][0]['quantity'], 150)
+        self.assertEqual(response.data['results'][0]['side'], 'right_pump')
         
         # Test unauthenticated user cannot list pumping sessions
         response = self.unauthenticated_client.get(url)
@@ -73,16 +73,16 @@ class ReminderAPITestCase(TestCase):
         # Test authenticated user can list their reminders
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['message'], "Doctor's appointment")
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['message'], "Doctor's appointment")
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
         
         # Test second user can list their reminders
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['message'], "Vaccination")
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['message'], "Vaccination")
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
         
         # Test unauthenticated user cannot list reminders
         response = self.unauthenticated_client.get(url)
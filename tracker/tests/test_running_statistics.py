@@ -0,0 +1,234 @@
+import random
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.cache import get_data_version
+from tracker.running_statistics import (
+    add_feeding, batch_feeding_moments, batch_sleep_moments, moments_add, moments_match, moments_merge,
+    moments_std, stored_moments, zscore,
+)
+from tracker.models import Baby, Feeding, FeedingStatistics, Sleep, SleepStatistics
+from datetime import date, datetime, timedelta
+import numpy as np
+import pytz
+
+
+class MomentsTest(SimpleTestCase):
+    def test_add_matches_numpy(self):
+        rng = np.random.default_rng(3)
+        values = rng.normal(100, 20, 50)
+        moments = (0, 0.0, 0.0)
+        for value in values:
+            moments = moments_add(*moments, value)
+        self.assertEqual(moments[0], 50)
+        self.assertAlmostEqual(moments[1], values.mean(), places=9)
+        self.assertAlmostEqual(moments_std(*moments), values.std(), places=9)
+
+    def test_merge_matches_numpy(self):
+        rng = np.random.default_rng(7)
+        values = rng.normal(120, 30, 40)
+        moments = (0, 0.0, 0.0)
+        for value in values[:30]:
+            moments = moments_add(*moments, value)
+        kept = values[10:]
+        expected = (len(kept), kept.mean(), ((kept - kept.mean()) ** 2).sum())
+
+        added, removed = values[30:], values[:10]
+        merged = moments_merge(*moments, (len(added), added.mean(), ((added - added.mean()) ** 2).sum()),
+                               (len(removed), removed.mean(), ((removed - removed.mean()) ** 2).sum()))
+        self.assertEqual(merged[0], expected[0])
+        self.assertAlmostEqual(merged[1], expected[1], places=9)
+        self.assertAlmostEqual(merged[2], expected[2], places=6)
+        # Removing every value resets the moments
+        self.assertEqual(moments_merge(*moments, removed=(30, moments[1], moments[2])), (0, 0.0, 0.0))
+
+    def test_zscore(self):
+        moments = (0, 0.0, 0.0)
+        for value in (2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0):
+            moments = moments_add(*moments, value)
+        # Mean 5, standard deviation 2
+        self.assertAlmostEqual(zscore(11.0, *moments), 3.0)
+        self.assertIsNone(zscore(11.0, *moments_add(0, 0.0, 0.0, 4.0)))
+        self.assertIsNone(zscore(4.0, 2, 4.0, 0.0))
+
+
+class FeedingStatisticsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date=date(2023, 1, 1), gender='Male', user=self.user)
+        self.start = datetime(2024, 3, 4, 6, 0, tzinfo=pytz.UTC)
+
+    def _feed(self, hours, quantity=120, baby=None):
+        return Feeding.objects.create(baby=baby or self.baby, feeding_type='bottle', quantity=quantity,
+                                      time=self.start + timedelta(hours=hours))
+
+    def _stored(self, baby=None):
+        statistics = FeedingStatistics.objects.get(baby=baby or self.baby)
+        return {name: stored_moments(statistics, name) for name in ('interval', 'quantity')}
+
+    def assertMatchesBatch(self, baby=None):
+        stored, batch = self._stored(baby), batch_feeding_moments(baby or self.baby)
+        for name, moments in batch.items():
+            self.assertTrue(moments_match(stored[name], moments), (name, stored[name], moments))
+
+    def test_intervals_follow_time_order(self):
+        self._feed(0, 100)
+        self._feed(6, 140)
+        # Written out of order, between the two
+        feeding = self._feed(2, 120)
+        stored = self._stored()
+        self.assertEqual(stored['interval'][:2], (2, 3.0))
+        self.assertEqual(stored['quantity'][:2], (3, 120.0))
+
+        feeding.delete()
+        self.assertEqual(self._stored()['interval'], (1, 6.0, 0.0))
+
+    def test_move_quantity_change_and_ties(self):
+        feedings = [self._feed(hours) for hours in (0, 3, 3, 5, 9)]
+        feedings[1].time = self.start + timedelta(hours=7)
+        feedings[1].quantity = 60
+        feedings[1].save()
+        self.assertMatchesBatch()
+        feedings[3].quantity = 150
+        feedings[3].save()
+        self.assertMatchesBatch()
+        feedings[2].time = self.start
+        feedings[2].save()
+        self.assertMatchesBatch()
+
+    def test_row_locked_before_neighbours_are_read(self):
+        self._feed(0)
+        feeding = self._feed(6)
+        with CaptureQueriesContext(connection) as queries:
+            add_feeding(feeding)
+        statements = [query['sql'].lstrip('(').split()[0] for query in queries.captured_queries]
+        # Quantity update, one query for both neighbours, interval update
+        self.assertEqual(statements[-3:], ['UPDATE', 'SELECT', 'UPDATE'])
+        self.assertIn('tracker_feedingstatistics', queries.captured_queries[-3]['sql'])
+
+    def test_move_probes_both_places_in_one_query(self):
+        for hours in (0, 3, 6, 9):
+            self._feed(hours)
+        feeding = Feeding.objects.get(baby=self.baby, time=self.start + timedelta(hours=3))
+        feeding.time = self.start + timedelta(hours=7)
+        with CaptureQueriesContext(connection) as queries:
+            feeding.save()
+        statements = [query['sql'].lstrip('(').split()[0] for query in queries.captured_queries]
+        # After the stored row is read and the feeding updated: the row lock,
+        # the neighbours of the old and the new place, and one update
+        self.assertEqual(statements[:5], ['SELECT', 'UPDATE', 'SELECT', 'SELECT', 'UPDATE'])
+        self.assertIn('FOR UPDATE', queries.captured_queries[2]['sql'])
+        self.assertMatchesBatch()
+
+    def test_unchanged_save_skips_statistics(self):
+        feeding = self._feed(0)
+        with self.assertNumQueries(2):
+            feeding.feeding_type = 'breastfeeding'
+            feeding.save()
+
+    def test_move_to_another_baby(self):
+        other = Baby.objects.create(name='Baby Two', birth_date=date(2023, 1, 1), gender='Female', user=self.user)
+        self._feed(0)
+        self._feed(4, baby=other)
+        feeding = self._feed(2)
+        feeding.baby = other
+        feeding.save()
+        self.assertEqual(self._stored()['interval'][0], 0)
+        self.assertEqual(self._stored(other)['interval'][:2], (1, 2.0))
+
+    def test_bulk_create_interleaves_with_history(self):
+        for hours in (0, 10, 20):
+            self._feed(hours)
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        items = [{'baby': self.baby.id, 'feeding_type': 'bottle', 'quantity': 60 + hours,
+                  'time': (self.start + timedelta(hours=hours)).isoformat()} for hours in (25, 5, 15, 10)]
+        response = client.post(reverse('feeding-bulk'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._stored()['interval'][0], 6)
+        self.assertMatchesBatch()
+
+    def test_random_writes_match_batch_and_verify(self):
+        rng = random.Random(5)
+        feedings = [self._feed(rng.uniform(0, 24 * 30), rng.choice([60, 90.5, 120, 180])) for _ in range(80)]
+        for feeding in rng.sample(feedings, 20):
+            feeding.time += timedelta(minutes=rng.randrange(-600, 600))
+            feeding.quantity = rng.choice([30, 240])
+            feeding.save()
+        for feeding in rng.sample(feedings, 20):
+            feeding.delete()
+        self.assertMatchesBatch()
+
+        out = StringIO()
+        call_command('verify_running_statistics', stdout=out)
+        self.assertIn('Checked 1 babies, 0 differ', out.getvalue())
+
+    def test_verify_reports_and_repairs_drift(self):
+        for hours in (0, 3, 7):
+            self._feed(hours)
+        FeedingStatistics.objects.filter(baby=self.baby).update(quantity_mean=99)
+        with self.assertRaises(CommandError):
+            call_command('verify_running_statistics', stdout=StringIO())
+
+        version = get_data_version(self.baby.id)
+        out = StringIO()
+        call_command('verify_running_statistics', '--repair', stdout=out)
+        self.assertIn(f'Baby {self.baby.id} quantity', out.getvalue())
+        self.assertIn('1 repaired', out.getvalue())
+        self.assertMatchesBatch()
+        self.assertNotEqual(get_data_version(self.baby.id), version)
+
+    def test_deleting_baby_cascades_cleanly(self):
+        self._feed(0)
+        self._feed(3)
+        self.baby.delete()
+        self.assertFalse(FeedingStatistics.objects.exists())
+
+
+class SleepStatisticsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date=date(2023, 1, 1), gender='Male', user=self.user)
+        self.start = datetime(2024, 3, 4, 20, 0, tzinfo=pytz.UTC)
+
+    def test_durations_count_once_sleeps_end(self):
+        sleep = Sleep.objects.create(baby=self.baby, start_time=self.start)
+        self.assertFalse(SleepStatistics.objects.exists())
+        sleep.end_time = self.start + timedelta(hours=9)
+        sleep.save()
+        Sleep.objects.create(baby=self.baby, start_time=self.start + timedelta(days=1, hours=-6),
+                             end_time=self.start + timedelta(days=1, hours=-5))
+        statistics = SleepStatistics.objects.get(baby=self.baby)
+        self.assertEqual(stored_moments(statistics, 'duration'), (2, 5.0, 32.0))
+
+        sleep.start_time += timedelta(hours=1)
+        sleep.save()
+        sleep.delete()
+        statistics.refresh_from_db()
+        self.assertEqual(stored_moments(statistics, 'duration'), (1, 1.0, 0.0))
+
+    def test_random_writes_match_batch(self):
+        rng = random.Random(9)
+        sleeps = []
+        for day in range(40):
+            start = self.start + timedelta(days=day, minutes=rng.randrange(-120, 120))
+            end = start + timedelta(minutes=rng.randrange(30, 700)) if rng.random() < 0.9 else None
+            sleeps.append(Sleep.objects.create(baby=self.baby, start_time=start, end_time=end))
+        for sleep in rng.sample(sleeps, 10):
+            sleep.end_time = None if rng.random() < 0.3 else sleep.start_time + timedelta(hours=rng.uniform(1, 12))
+            sleep.save()
+        for sleep in rng.sample(sleeps, 5):
+            sleep.delete()
+        stored = stored_moments(SleepStatistics.objects.get(baby=self.baby), 'duration')
+        self.assertTrue(moments_match(stored, batch_sleep_moments(self.baby)['duration']))
+
+        out = StringIO()
+        call_command('verify_running_statistics', stdout=out)
+        self.assertIn('Checked 1 babies, 0 differ', out.getvalue())
@@ -71,15 +71,15 @@ class SleepAPITestCase(TestCase):
         # Test authenticated user can list their sleep records
         response = self.client1.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby1.id)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby1.id)
         
         # Test second user can list their sleep records
         response = self.client2.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['baby'], self.baby2.id)
-        self.assertIsNone(response.data[0]['end_time'])  # Verify ongoing sleep
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['baby'], self.baby2.id)
+        self.assertIsNone(response.data['results'][0]['end_time'])  # Verify ongoing sleep
         
         # Test unauthenticated user cannot list sleep records
         response = self.unauthenticated_client.get(url)
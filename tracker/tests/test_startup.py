@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+from django.conf import settings
+from django.test import SimpleTestCase
+
+
+class WorkerStartupTestCase(SimpleTestCase):
+    def test_boot_does_not_import_analytics_stack(self):
+        # A fresh interpreter, since this test process has already imported them
+        code = (
+            "import sys, django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns; "
+            "print(sorted(m for m in ('numpy', 'pandas', 'scipy', 'sklearn') if m in sys.modules))"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='babytracker.settings', DJANGO_DEBUG='False')
+        result = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[]')
@@ -0,0 +1,159 @@
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, Sleep, Medication, Tombstone
+from tracker import sync
+from tracker.sync import make_sync_token, SYNC_MODELS
+from datetime import timedelta
+
+
+class SyncTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.other_user = User.objects.create_user(username='testuser2', password='testpassword2')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.other_baby = Baby.objects.create(name='Other', birth_date='2023-01-01', gender='Male', user=self.other_user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.feedings = [
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120) for _ in range(3)
+        ]
+        Feeding.objects.create(baby=self.other_baby, feeding_type='bottle', quantity=90)
+        Medication.objects.create(user=self.user, name='Vitamin D', dosage='400IU', frequency='daily', start_date='2023-01-01')
+
+    def _sync(self, token=None):
+        url = reverse('sync') + (f'?since={token}' if token else '')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def _watermark(self):
+        # A token for "now", without the overlap the endpoint adds
+        return make_sync_token(timezone.now())
+
+    def test_full_sync_returns_only_own_records(self):
+        data = self._sync()
+        self.assertEqual([b['id'] for b in data['changes']['babies']], [self.baby.id])
+        self.assertEqual(sorted(f['id'] for f in data['changes']['feedings']), [f.id for f in self.feedings])
+        self.assertEqual(len(data['changes']['medications']), 1)
+        self.assertEqual(set(data['changes']), {key for key, *_ in SYNC_MODELS})
+        self.assertIsNotNone(data['next'])
+
+    def test_incremental_sync_returns_only_changes(self):
+        token = self._watermark()
+        created = Feeding.objects.create(baby=self.baby, feeding_type='solid', quantity=50)
+        self.feedings[0].quantity = 150
+        self.feedings[0].save()
+
+        data = self._sync(token)
+        self.assertEqual(sorted(f['id'] for f in data['changes']['feedings']), sorted([created.id, self.feedings[0].id]))
+        self.assertEqual(data['changes']['babies'], [])
+        self.assertEqual(data['changes']['medications'], [])
+
+    def test_deletions_are_reported(self):
+        token = self._watermark()
+        deleted_id = self.feedings[1].id
+        self.feedings[1].delete()
+        Feeding.objects.filter(baby=self.other_baby).delete()
+
+        data = self._sync(token)
+        self.assertEqual(data['deleted']['feedings'], [deleted_id])
+        self.assertEqual(data['deleted']['medications'], [])
+
+    def test_baby_deletion_replaces_child_tombstones(self):
+        Sleep.objects.create(baby=self.baby, start_time=timezone.now() - timedelta(hours=2))
+        token = self._watermark()
+        baby_id = self.baby.id
+        self.baby.delete()
+
+        data = self._sync(token)
+        self.assertEqual(data['deleted']['babies'], [baby_id])
+        self.assertEqual(data['deleted']['feedings'], [])
+        self.assertFalse(Tombstone.objects.filter(baby_id=baby_id).exists())
+
+    def test_user_owned_deletion_reported(self):
+        token = self._watermark()
+        medication = Medication.objects.get(user=self.user)
+        medication_id = medication.id
+        medication.delete()
+        self.assertEqual(self._sync(token)['deleted']['medications'], [medication_id])
+
+    def test_deleting_user_discards_tombstones(self):
+        Medication.objects.get(user=self.user).delete()
+        user_id = self.user.id
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.filter(user_id=user_id).exists())
+
+    def test_next_token_round_trips(self):
+        data = self._sync()
+        follow_up = self._sync(data['next'])
+        self.assertEqual(follow_up['since'], data['next'])
+
+    def test_invalid_token_rejected(self):
+        response = self.client.get(reverse('sync') + '?since=not-a-token')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_independent_of_history(self):
+        token = self._watermark()
+        # One query per synced model plus one for tombstones
+        with self.assertNumQueries(len(SYNC_MODELS) + 1):
+            self._sync(token)
+        for _ in range(20):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=100)
+        with self.assertNumQueries(len(SYNC_MODELS) + 1):
+            self._sync(token)
+
+    def _pages(self, token=None):
+        pages = [self._sync(token)]
+        while pages[-1]['more']:
+            pages.append(self._sync(pages[-1]['next']))
+        return pages
+
+    def test_full_sync_is_paged(self):
+        with mock.patch.object(sync, 'SYNC_PAGE_SIZE', 2):
+            pages = self._pages()
+        self.assertTrue(all(sum(map(len, page['changes'].values())) <= 2 for page in pages))
+        self.assertEqual(len(pages), 3)
+        feedings = [f['id'] for page in pages for f in page['changes']['feedings']]
+        self.assertEqual(sorted(feedings), [f.id for f in self.feedings])
+        self.assertEqual(sum(len(page['changes']['medications']) for page in pages), 1)
+
+        # The last page carries the watermark for the next sync
+        created = Feeding.objects.create(baby=self.baby, feeding_type='solid', quantity=50)
+        follow_up = self._sync(pages[-1]['next'])
+        self.assertFalse(follow_up['more'])
+        self.assertIn(created.id, [f['id'] for f in follow_up['changes']['feedings']])
+
+    def test_incremental_sync_is_paged(self):
+        token = self._watermark()
+        created = [Feeding.objects.create(baby=self.baby, feeding_type='solid', quantity=50) for _ in range(5)]
+        deleted_id = self.feedings[0].id
+        self.feedings[0].delete()
+        with mock.patch.object(sync, 'SYNC_PAGE_SIZE', 2):
+            pages = self._pages(token)
+        self.assertEqual(len(pages), 3)
+        self.assertEqual([f['id'] for page in pages for f in page['changes']['feedings']], [f.id for f in created])
+        self.assertEqual(pages[0]['deleted']['feedings'], [deleted_id])
+
+    def test_token_older_than_retention_requires_resync(self):
+        token = make_sync_token(timezone.now() - sync.SYNC_RETENTION - timedelta(minutes=1))
+        response = self.client.get(reverse('sync') + f'?since={token}')
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data['detail'].code, 'resync_required')
+
+    def test_prune_tombstones(self):
+        Medication.objects.get(user=self.user).delete()
+        self.feedings[0].delete()
+        Tombstone.objects.filter(model='tracker.medication').update(
+            deleted_at=timezone.now() - sync.SYNC_RETENTION - timedelta(days=1))
+        out = StringIO()
+        call_command('prune_tombstones', stdout=out)
+        self.assertIn('Pruned 1 tombstones', out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list('model', flat=True)), ['tracker.feeding'])
@@ -0,0 +1,90 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, DiaperChange, Sleep, GrowthMeasurement, DevelopmentalMilestone
+from tracker.timeline import TIMELINE_SOURCES
+from datetime import datetime, timedelta
+import pytz
+
+
+class BabyTimelineTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.other_user = User.objects.create_user(username='testuser2', password='testpassword2')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user)
+        self.other_baby = Baby.objects.create(name='Other', birth_date='2023-01-01', gender='Male', user=self.other_user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.start = datetime(2024, 3, 10, 8, 0, tzinfo=pytz.UTC)
+
+    def _url(self, **params):
+        url = reverse('baby-timeline', kwargs={'baby_id': self.baby.id})
+        return url + ('?' + '&'.join(f'{k}={v}' for k, v in params.items()) if params else '')
+
+    def _collect(self, url):
+        events = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            events.extend(response.data['results'])
+            url = response.data['next']
+        return [(event['type'], event['data']['id']) for event in events]
+
+    def test_events_merged_newest_first(self):
+        feeding = Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.start)
+        sleep = Sleep.objects.create(baby=self.baby, start_time=self.start + timedelta(hours=1))
+        diaper = DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=self.start + timedelta(hours=2))
+        growth = GrowthMeasurement.objects.create(baby=self.baby, date='2024-03-09', height=60, weight=5)
+        milestone = DevelopmentalMilestone.objects.create(
+            baby=self.baby, title='Rolled over', category='physical', date_achieved='2024-03-11')
+        Feeding.objects.create(baby=self.other_baby, feeding_type='bottle', quantity=90, time=self.start)
+
+        response = self.client.get(self._url())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(
+            [(event['type'], event['data']['id']) for event in response.data['results']],
+            [('developmental_milestone', milestone.id), ('diaper_change', diaper.id), ('sleep', sleep.id),
+             ('feeding', feeding.id), ('growth_measurement', growth.id)],
+        )
+        self.assertEqual(response.data['results'][0]['time'], datetime(2024, 3, 11, tzinfo=pytz.UTC))
+
+    def test_pages_cover_every_event_once_with_ties(self):
+        midnight = datetime(2024, 3, 10, tzinfo=pytz.UTC)
+        for moment in (midnight, midnight, self.start, self.start):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=moment)
+            DiaperChange.objects.create(baby=self.baby, diaper_type='wet', time=moment)
+            Sleep.objects.create(baby=self.baby, start_time=moment)
+        for _ in range(2):
+            GrowthMeasurement.objects.create(baby=self.baby, date='2024-03-10', height=60, weight=5)
+            DevelopmentalMilestone.objects.create(
+                baby=self.baby, title='Smiled', category='social', date_achieved='2024-03-10')
+
+        everything = self._collect(self._url(limit=100))
+        self.assertEqual(len(everything), 16)
+        for limit in (1, 3, 5):
+            self.assertEqual(self._collect(self._url(limit=limit)), everything)
+
+    def test_page_reads_limit_plus_one_row_per_table(self):
+        for i in range(10):
+            Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.start - timedelta(hours=i))
+        first = self.client.get(self._url(limit=4))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(first.data['next'])
+        self.assertEqual(len(response.data['results']), 4)
+        # One ownership lookup plus one bounded query per event type
+        self.assertEqual(len(queries), 1 + len(TIMELINE_SOURCES))
+        self.assertTrue(all('LIMIT 5' in query['sql'] for query in queries.captured_queries[1:]))
+
+    def test_other_users_baby_not_found(self):
+        url = reverse('baby-timeline', kwargs={'baby_id': self.other_baby.id})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_params_rejected(self):
+        self.assertEqual(self.client.get(self._url(before='garbage')).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self._url(limit='0')).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self._url(limit='ten')).status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,92 @@
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from tracker.models import Baby, Feeding, Sleep, DiaperChange, GrowthMeasurement
+from datetime import datetime, timedelta
+import pytz
+
+
+class InsightsVisualizationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser1', password='testpassword1')
+        self.baby = Baby.objects.create(name='Baby One', birth_date='2023-01-01', gender='Male', user=self.user,
+                                        timezone='America/New_York')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        # 02:00 UTC on the 10th is 21:00 on the 9th in New York, where clocks
+        # spring forward at 02:00 local that night
+        self.start = datetime(2024, 3, 10, 2, 0, tzinfo=pytz.UTC)
+
+    def _get(self, viz_type, **params):
+        url = reverse('baby-insights-visualizations', kwargs={'baby_id': self.baby.id})
+        params = {'type': viz_type, 'since': '2024-01-01', **params}
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_feeding_series(self):
+        for hours, feeding_type, quantity in ((0, 'bottle', 120), (4, 'bottle', 90), (30, 'breast', 60)):
+            Feeding.objects.create(baby=self.baby, feeding_type=feeding_type, quantity=quantity,
+                                   time=self.start + timedelta(hours=hours))
+        data = self._get('feeding')
+        self.assertEqual(data['feeding_patterns'], {
+            'hour_distribution': {1: 1, 4: 1, 21: 1},
+            'feeding_type_distribution': {'bottle': 2, 'breast': 1},
+        })
+        self.assertEqual(data['feeding_visualization'], {
+            'dates': ['2024-03-09', '2024-03-10', '2024-03-11'],
+            'counts': [1, 1, 1],
+            'quantities': [120.0, 90.0, 60.0],
+        })
+
+    def test_sleep_and_diaper_series(self):
+        Sleep.objects.create(baby=self.baby, start_time=self.start, end_time=self.start + timedelta(hours=4))
+        Sleep.objects.create(baby=self.baby, start_time=self.start + timedelta(hours=12))
+        for diaper_type in ('wet', 'wet', 'dirty'):
+            DiaperChange.objects.create(baby=self.baby, diaper_type=diaper_type, time=self.start)
+
+        sleep = self._get('sleep')
+        self.assertEqual(sleep['sleep_patterns'], {'start_hour_distribution': {10: 1, 21: 1}})
+        # The first sleep runs past local midnight, so its minutes are split
+        self.assertEqual(sleep['sleep_visualization'], {
+            'dates': ['2024-03-09', '2024-03-10'], 'counts': [1, 1], 'hours': [3.0, 1.0],
+        })
+
+        diaper = self._get('diaper')
+        self.assertEqual(diaper['diaper_distribution'], {'wet': 2, 'dirty': 1})
+        self.assertEqual(diaper['diaper_visualization'], {
+            'dates': ['2024-03-09'], 'counts': [3], 'hour_distribution': {21: 3},
+        })
+
+    def test_growth_matches_growth_insights(self):
+        from tracker.ai_insights import AIInsights
+        for day, height, weight in (('2023-02-01', 52, 4.1), ('2023-03-03', 55.5, 5.0),
+                                    ('2023-04-01', 58, 5.8), ('2023-06-01', 61.2, 6.9)):
+            GrowthMeasurement.objects.create(baby=self.baby, date=day, height=height, weight=weight)
+        insights = AIInsights(self.baby).get_growth_insights()
+        data = self._get('growth')
+        self.assertEqual(data['growth_trends'], insights['growth_velocity'])
+        self.assertEqual(data['growth_visualization'], insights['visualization_data'])
+
+    def test_charts_skip_the_insight_analyses(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.start)
+        GrowthMeasurement.objects.create(baby=self.baby, date='2023-02-01', height=52, weight=4.1)
+        with mock.patch('tracker.ai_insights.AIInsights.__init__', side_effect=AssertionError):
+            # The baby lookup plus a fixed set of aggregates, however long the
+            # history; each hour histogram sums stored weeks, and the window
+            # opens at the baby's local midnight on a Monday, with no edges
+            with self.assertNumQueries(10):
+                data = self._get('all')
+        self.assertEqual(set(data), {'feeding', 'sleep', 'growth', 'diaper'})
+        self.assertEqual(data['growth'], {'trends': {}, 'visualization_data': {}})
+
+    def test_window_applies_to_events(self):
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=120, time=self.start)
+        Feeding.objects.create(baby=self.baby, feeding_type='bottle', quantity=90,
+                               time=self.start - timedelta(days=30))
+        data = self._get('feeding', since='2024-03-01', until='2024-04-01')
+        self.assertEqual(data['feeding_patterns']['feeding_type_distribution'], {'bottle': 1})
+        self.assertEqual(data['feeding_visualization']['dates'], ['2024-03-09'])
@@ -0,0 +1,113 @@
+"""
+Merged, newest-first timeline of a baby's events.
+
+Each event type is read as its own stream, ordered on the model's
+(baby, time) index and cut off at the page cursor, so a page reads at most
+``limit + 1`` rows per table. ``heapq.merge`` interleaves the streams.
+
+Events are ordered by (timestamp, type rank, id), which is unique, so pages
+never skip or repeat an event even when several share a timestamp. Models
+that only store a date are placed at local midnight of that day.
+"""
+import heapq
+from datetime import datetime, time
+
+from django.core import signing
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import Feeding, Sleep, DiaperChange, GrowthMeasurement, DevelopmentalMilestone
+from .serializers import (
+    FeedingSerializer, SleepSerializer, DiaperChangeSerializer, GrowthMeasurementSerializer,
+    DevelopmentalMilestoneSerializer,
+)
+
+# (event type, model, time field, serializer); the position is the type's
+# rank, which breaks ties between events of different types at the same time
+TIMELINE_SOURCES = (
+    ('feeding', Feeding, 'time', FeedingSerializer),
+    ('sleep', Sleep, 'start_time', SleepSerializer),
+    ('diaper_change', DiaperChange, 'time', DiaperChangeSerializer),
+    ('growth_measurement', GrowthMeasurement, 'date', GrowthMeasurementSerializer),
+    ('developmental_milestone', DevelopmentalMilestone, 'date_achieved', DevelopmentalMilestoneSerializer),
+)
+
+TIMELINE_DEFAULT_LIMIT = 20
+TIMELINE_MAX_LIMIT = 100
+
+_CURSOR_SALT = 'tracker.timeline'
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def make_cursor(key):
+    moment, rank, pk = key
+    return signing.dumps([moment.isoformat(), rank, pk], salt=_CURSOR_SALT)
+
+
+def read_cursor(cursor):
+    """Return the (timestamp, rank, id) key encoded by ``make_cursor``."""
+    try:
+        moment, rank, pk = signing.loads(cursor, salt=_CURSOR_SALT)
+        moment = parse_datetime(moment)
+    except (signing.BadSignature, TypeError, ValueError):
+        moment = None
+    if moment is None:
+        raise ValidationError({'before': "Invalid cursor."})
+    return moment, rank, pk
+
+
+def _older_than(queryset, field, is_date, rank, cursor):
+    """Restrict a source to the events ordered after ``cursor``."""
+    moment, cursor_rank, cursor_id = cursor
+    if is_date:
+        # A date sits at local midnight, so it can only tie a cursor that is
+        # exactly midnight; otherwise the cursor's day is wholly older
+        bound = timezone.localtime(moment).date()
+        can_tie = _timestamp(bound) == moment
+    else:
+        bound, can_tie = moment, True
+
+    if rank < cursor_rank:
+        return queryset.filter(**{f'{field}__lte': bound})
+    if rank > cursor_rank:
+        return queryset.filter(**{f'{field}__lt' if can_tie else f'{field}__lte': bound})
+    queryset = queryset.filter(**{f'{field}__lte': bound})
+    if can_tie:
+        queryset = queryset.exclude(**{field: bound, 'id__gte': cursor_id})
+    return queryset
+
+
+def _stream(baby, rank, event_type, model, field, serializer_class, before, limit):
+    is_date = not isinstance(model._meta.get_field(field), models.DateTimeField)
+    queryset = model.objects.filter(baby=baby)
+    if before is not None:
+        queryset = _older_than(queryset, field, is_date, rank, before)
+    for obj in queryset.order_by(f'-{field}', '-id')[:limit]:
+        yield (_timestamp(getattr(obj, field)), rank, obj.id), event_type, obj, serializer_class
+
+
+def timeline_page(baby, before=None, limit=TIMELINE_DEFAULT_LIMIT):
+    """
+    Return up to ``limit`` events older than the ``before`` cursor, and the
+    cursor for the following page (None when there are no more events).
+    """
+    streams = [
+        _stream(baby, rank, event_type, model, field, serializer_class, before, limit + 1)
+        for rank, (event_type, model, field, serializer_class) in enumerate(TIMELINE_SOURCES)
+    ]
+    merged = heapq.merge(*streams, key=lambda item: item[0], reverse=True)
+
+    events, last_key = [], None
+    for key, event_type, obj, serializer_class in merged:
+        if len(events) == limit:
+            return events, make_cursor(last_key)
+        events.append({'type': event_type, 'time': key[0], 'data': serializer_class(obj).data})
+        last_key = key
+    return events, None
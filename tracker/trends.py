@@ -0,0 +1,36 @@
+"""
+Trend labels shared by the insight and chart endpoints.
+
+Plain Python, so the chart endpoint can label a series without importing
+NumPy, and both endpoints call a trend by the same definition. The insight
+analyses fit many columns at once with ``ai_insights.linear_slopes`` and
+label the slopes with ``trend_label``.
+"""
+
+FLAT_SLOPE = 0.01  # Slopes smaller than this in magnitude are "stable"
+
+
+def linear_slope(values):
+    """Least-squares slope of ``values`` against their position, cov(x, y) / var(x) in one pass."""
+    n = len(values)
+    middle = (n - 1) / 2
+    mean = sum(values) / n
+    numerator = sum((i - middle) * (value - mean) for i, value in enumerate(values))
+    return numerator / sum((i - middle) ** 2 for i in range(n))
+
+
+def trend_label(slope):
+    """Classify a slope as stable, increasing or decreasing."""
+    if abs(slope) < FLAT_SLOPE:
+        return "stable"
+    elif slope > 0:
+        return "increasing"
+    else:
+        return "decreasing"
+
+
+def series_trend(values):
+    """The trend label of a series in order, or "insufficient data" below three values."""
+    if len(values) < 3:
+        return "insufficient data"
+    return trend_label(linear_slope(values))
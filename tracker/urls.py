@@ -1,13 +1,14 @@
 from django.urls import path
 from .views import (
-    BabyListCreateView, BabyDetailView, BabyStatsView,
-    FeedingListCreateView, FeedingDetailView,
-    DiaperChangeListCreateView, DiaperChangeDetailView, SleepListCreateView, SleepDetailView,
+    BabyListCreateView, BabyDetailView, BabyStatsView, BabyExportView, BabyTimelineView,
+    FeedingListCreateView, FeedingBulkCreateView, FeedingDetailView,
+    DiaperChangeListCreateView, DiaperChangeBulkCreateView, DiaperChangeDetailView,
+    SleepListCreateView, SleepBulkCreateView, SleepDetailView,
     ReminderListCreateView, ReminderDetailView, GrowthMeasurementListCreateView, GrowthMeasurementDetailView, BabyAIInsightsView,
     MedicationListCreateView, MedicationDetailView,
     PumpingSessionListCreateView, PumpingSessionDetailView,
     DoctorAppointmentListCreateView, DoctorAppointmentDetailView,
-    RegisterView,
+    RegisterView, SyncView,
     DevelopmentalMilestoneListCreateView, DevelopmentalMilestoneDetailView,
     InsightsVisualizationView,
     RecipeListCreateView, RecipeDetailView,
@@ -20,14 +21,19 @@ urlpatterns = [
     path("babies/", BabyListCreateView.as_view(), name="baby-list"),
     path("babies/<int:pk>/", BabyDetailView.as_view(), name="baby-detail"),
     path("babies/<int:baby_id>/stats/", BabyStatsView.as_view(), name="baby-stats"),
+    path("babies/<int:baby_id>/export/", BabyExportView.as_view(), name="baby-export"),
+    path("babies/<int:baby_id>/timeline/", BabyTimelineView.as_view(), name="baby-timeline"),
     
     path("feedings/", FeedingListCreateView.as_view(), name="feeding-list"),
+    path("feedings/bulk/", FeedingBulkCreateView.as_view(), name="feeding-bulk"),
     path("feedings/<int:pk>/", FeedingDetailView.as_view(), name="feeding-detail"),
 
     path("diaper-changes/", DiaperChangeListCreateView.as_view(), name="diaper-change-list"),
+    path("diaper-changes/bulk/", DiaperChangeBulkCreateView.as_view(), name="diaper-change-bulk"),
     path("diaper-changes/<int:pk>/", DiaperChangeDetailView.as_view(), name="diaper-change-detail"),
 
     path("sleep/", SleepListCreateView.as_view(), name="sleep-list"),
+    path("sleep/bulk/", SleepBulkCreateView.as_view(), name="sleep-bulk"),
     path("sleep/<int:pk>/", SleepDetailView.as_view(), name="sleep-detail"),
 
     path("reminders/", ReminderListCreateView.as_view(), name="reminder-list"),
@@ -58,6 +64,8 @@ urlpatterns = [
     path("ingredients/", IngredientListCreateView.as_view(), name='ingredient-list'),
     path("ingredients/<int:pk>/", IngredientDetailView.as_view(), name='ingredient-detail'),
 
+    path("sync/", SyncView.as_view(), name="sync"),
+
     path("token/", TokenObtainPairView.as_view(), name="token_obtain_pair"),
     path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
 ]
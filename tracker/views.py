@@ -1,13 +1,25 @@
 from rest_framework import generics
-from .models import Baby,Feeding,DiaperChange,Sleep,Reminder,GrowthMeasurement, DevelopmentalMilestone, PumpingSession, DoctorAppointment, Medication, Recipe, Ingredient
-from .serializers import BabySerializer,BabyInsightSerializer ,FeedingSerializer,DiaperChangeSerializer,SleepSerializer,ReminderSerializer,GrowthMeasurementSerializer,PumpingSessionSerializer,DoctorAppointmentSerializer,MedicationSerializer,BabyStatsSerializer, DevelopmentalMilestoneSerializer, RegisterSerializer, RecipeSerializer, IngredientSerializer
+from .models import Baby,Feeding,DiaperChange,Sleep,Reminder,GrowthMeasurement, DevelopmentalMilestone, PumpingSession, DoctorAppointment, Medication, Recipe, Ingredient, DailyActivitySummary
+from .serializers import BabySerializer,BabyInsightSerializer ,FeedingSerializer,DiaperChangeSerializer,SleepSerializer,ReminderSerializer,GrowthMeasurementSerializer,PumpingSessionSerializer,DoctorAppointmentSerializer,MedicationSerializer,BabyStatsSerializer, DevelopmentalMilestoneSerializer, RegisterSerializer, RecipeSerializer, IngredientSerializer, FeedingBulkSerializer, DiaperChangeBulkSerializer, SleepBulkSerializer
 from django.contrib.auth.models import User
 from rest_framework import permissions
 from rest_framework.response import Response
-from datetime import timedelta, date
+from datetime import timedelta
+from django.db.models import Max, Min, Q, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django_ratelimit.decorators import ratelimit
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
-from .ai_insights import AIInsights
-from .base_views import BabyOwnedCreateView, BabyOwnedDetailView, UserOwnedCreateView, UserOwnedDetailView
+from .cache import cached_insights, window_key
+from .sync import collect_changes, read_sync_token
+from .export import stream_csv, stream_ndjson
+from .timeline import timeline_page, read_cursor, TIMELINE_DEFAULT_LIMIT, TIMELINE_MAX_LIMIT
+from .renderers import CSVRenderer, NDJSONRenderer
+from .visualizations import BabyVisualizations
+from .base_views import parse_insight_window, BabyOwnedCreateView, BabyOwnedBulkCreateView, BabyOwnedDetailView, UserOwnedCreateView, UserOwnedDetailView
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,6 +43,10 @@ class FeedingListCreateView(BabyOwnedCreateView):
     serializer_class = FeedingSerializer
     model = Feeding
 
+class FeedingBulkCreateView(BabyOwnedBulkCreateView):
+    serializer_class = FeedingBulkSerializer
+    model = Feeding
+
 class FeedingDetailView(BabyOwnedDetailView):
     serializer_class = FeedingSerializer
     model = Feeding
@@ -39,6 +55,10 @@ class DiaperChangeListCreateView(BabyOwnedCreateView):
     serializer_class = DiaperChangeSerializer
     model = DiaperChange
 
+class DiaperChangeBulkCreateView(BabyOwnedBulkCreateView):
+    serializer_class = DiaperChangeBulkSerializer
+    model = DiaperChange
+
 class DiaperChangeDetailView(BabyOwnedDetailView):
     serializer_class = DiaperChangeSerializer
     model = DiaperChange
@@ -46,6 +66,11 @@ class DiaperChangeDetailView(BabyOwnedDetailView):
 class SleepListCreateView(BabyOwnedCreateView):
     serializer_class = SleepSerializer
     model = Sleep
+    time_field = 'start_time'
+
+class SleepBulkCreateView(BabyOwnedBulkCreateView):
+    serializer_class = SleepBulkSerializer
+    model = Sleep
 
 class SleepDetailView(BabyOwnedDetailView):
     serializer_class = SleepSerializer
@@ -54,6 +79,7 @@ class SleepDetailView(BabyOwnedDetailView):
 class ReminderListCreateView(UserOwnedCreateView):
     serializer_class = ReminderSerializer
     model = Reminder
+    time_field = 'time'
     
     def perform_create(self, serializer):
         # Verify the baby belongs to the current user
@@ -75,6 +101,7 @@ class ReminderDetailView(UserOwnedDetailView):
 class GrowthMeasurementListCreateView(BabyOwnedCreateView):
     serializer_class = GrowthMeasurementSerializer
     model = GrowthMeasurement
+    time_field = 'date'
 
 class GrowthMeasurementDetailView(BabyOwnedDetailView):
     serializer_class = GrowthMeasurementSerializer
@@ -97,26 +124,27 @@ class BabyStatsView(APIView):
             return Response({"error": "Internal server error"}, status=500)
 
         try:
-            today = date.today()
-            feedings_today = Feeding.objects.filter(baby=baby, time__date=today).count()
-
-            feeding_times = list(
-                Feeding.objects.filter(baby=baby).order_by("time").values_list("time", flat=True)
+            # Counts and totals come from the daily rollup, one row per day;
+            # the feeding span is read from the ends of the (baby, time) index
+            today = timezone.localdate(timezone=baby.tzinfo)
+            totals = DailyActivitySummary.objects.filter(baby=baby).aggregate(
+                feeding_count=Sum("feed_count"),
+                feedings_today=Sum("feed_count", filter=Q(date=today)),
+                sleep_minutes=Sum("sleep_minutes", filter=Q(date__gte=today - timedelta(days=7))),
             )
-            if len(feeding_times) >= 2:
-                intervals = [
-                    (feeding_times[i+1] - feeding_times[i]).total_seconds() / 3600
-                    for i in range(len(feeding_times) - 1)
-                ]
-                avg_feed_interval = round(sum(intervals) / len(intervals), 2)
+            feedings_today = totals["feedings_today"] or 0
+
+            # The mean of consecutive intervals telescopes to (last - first) / (n - 1)
+            feeding_count = totals["feeding_count"] or 0
+            if feeding_count >= 2:
+                span = Feeding.objects.filter(baby=baby).aggregate(first=Min("time"), last=Max("time"))
+                avg_feed_interval = round(
+                    (span["last"] - span["first"]).total_seconds() / 3600 / (feeding_count - 1), 2
+                )
             else:
                 avg_feed_interval = None
 
-            sleep_sessions = Sleep.objects.filter(baby=baby, start_time__gte=today - timedelta(days=7))
-            total_sleep_seconds = sum(
-                (s.end_time - s.start_time).total_seconds() for s in sleep_sessions if s.end_time
-            )
-            total_sleep_hours = round(total_sleep_seconds / 3600, 2)
+            total_sleep_hours = round((totals["sleep_minutes"] or 0) / 60, 2)
 
             return Response({
                 "feedings_today": feedings_today,
@@ -128,9 +156,51 @@ class BabyStatsView(APIView):
             return Response({"error": "Error calculating statistics"}, status=500)
 
 
+class BabyExportView(APIView):
+    """Stream a baby's full history as NDJSON (the default) or CSV, chosen with ?format="""
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    @method_decorator(ratelimit(key='user', rate='20/h', method='GET'))
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    def get(self, request, baby_id):
+        try:
+            baby = Baby.objects.get(id=baby_id, user=request.user)
+        except Baby.DoesNotExist:
+            return Response({"error": "Baby not found"}, status=404)
+
+        renderer = request.accepted_renderer
+        rows = stream_csv(baby) if renderer.format == 'csv' else stream_ndjson(baby)
+        response = StreamingHttpResponse(rows, content_type=f"{renderer.media_type}; charset=utf-8")
+        response['Content-Disposition'] = f'attachment; filename="baby-{baby.id}-export.{renderer.format}"'
+        return response
+
+class BabyTimelineView(APIView):
+    """Newest-first page of a baby's feedings, sleeps, diapers, growth and milestones"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, baby_id):
+        try:
+            baby = Baby.objects.get(id=baby_id, user=request.user)
+        except Baby.DoesNotExist:
+            return Response({"error": "Baby not found"}, status=404)
+
+        limit = request.query_params.get('limit', str(TIMELINE_DEFAULT_LIMIT))
+        if not limit.isdigit() or int(limit) == 0:
+            raise ValidationError({'limit': "Enter a positive whole number."})
+        limit = min(int(limit), TIMELINE_MAX_LIMIT)
+
+        before = request.query_params.get('before')
+        events, next_cursor = timeline_page(baby, read_cursor(before) if before else None, limit)
+        next_url = replace_query_param(request.build_absolute_uri(), 'before', next_cursor) if next_cursor else None
+        return Response({"next": next_url, "results": events})
+
 class PumpingSessionListCreateView(UserOwnedCreateView):
     serializer_class = PumpingSessionSerializer
     model = PumpingSession
+    time_field = 'time'
 
 class PumpingSessionDetailView(UserOwnedDetailView):
     serializer_class = PumpingSessionSerializer
@@ -139,6 +209,7 @@ class PumpingSessionDetailView(UserOwnedDetailView):
 class DoctorAppointmentListCreateView(BabyOwnedCreateView):
     serializer_class = DoctorAppointmentSerializer
     model = DoctorAppointment
+    time_field = 'date'
 
 class DoctorAppointmentDetailView(BabyOwnedDetailView):
     serializer_class = DoctorAppointmentSerializer
@@ -147,6 +218,7 @@ class DoctorAppointmentDetailView(BabyOwnedDetailView):
 class MedicationListCreateView(UserOwnedCreateView):
     serializer_class = MedicationSerializer
     model = Medication
+    time_field = 'start_date'
 
 class MedicationDetailView(UserOwnedDetailView):
     serializer_class = MedicationSerializer
@@ -155,6 +227,7 @@ class MedicationDetailView(UserOwnedDetailView):
 class DevelopmentalMilestoneListCreateView(BabyOwnedCreateView):
     serializer_class = DevelopmentalMilestoneSerializer
     model = DevelopmentalMilestone
+    time_field = 'date_achieved'
 
 class DevelopmentalMilestoneDetailView(BabyOwnedDetailView):
     serializer_class = DevelopmentalMilestoneSerializer
@@ -171,28 +244,42 @@ class BabyAIInsightsView(APIView):
             return Response({"error": "Baby not found"}, status=404)
 
         insight_type = request.query_params.get('type', 'all')
-        ai = AIInsights(baby)
+        if insight_type not in ('feeding', 'sleep', 'growth', 'diaper', 'comprehensive'):
+            insight_type = 'all'
+        window = parse_insight_window(request.query_params, baby)
+
+        return Response(cached_insights(
+            baby.id, f"ai-insights:{insight_type}:{window_key(window)}",
+            lambda: self._build_insights(baby, insight_type, window)
+        ))
+
+    def _build_insights(self, baby, insight_type, window):
+        # The analytics stack (pandas, NumPy) is imported on the
+        # first cache miss, so workers that only serve CRUD never load it
+        from .ai_insights import AIInsights
+
+        ai = AIInsights(baby, *window)
         
         if insight_type == 'feeding':
-            return Response({
+            return {
                 "feeding_insights": ai.get_feeding_insights()
-            })
+            }
         elif insight_type == 'sleep':
-            return Response({
+            return {
                 "sleep_insights": ai.get_sleep_insights()
-            })
+            }
         elif insight_type == 'growth':
-            return Response({
+            return {
                 "growth_insights": ai.get_growth_insights()
-            })
+            }
         elif insight_type == 'diaper':
-            return Response({
+            return {
                 "diaper_insights": ai.get_diaper_insights()
-            })
+            }
         elif insight_type == 'comprehensive':
-            return Response({
+            return {
                 "comprehensive_insights": ai.get_comprehensive_insights()
-            })
+            }
         else:  # 'all'
             feeding_insights = ai.get_feeding_insights()
             sleep_insights = ai.get_sleep_insights()
@@ -200,18 +287,28 @@ class BabyAIInsightsView(APIView):
             diaper_insights = ai.get_diaper_insights()
             comprehensive_insights = ai.get_comprehensive_insights()
             
-            return Response({
+            return {
                 "feeding_insights": feeding_insights,
                 "sleep_insights": sleep_insights,
                 "growth_insights": growth_insights,
                 "diaper_insights": diaper_insights,
                 "comprehensive_insights": comprehensive_insights
-            })
+            }
 
     def post(self, request, baby_id):
         # For now, treat POST the same as GET for generating reports
         return self.get(request, baby_id)
 
+class SyncView(APIView):
+    """Rows created, updated or deleted since the client's last sync."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        token = request.query_params.get('since')
+        since, position = read_sync_token(token) if token else (None, None)
+        payload = collect_changes(request.user, since, position)
+        return Response({'since': token, **payload})
+
 class RecipeListCreateView(UserOwnedCreateView):
     serializer_class = RecipeSerializer
     model = Recipe
@@ -246,62 +343,48 @@ class InsightsVisualizationView(APIView):
             return Response({"error": "Baby not found"}, status=404)
             
         visualization_type = request.query_params.get('type', 'all')
-        ai = AIInsights(baby)
-        
-        # Extract only visualization data from insights
+        if visualization_type not in ('feeding', 'sleep', 'growth', 'diaper'):
+            visualization_type = 'all'
+        window = parse_insight_window(request.query_params, baby)
+
+        return Response(cached_insights(
+            baby.id, f"charts:{visualization_type}:{window_key(window)}",
+            lambda: self._build_visualizations(baby, visualization_type, window)
+        ))
+
+    def _build_visualizations(self, baby, visualization_type, window):
+        # Chart series come straight from database aggregates, without the
+        # analyses behind the insights endpoint
+        charts = BabyVisualizations(baby, *window)
+
         if visualization_type == 'feeding':
-            insights = ai.get_feeding_insights()
-            visualization_data = {
-                'feeding_patterns': insights.get('patterns', {}),
-                'feeding_trends': insights.get('trends', {}),
-                'feeding_visualization': insights.get('visualization_data', {})
+            feeding = charts.feeding()
+            return {
+                'feeding_patterns': feeding['patterns'],
+                'feeding_visualization': feeding['visualization_data'],
             }
-            
         elif visualization_type == 'sleep':
-            insights = ai.get_sleep_insights()
-            visualization_data = {
-                'sleep_patterns': insights.get('patterns', {}),
-                'sleep_clusters': insights.get('clusters', {}),
-                'sleep_visualization': insights.get('visualization_data', {})
+            sleep = charts.sleep()
+            return {
+                'sleep_patterns': sleep['patterns'],
+                'sleep_visualization': sleep['visualization_data'],
             }
-            
         elif visualization_type == 'growth':
-            insights = ai.get_growth_insights()
-            visualization_data = {
-                'growth_trends': insights.get('growth_velocity', {}),
-                'growth_visualization': insights.get('visualization_data', {})
+            growth = charts.growth()
+            return {
+                'growth_trends': growth['trends'],
+                'growth_visualization': growth['visualization_data'],
             }
-            
         elif visualization_type == 'diaper':
-            insights = ai.get_diaper_insights()
-            visualization_data = {
-                'diaper_distribution': insights.get('type_distribution', {}),
-                'diaper_visualization': insights.get('visualization_data', {})
+            diaper = charts.diaper()
+            return {
+                'diaper_distribution': diaper['distribution'],
+                'diaper_visualization': diaper['visualization_data'],
             }
-            
         else:  # Combined visualizations
-            feeding_insights = ai.get_feeding_insights()
-            sleep_insights = ai.get_sleep_insights()
-            growth_insights = ai.get_growth_insights()
-            diaper_insights = ai.get_diaper_insights()
-            
-            visualization_data = {
-                'feeding': {
-                    'patterns': feeding_insights.get('patterns', {}),
-                    'visualization_data': feeding_insights.get('visualization_data', {})
-                },
-                'sleep': {
-                    'patterns': sleep_insights.get('patterns', {}),
-                    'visualization_data': sleep_insights.get('visualization_data', {})
-                },
-                'growth': {
-                    'trends': growth_insights.get('growth_velocity', {}),
-                    'visualization_data': growth_insights.get('visualization_data', {})
-                },
-                'diaper': {
-                    'distribution': diaper_insights.get('type_distribution', {}),
-                    'visualization_data': diaper_insights.get('visualization_data', {})
-                }
+            return {
+                'feeding': charts.feeding(),
+                'sleep': charts.sleep(),
+                'growth': charts.growth(),
+                'diaper': charts.diaper(),
             }
-        
-        return Response(visualization_data)
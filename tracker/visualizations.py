@@ -0,0 +1,129 @@
+"""
+Chart series for the insights visualization endpoint.
+
+Only what the charts plot is computed, and almost all of it by the
+database: hour histograms come from the weekday-by-hour counts of
+``tracker.heatmaps`` in the baby's time zone, distributions are ``Count``
+aggregates and daily series are read from the ``DailyActivitySummary``
+rollup. Nothing here needs pandas or the insight models, so chart loads
+skip the analyses behind ``/ai-insights/``.
+"""
+from django.db.models import Count
+
+from .heatmaps import window_weekday_hours
+from .histograms import hour_totals
+from .models import DiaperChange, Feeding, GrowthMeasurement, Sleep
+from .rollups import summaries_in_window
+from .trends import series_trend
+
+DAYS_PER_MONTH = 30.44  # As used by the growth insights
+
+
+class BabyVisualizations:
+    """Chart data for one baby, limited to events in [since, until)."""
+
+    def __init__(self, baby, since=None, until=None):
+        self.baby = baby
+        self.since = since
+        self.until = until
+
+    def _events(self, model, field):
+        queryset = model.objects.filter(baby=self.baby)
+        if self.since is not None:
+            queryset = queryset.filter(**{f"{field}__gte": self.since})
+        if self.until is not None:
+            queryset = queryset.filter(**{f"{field}__lt": self.until})
+        return queryset.order_by()
+
+    def _hour_distribution(self, model):
+        """{local hour: event count}, ascending by hour, hours without events left out."""
+        return hour_totals(window_weekday_hours(self.baby, model, self.since, self.until))
+
+    def _distribution(self, model, field, category):
+        """{category: event count}, most frequent first."""
+        rows = (
+            self._events(model, field)
+            .values(category)
+            .annotate(count=Count("id"))
+            .order_by("-count", category)
+        )
+        return {row[category]: row["count"] for row in rows}
+
+    def _daily(self, *fields):
+        """Dates and per-day totals from the rollup, skipping days where every field is zero."""
+        rows = summaries_in_window(self.baby, self.since, self.until).order_by("date").values_list("date", *fields)
+        return [(row[0], row[1:]) for row in rows if any(row[1:])]
+
+    def feeding(self):
+        days = self._daily("feed_count", "total_quantity")
+        return {
+            "patterns": {
+                "hour_distribution": self._hour_distribution(Feeding),
+                "feeding_type_distribution": self._distribution(Feeding, "time", "feeding_type"),
+            },
+            "visualization_data": {
+                "dates": [str(day) for day, _ in days],
+                "counts": [count for _, (count, _) in days],
+                "quantities": [round(quantity, 1) for _, (_, quantity) in days],
+            },
+        }
+
+    def sleep(self):
+        days = self._daily("sleep_count", "sleep_minutes")
+        return {
+            "patterns": {
+                "start_hour_distribution": self._hour_distribution(Sleep),
+            },
+            "visualization_data": {
+                "dates": [str(day) for day, _ in days],
+                "counts": [count for _, (count, _) in days],
+                "hours": [round(minutes / 60, 2) for _, (_, minutes) in days],
+            },
+        }
+
+    def diaper(self):
+        days = self._daily("wet_count", "dirty_count", "mixed_count")
+        return {
+            "distribution": self._distribution(DiaperChange, "time", "diaper_type"),
+            "visualization_data": {
+                "dates": [str(day) for day, _ in days],
+                "counts": [sum(counts) for _, counts in days],
+                "hour_distribution": self._hour_distribution(DiaperChange),
+            },
+        }
+
+    def growth(self):
+        """Measurement series and growth velocity, defined as in the growth insights.
+
+        Measurements are never windowed: velocity needs months of history.
+        """
+        rows = list(
+            GrowthMeasurement.objects.filter(baby=self.baby).order_by("date").values_list("date", "height", "weight")
+        )
+        if len(rows) < 2:
+            return {"trends": {}, "visualization_data": {}}
+
+        dates = [row[0] for row in rows]
+        heights = [row[1] for row in rows]
+        weights = [row[2] for row in rows]
+        months = [(day - self.baby.birth_date).days / DAYS_PER_MONTH for day in dates]
+
+        # Mean velocity over the (up to) three most recent intervals
+        steps = list(zip(range(1, len(rows)), range(len(rows) - 1)))[-3:]
+        height_velocity = [(heights[i] - heights[j]) / (months[i] - months[j]) for i, j in steps if months[i] > months[j]]
+        weight_velocity = [(weights[i] - weights[j]) / (months[i] - months[j]) for i, j in steps if months[i] > months[j]]
+
+        return {
+            "trends": {
+                "height_cm_per_month": round(sum(height_velocity) / len(height_velocity), 2) if height_velocity else 0,
+                "weight_kg_per_month": round(sum(weight_velocity) / len(weight_velocity), 3) if weight_velocity else 0,
+                "height_trend": series_trend(heights),
+                "weight_trend": series_trend(weights),
+            },
+            "visualization_data": {
+                "dates": [day.strftime("%Y-%m-%d") for day in dates],
+                "heights": heights,
+                "weights": weights,
+                "age_months": [round(month, 1) for month in months],
+            },
+        }